@@ -0,0 +1,4 @@
+"""Benchmarks for meowmx's write, read and subscription paths.
+
+Run with `python -m benchmarks run --sql-url ...`; see `--help`.
+"""
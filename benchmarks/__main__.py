@@ -0,0 +1,263 @@
+import argparse
+import datetime
+import importlib.metadata
+import json
+import platform
+import sys
+import typing as t
+import uuid
+
+import sqlalchemy
+
+import meowmx
+
+from . import cases
+from .stats import Result, result_key
+
+
+def _int_list(value: str) -> t.List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+BENCHMARKS = [
+    "save_events",
+    "load_aggregate",
+    "load_all_events",
+    "subscription_catch_up",
+    "subscription_tail",
+]
+
+
+def _create_engine(url: str) -> meowmx.Engine:
+    if url.startswith("sqlite"):
+        return sqlalchemy.create_engine(url, connect_args={"check_same_thread": False})
+    return sqlalchemy.create_engine(url)
+
+
+def _new_id_factory(uuid_type: str) -> t.Callable[[], str]:
+    if uuid_type == "xid":
+        import xid  # type: ignore
+
+        return lambda: t.cast(str, xid.XID().string())
+    return lambda: str(uuid.uuid4())
+
+
+def _run_benchmarks(args: argparse.Namespace, ctx: cases.Context) -> t.List[Result]:
+    selected = set(args.only.split(",")) if args.only else set(BENCHMARKS)
+    results: t.List[Result] = []
+
+    def report(result: Result) -> None:
+        summary = result.to_json()
+        line = f"{result_key(summary)}: {summary['events_per_second']:.1f} events/s"
+        if summary["latency"]:
+            line += f" p99={summary['latency']['p99'] * 1000:.2f}ms"
+        if not result.complete:
+            line += " (timed out)"
+        print(line, file=sys.stderr)
+        results.append(result)
+
+    if "save_events" in selected:
+        for batch_size in args.save_batch_sizes:
+            for existing in (False, True):
+                report(cases.save_events(ctx, batch_size, args.operations, existing))
+    if "load_aggregate" in selected:
+        for length in args.stream_lengths:
+            report(cases.load_aggregate(ctx, length, args.operations))
+    if "load_all_events" in selected:
+        for page_size in args.page_sizes:
+            report(cases.load_all_events(ctx, args.events, page_size))
+    if "subscription_catch_up" in selected:
+        for workers in args.workers:
+            report(
+                cases.subscription_catch_up(
+                    ctx, args.events, workers, args.sub_batch_size, args.timeout
+                )
+            )
+    if "subscription_tail" in selected:
+        for workers in args.workers:
+            report(
+                cases.subscription_tail(
+                    ctx, args.tail_events, workers, args.tail_interval, args.timeout
+                )
+            )
+    return results
+
+
+def run(args: argparse.Namespace) -> int:
+    engine = _create_engine(args.sql_url)
+    meow = meowmx.Client(engine=engine)
+    if not args.skip_setup:
+        meow.setup_tables(args.aggregate_id_column_type)
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    ctx = cases.Context(
+        engine=engine,
+        meow=meow,
+        new_id=_new_id_factory(args.uuid_type),
+        prefix=f"meowmx-benchmark-{started_at:%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}",
+    )
+    results = _run_benchmarks(args, ctx)
+
+    try:
+        version = importlib.metadata.version("meowmx")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    output = {
+        "meowmx_version": version,
+        "python_version": platform.python_version(),
+        "dialect": engine.dialect.name,
+        "started_at": started_at.isoformat(),
+        "results": [result.to_json() for result in results],
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    """Prints how each result changed and fails if any got much slower."""
+    with open(args.baseline) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    with open(args.current) as f:
+        current = {result_key(r): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for key, result in current.items():
+        old = baseline.get(key)
+        if old is None or not old["events_per_second"]:
+            print(f"{key}: no baseline")
+            continue
+        ratio = result["events_per_second"] / old["events_per_second"]
+        regressed = ratio < 1 - args.threshold
+        regressions += regressed
+        print(
+            f"{key}: {old['events_per_second']:.1f} -> "
+            f"{result['events_per_second']:.1f} events/s ({ratio:.2f}x)"
+            + (" REGRESSION" if regressed else "")
+        )
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="benchmarks meowmx"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="runs the benchmarks")
+    run_parser.add_argument(
+        "--sql-url",
+        type=str,
+        default="sqlite:///target/benchmark.db",
+        help="database to benchmark against",
+    )
+    run_parser.add_argument(
+        "--uuid-type",
+        type=str,
+        choices=["uuid4", "xid"],
+        default="uuid4",
+        help="how to generate aggregate IDs",
+    )
+    run_parser.add_argument(
+        "--aggregate-id-column-type",
+        type=str,
+        default=None,
+        help="column type for aggregate IDs if the tables need creating",
+    )
+    run_parser.add_argument(
+        "--skip-setup", action="store_true", help="don't try to create the tables"
+    )
+    run_parser.add_argument(
+        "--only",
+        type=str,
+        default=None,
+        help=f"comma separated benchmarks to run, out of: {', '.join(BENCHMARKS)}",
+    )
+    run_parser.add_argument(
+        "--operations",
+        type=int,
+        default=200,
+        help="timed calls per save / load benchmark",
+    )
+    run_parser.add_argument(
+        "--save-batch-sizes",
+        type=_int_list,
+        default=[1, 10, 100],
+        help="events per save_events call",
+    )
+    run_parser.add_argument(
+        "--stream-lengths",
+        type=_int_list,
+        default=[10, 100, 1000],
+        help="aggregate lengths to load",
+    )
+    run_parser.add_argument(
+        "--page-sizes",
+        type=_int_list,
+        default=[100, 1000],
+        help="page sizes for load_all_events",
+    )
+    run_parser.add_argument(
+        "--events",
+        type=int,
+        default=5000,
+        help="events written for the paging and catch-up benchmarks",
+    )
+    run_parser.add_argument(
+        "--workers",
+        type=_int_list,
+        default=[1, 4],
+        help="concurrent subscribers for the subscription benchmarks",
+    )
+    run_parser.add_argument(
+        "--sub-batch-size",
+        type=int,
+        default=100,
+        help="batch size used by subscribers catching up",
+    )
+    run_parser.add_argument(
+        "--tail-events",
+        type=int,
+        default=200,
+        help="events written one at a time for the tail latency benchmark",
+    )
+    run_parser.add_argument(
+        "--tail-interval",
+        type=float,
+        default=0.01,
+        help="seconds between writes in the tail latency benchmark",
+    )
+    run_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="seconds to wait for subscribers before giving up",
+    )
+    run_parser.add_argument(
+        "--output", type=str, default=None, help="file to write JSON results to"
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="compares two sets of JSON results"
+    )
+    compare_parser.add_argument("baseline", type=str)
+    compare_parser.add_argument("current", type=str)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="fraction of events/s which can be lost before it's a regression",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import dataclasses
+import json
+import threading
+import time
+import typing as t
+
+import meowmx
+
+from .stats import Result
+
+
+@dataclasses.dataclass
+class Context:
+    """What every benchmark needs to talk to the database.
+
+    `prefix` is unique to the run and starts every aggregate type and
+    subscription name, so runs against the same database don't interfere.
+    """
+
+    engine: meowmx.Engine
+    meow: meowmx.Client
+    new_id: t.Callable[[], str]
+    prefix: str
+
+    def new_client(self) -> meowmx.Client:
+        """Creates a second client, standing in for another process."""
+        return meowmx.Client(engine=self.engine)
+
+
+def _new_events(count: int, first_version: int = 0) -> t.List[meowmx.NewEvent]:
+    return [
+        meowmx.NewEvent(
+            event_type="BenchmarkEvent",
+            json=json.dumps({"version": first_version + i, "payload": "x" * 64}),
+        )
+        for i in range(count)
+    ]
+
+
+def _write_stream(
+    meow: meowmx.Client,
+    aggregate_type: str,
+    aggregate_id: str,
+    length: int,
+    chunk_size: int = 100,
+) -> t.List[meowmx.RecordedEvent]:
+    recorded: t.List[meowmx.RecordedEvent] = []
+    version = 0
+    while version < length:
+        count = min(chunk_size, length - version)
+        recorded += meow.save_events(
+            aggregate_type, aggregate_id, _new_events(count, version), version
+        )
+        version += count
+    return recorded
+
+
+def save_events(
+    ctx: Context, batch_size: int, operations: int, existing: bool
+) -> Result:
+    """Times `save_events` writing `batch_size` events per call.
+
+    With `existing` every call appends to the same aggregate, otherwise each
+    call starts a new one.
+    """
+    aggregate_type = f"{ctx.prefix}-save"
+    aggregate_id = ctx.new_id()
+    version = 0
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(operations):
+        if not existing:
+            aggregate_id = ctx.new_id()
+            version = 0
+        events = _new_events(batch_size, version)
+        op_start = time.perf_counter()
+        ctx.meow.save_events(aggregate_type, aggregate_id, events, version)
+        latencies.append(time.perf_counter() - op_start)
+        version += batch_size
+    return Result(
+        benchmark="save_events",
+        params={"batch_size": batch_size, "existing_aggregate": existing},
+        operations=operations,
+        events=operations * batch_size,
+        seconds=time.perf_counter() - start,
+        latencies=latencies,
+    )
+
+
+class _Stream:
+    """A minimal aggregate which only counts its events."""
+
+    def __init__(self, recorded_events: t.List[meowmx.RecordedEvent]) -> None:
+        self.version = -1
+        for event in recorded_events:
+            self.version = event.version
+
+
+def load_aggregate(ctx: Context, stream_length: int, operations: int) -> Result:
+    """Times loading every event of an aggregate and replaying them."""
+    aggregate_type = f"{ctx.prefix}-stream"
+    aggregate_id = ctx.new_id()
+    _write_stream(ctx.meow, aggregate_type, aggregate_id, stream_length)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(operations):
+        op_start = time.perf_counter()
+        events = ctx.meow.load_events(
+            aggregate_type, aggregate_id, from_version=0, limit=stream_length
+        )
+        stream = _Stream(events)
+        latencies.append(time.perf_counter() - op_start)
+        assert stream.version == stream_length - 1
+    return Result(
+        benchmark="load_aggregate",
+        params={"stream_length": stream_length},
+        operations=operations,
+        events=operations * stream_length,
+        seconds=time.perf_counter() - start,
+        latencies=latencies,
+    )
+
+
+def load_all_events(ctx: Context, event_count: int, page_size: int) -> Result:
+    """Times paging through the event log with `load_all_events_page`.
+
+    Writes `event_count` events first so there's something to read, then
+    reads pages from just before the first of them to the transaction of
+    the last. Events already in the database aren't read, so the figures
+    don't depend on what earlier runs left behind.
+    """
+    aggregate_type = f"{ctx.prefix}-all"
+    written: t.List[meowmx.RecordedEvent] = []
+    remaining = event_count
+    while remaining > 0:
+        length = min(remaining, 100)
+        written += _write_stream(ctx.meow, aggregate_type, ctx.new_id(), length)
+        remaining -= length
+
+    latencies = []
+    read = 0
+    position: t.Optional[meowmx.SubCheckpoint] = None
+    to_tx_id: t.Optional[int] = None
+    if written:
+        position = meowmx.SubCheckpoint(
+            last_tx_id=written[0].tx_id, last_event_id=written[0].id - 1
+        )
+        to_tx_id = written[-1].tx_id
+    start = time.perf_counter()
+    while True:
+        op_start = time.perf_counter()
+        page = ctx.meow.load_all_events_page(
+            position, to_tx_id=to_tx_id, limit=page_size
+        )
+        latencies.append(time.perf_counter() - op_start)
+        read += len(page.events)
+        if not page.events:
+            break
+        position = page.position
+    return Result(
+        benchmark="load_all_events",
+        params={"page_size": page_size},
+        operations=len(latencies),
+        events=read,
+        seconds=time.perf_counter() - start,
+        latencies=latencies,
+    )
+
+
+class _Workers:
+    """Runs `Client.sub` on several threads until told to stop."""
+
+    def __init__(
+        self,
+        ctx: Context,
+        subscription_name: str,
+        aggregate_type: str,
+        handler: meowmx.common.EventHandler,
+        workers: int,
+        batch_size: int,
+    ) -> None:
+        self.stop_signal = threading.Event()
+        self.errors: t.List[BaseException] = []
+        # registered up front so the workers don't race to create it
+        ctx.meow.register_subscription(subscription_name, aggregate_type)
+        self._threads = [
+            threading.Thread(
+                target=self._run,
+                args=(
+                    ctx.new_client(),
+                    subscription_name,
+                    aggregate_type,
+                    handler,
+                    batch_size,
+                ),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+
+    def _run(
+        self,
+        meow: meowmx.Client,
+        subscription_name: str,
+        aggregate_type: str,
+        handler: meowmx.common.EventHandler,
+        batch_size: int,
+    ) -> None:
+        try:
+            meow.sub(
+                subscription_name,
+                aggregate_type,
+                handler,
+                batch_size=batch_size,
+                stop_signal=self.stop_signal,
+                min_sleep_time=0.01,
+                max_sleep_time=0.1,
+            )
+        except BaseException as e:
+            self.errors.append(e)
+            self.stop_signal.set()
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self.stop_signal.set()
+        for thread in self._threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+
+def subscription_catch_up(
+    ctx: Context, event_count: int, workers: int, batch_size: int, timeout: float
+) -> Result:
+    """Times how long `workers` subscribers take to handle a backlog."""
+    aggregate_type = f"{ctx.prefix}-catch-up-{workers}"
+    remaining = event_count
+    while remaining > 0:
+        length = min(remaining, 100)
+        _write_stream(ctx.meow, aggregate_type, ctx.new_id(), length)
+        remaining -= length
+
+    handled: t.Set[int] = set()
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        with lock:
+            handled.add(event.id)
+            if len(handled) >= event_count:
+                done.set()
+
+    pool = _Workers(
+        ctx, f"{aggregate_type}-sub", aggregate_type, handler, workers, batch_size
+    )
+    start = time.perf_counter()
+    pool.start()
+    complete = done.wait(timeout)
+    seconds = time.perf_counter() - start
+    pool.stop()
+    return Result(
+        benchmark="subscription_catch_up",
+        params={"workers": workers, "batch_size": batch_size},
+        operations=len(handled),
+        events=len(handled),
+        seconds=seconds,
+        complete=complete,
+    )
+
+
+def subscription_tail(
+    ctx: Context,
+    event_count: int,
+    workers: int,
+    interval: float,
+    timeout: float,
+) -> Result:
+    """Times how long it takes caught up subscribers to see new events.
+
+    The events are written by a separate client every `interval` seconds, so
+    the subscribers find them by polling as they would if the writer was
+    another process. Latency is measured from just before each save to when
+    a handler receives the event.
+    """
+    aggregate_type = f"{ctx.prefix}-tail-{workers}"
+    latencies: t.List[float] = []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        received = time.perf_counter()
+        with lock:
+            latencies.append(received - json.loads(event.json)["sent"])
+            if len(latencies) >= event_count:
+                done.set()
+
+    pool = _Workers(ctx, f"{aggregate_type}-sub", aggregate_type, handler, workers, 1)
+    pool.start()
+    writer = ctx.new_client()
+    start = time.perf_counter()
+    for _ in range(event_count):
+        sent = time.perf_counter()
+        event = meowmx.NewEvent(
+            event_type="BenchmarkEvent", json=json.dumps({"sent": sent})
+        )
+        writer.save_events(aggregate_type, ctx.new_id(), [event], 0)
+        time.sleep(interval)
+    complete = done.wait(timeout)
+    seconds = time.perf_counter() - start
+    pool.stop()
+    return Result(
+        benchmark="subscription_tail",
+        params={"workers": workers, "interval": interval},
+        operations=len(latencies),
+        events=len(latencies),
+        seconds=seconds,
+        latencies=latencies,
+        complete=complete,
+    )
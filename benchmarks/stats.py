@@ -0,0 +1,64 @@
+import dataclasses
+import math
+import typing as t
+
+
+def percentile(sorted_samples: t.Sequence[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples: t.Iterable[float]) -> t.Dict[str, float]:
+    """Summarizes latencies, in seconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    return {
+        "min": ordered[0],
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1],
+    }
+
+
+@dataclasses.dataclass
+class Result:
+    """The outcome of running one benchmark with one set of parameters.
+
+    `operations` is the number of timed calls and `latencies` the time each
+    took. `events` is how many events those calls wrote, read or handled.
+    """
+
+    benchmark: str
+    params: t.Dict[str, t.Any]
+    operations: int
+    events: int
+    seconds: float
+    latencies: t.List[float] = dataclasses.field(default_factory=list)
+    complete: bool = True
+
+    def to_json(self) -> t.Dict[str, t.Any]:
+        return {
+            "benchmark": self.benchmark,
+            "params": self.params,
+            "operations": self.operations,
+            "events": self.events,
+            "seconds": self.seconds,
+            "operations_per_second": (
+                self.operations / self.seconds if self.seconds else 0.0
+            ),
+            "events_per_second": self.events / self.seconds if self.seconds else 0.0,
+            "latency": summarize(self.latencies),
+            "complete": self.complete,
+        }
+
+
+def result_key(result: t.Dict[str, t.Any]) -> str:
+    """Identifies a result across runs by its benchmark name and parameters."""
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['benchmark']}[{params}]"
@@ -1,6 +1,9 @@
 import argparse
 import json
+import math
+import multiprocessing
 import random
+import threading
 import time
 import typing as t
 import uuid
@@ -15,9 +18,292 @@ def _generate_slug() -> str:
     return t.cast(str, coolname.generate_slug())
 
 
+def _percentile(sorted_samples: t.List[float], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[max(1, math.ceil(fraction * len(sorted_samples))) - 1]
+
+
+class Stats:
+    """Latencies, conflicts and errors for each kind of operation."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.ops: t.Dict[str, t.Dict[str, t.Any]] = {}
+
+    def record(
+        self,
+        op: str,
+        latency: float,
+        conflict: bool = False,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            entry = self.ops.setdefault(
+                op, {"latencies": [], "conflicts": 0, "errors": 0}
+            )
+            entry["latencies"].append(latency)
+            entry["conflicts"] += conflict
+            entry["errors"] += error
+
+    def merge(self, ops: t.Dict[str, t.Dict[str, t.Any]]) -> None:
+        with self._lock:
+            for op, other in ops.items():
+                entry = self.ops.setdefault(
+                    op, {"latencies": [], "conflicts": 0, "errors": 0}
+                )
+                entry["latencies"].extend(other["latencies"])
+                entry["conflicts"] += other["conflicts"]
+                entry["errors"] += other["errors"]
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(entry["latencies"]) for entry in self.ops.values())
+
+    def report(self, elapsed: float) -> t.Dict[str, t.Dict[str, float]]:
+        result = {}
+        with self._lock:
+            for op, entry in sorted(self.ops.items()):
+                latencies = sorted(entry["latencies"])
+                count = len(latencies)
+                result[op] = {
+                    "count": count,
+                    "per_second": count / elapsed if elapsed else 0.0,
+                    "conflicts": entry["conflicts"],
+                    "conflict_rate": entry["conflicts"] / count if count else 0.0,
+                    "errors": entry["errors"],
+                    "p50": _percentile(latencies, 0.50),
+                    "p95": _percentile(latencies, 0.95),
+                    "p99": _percentile(latencies, 0.99),
+                }
+        return result
+
+
+class Config(t.NamedTuple):
+    sql_url: t.Optional[str]
+    aggregate_type: str
+    event_types: t.List[str]
+    max_length: int
+    mean_length: float
+    percent_new: float
+    percent_contended: float
+    hot_aggregate_ids: t.List[str]
+    writers: int
+    readers: int
+    rate: float
+    duration: float
+
+
+class AggregatePool:
+    """The aggregates a process has created and may keep writing to.
+
+    Each one gets a target length when it's created, drawn so most streams
+    are short and a few are long, and is retired once it reaches it.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+        self._lock = threading.Lock()
+        self._targets: t.Dict[str, int] = {}
+        self._ids: t.List[str] = []
+
+    def add(self, aggregate_id: str) -> None:
+        target = min(
+            self._config.max_length,
+            max(1, int(random.expovariate(1 / self._config.mean_length))),
+        )
+        with self._lock:
+            self._targets[aggregate_id] = target
+            self._ids.append(aggregate_id)
+
+    def pick(self) -> t.Optional[str]:
+        with self._lock:
+            if not self._ids:
+                return None
+            return random.choice(self._ids)
+
+    def written(self, aggregate_id: str, length: int) -> None:
+        with self._lock:
+            target = self._targets.get(aggregate_id)
+            if target is not None and length >= target:
+                del self._targets[aggregate_id]
+                self._ids.remove(aggregate_id)
+
+
+def _new_event(config: Config, version: int) -> meowmx.NewEvent:
+    return meowmx.NewEvent(
+        event_type=random.choice(config.event_types),
+        json=json.dumps(
+            {
+                "version": version,
+                "random_slug": _generate_slug(),
+                "written_at": time.time(),
+            }
+        ),
+    )
+
+
+def _save(
+    meow: meowmx.Client,
+    stats: Stats,
+    op: str,
+    config: Config,
+    aggregate_id: str,
+    version: int,
+) -> bool:
+    start = time.perf_counter()
+    try:
+        meow.save_events(
+            config.aggregate_type, aggregate_id, [_new_event(config, version)], version
+        )
+    except meowmx.ExpectedVersionFailure:
+        stats.record(op, time.perf_counter() - start, conflict=True)
+        return False
+    except Exception:
+        stats.record(op, time.perf_counter() - start, error=True)
+        return False
+    stats.record(op, time.perf_counter() - start)
+    return True
+
+
+def _writer(
+    meow: meowmx.Client,
+    config: Config,
+    pool: AggregatePool,
+    stats: Stats,
+    stop: threading.Event,
+    rate: float,
+) -> None:
+    start = time.perf_counter()
+    count = 0
+    while not stop.is_set():
+        if rate > 0:
+            # keep to the schedule, without trying to catch up on a backlog
+            delay = start + count / rate - time.perf_counter()
+            if delay > 0 and stop.wait(delay):
+                break
+            elif delay < -1:
+                start = time.perf_counter()
+                count = 0
+        count += 1
+
+        choice = random.random() * 100
+        if config.hot_aggregate_ids and choice < config.percent_contended:
+            # read only the head, as a command handler checking a single
+            # value might, then write straight away to provoke conflicts
+            aggregate_id = random.choice(config.hot_aggregate_ids)
+            read_start = time.perf_counter()
+            try:
+                head = meow.load_events(
+                    config.aggregate_type, aggregate_id, limit=1, reverse=True
+                )
+            except Exception:
+                stats.record("load_head", time.perf_counter() - read_start, error=True)
+                continue
+            stats.record("load_head", time.perf_counter() - read_start)
+            version = head[0].version + 1 if head else 0
+            _save(meow, stats, "contended_append", config, aggregate_id, version)
+            continue
+
+        aggregate_id_or_none = None
+        if choice >= config.percent_contended + config.percent_new:
+            aggregate_id_or_none = pool.pick()
+        if aggregate_id_or_none is None:
+            aggregate_id = str(uuid.uuid4())
+            if _save(meow, stats, "create", config, aggregate_id, 0):
+                pool.add(aggregate_id)
+            continue
+
+        aggregate_id = aggregate_id_or_none
+        read_start = time.perf_counter()
+        try:
+            existing_events = meow.load_events(
+                config.aggregate_type, aggregate_id, limit=config.max_length + 1
+            )
+        except Exception:
+            stats.record("load", time.perf_counter() - read_start, error=True)
+            continue
+        stats.record("load", time.perf_counter() - read_start)
+        version = len(existing_events)
+        if _save(meow, stats, "append", config, aggregate_id, version):
+            pool.written(aggregate_id, version + 1)
+
+
+def _reader(
+    meow: meowmx.Client,
+    config: Config,
+    pool: AggregatePool,
+    stats: Stats,
+    stop: threading.Event,
+) -> None:
+    while not stop.is_set():
+        aggregate_id = pool.pick()
+        if aggregate_id is None and config.hot_aggregate_ids:
+            aggregate_id = random.choice(config.hot_aggregate_ids)
+        if aggregate_id is None:
+            stop.wait(0.01)
+            continue
+        start = time.perf_counter()
+        try:
+            meow.load_events(
+                config.aggregate_type, aggregate_id, limit=config.max_length + 1
+            )
+        except Exception:
+            stats.record("read", time.perf_counter() - start, error=True)
+        else:
+            stats.record("read", time.perf_counter() - start)
+
+
+def run_process(config: Config) -> t.Dict[str, t.Dict[str, t.Any]]:
+    """Runs the writers and readers of one process for `config.duration`."""
+    meow = demolib.create_meowmx(config.sql_url)
+    stats = Stats()
+    pool = AggregatePool(config)
+    stop = threading.Event()
+    rate = config.rate / config.writers if config.rate else 0.0
+    threads = [
+        threading.Thread(target=_writer, args=(meow, config, pool, stats, stop, rate))
+        for _ in range(config.writers)
+    ] + [
+        threading.Thread(target=_reader, args=(meow, config, pool, stats, stop))
+        for _ in range(config.readers)
+    ]
+    for thread in threads:
+        thread.start()
+    stop.wait(config.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats.ops
+
+
+def _subscriber(
+    meow: meowmx.Client,
+    sub_name: str,
+    config: Config,
+    stats: Stats,
+    stop: threading.Event,
+    started_at: float,
+) -> None:
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        written_at = json.loads(event.json).get("written_at")
+        # skip anything left over from earlier runs
+        if written_at is not None and written_at >= started_at:
+            stats.record("subscription_lag", time.time() - written_at)
+
+    meow.sub(
+        sub_name,
+        config.aggregate_type,
+        handler,
+        batch_size=meowmx.AdaptiveBatchSize(),
+        stop_signal=stop,
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="demo of what writing to an aggregate looks like"
+        description="generates a mix of writes, reads and subscriptions and "
+        "reports latency percentiles and conflict rates"
     )
     parser.add_argument(
         "--aggregate-type",
@@ -39,83 +325,144 @@ def main() -> None:
         help="the maximum length of a stream",
     )
     parser.add_argument(
-        "--percent-new",
-        type=int,
+        "--mean-length",
+        type=float,
         default=None,
-        required=True,
+        help="the average length streams are written to. Defaults to a tenth of --max-length",
+    )
+    parser.add_argument(
+        "--percent-new",
+        type=float,
+        default=25,
         help="# out of 100. The percent of writes which should be new aggregates",
     )
+    parser.add_argument(
+        "--percent-contended",
+        type=float,
+        default=0,
+        help="# out of 100. The percent of writes which go to a few hot aggregates "
+        "shared by every writer, to provoke optimistic concurrency conflicts",
+    )
+    parser.add_argument(
+        "--hot-aggregates",
+        type=int,
+        default=3,
+        help="how many hot aggregates contended writes are spread over",
+    )
+    parser.add_argument(
+        "--writers", type=int, default=1, help="writer threads per process"
+    )
+    parser.add_argument(
+        "--readers", type=int, default=0, help="reader threads per process"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=1, help="processes running writers / readers"
+    )
+    parser.add_argument(
+        "--subscribers",
+        type=int,
+        default=0,
+        help="threads subscribed to the aggregate type, reporting how far they lag",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="target writes per second across every writer. 0 means as fast as possible",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=60, help="how many seconds to run for"
+    )
+    parser.add_argument(
+        "--sql-url", type=str, default=None, help="database to use instead of the demo"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
 
     args = parser.parse_args()
-    args.percent_new = args.percent_new or 25
 
-    meow = demolib.create_meowmx()
+    started_at = time.time()
+    meow = demolib.create_meowmx(args.sql_url)
+    hot_aggregate_ids = []
+    if args.percent_contended > 0:
+        hot_aggregate_ids = [str(uuid.uuid4()) for _ in range(args.hot_aggregates)]
+        for aggregate_id in hot_aggregate_ids:
+            meow.save_events(
+                args.aggregate_type,
+                aggregate_id,
+                [meowmx.NewEvent(event_type="Created", json="{}")],
+                0,
+            )
 
-    aggregate_versions: t.Dict[str, int] = {}
-    aggregate_ids: t.List = []
+    config = Config(
+        sql_url=args.sql_url,
+        aggregate_type=args.aggregate_type,
+        event_types=args.event_types.split(","),
+        max_length=args.max_length,
+        mean_length=args.mean_length or max(1.0, args.max_length / 10),
+        percent_new=args.percent_new,
+        percent_contended=args.percent_contended,
+        hot_aggregate_ids=hot_aggregate_ids,
+        writers=args.writers,
+        readers=args.readers,
+        rate=args.rate / args.processes,
+        duration=args.duration,
+    )
 
-    event_types = args.event_types.split(",")
+    stats = Stats()
+    stop = threading.Event()
+    sub_name = f"{args.aggregate_type}-load-{_generate_slug()}"
+    if args.subscribers:
+        meow.register_subscription(sub_name, args.aggregate_type)
+    subscribers = [
+        threading.Thread(
+            target=_subscriber,
+            args=(
+                demolib.create_meowmx(args.sql_url),
+                sub_name,
+                config,
+                stats,
+                stop,
+                started_at,
+            ),
+        )
+        for _ in range(args.subscribers)
+    ]
+    for thread in subscribers:
+        thread.start()
 
     start_time = time.perf_counter()
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as process_pool:
+            for ops in process_pool.map(run_process, [config] * args.processes):
+                stats.merge(ops)
+    else:
+        stats.merge(run_process(config))
+    elapsed = time.perf_counter() - start_time
 
-    count = 0
-
-    while True:
-        choice = random.random() * 100
-        if len(aggregate_ids) == 0 or choice < args.percent_new:
-            aggregate_id = str(uuid.uuid4())
-            aggregate_versions[aggregate_id] = -1
-            aggregate_ids = list(aggregate_versions.keys())
-            version = 0
-        else:
-            random_index = int(random.random() * (len(aggregate_ids) - 1))
-            aggregate_id = aggregate_ids[random_index]
-            # take time to load events
-            existing_events = meow.load_events(
-                args.aggregate_type, aggregate_id, 0, limit=36500
-            )
-            version = aggregate_versions[aggregate_id]
-            if version != len(existing_events):
-                print(f"ERROR! version we expected={version}")
-                print(f"                but we got={len(existing_events)}")
-                raise RuntimeError("bad version")
-            version += 1
-
-        if len(event_types) > 1:
-            random_index = int(random.random() * (len(event_types) - 1))
-            event_type = event_types[random_index]
-        else:
-            event_type = event_types[0]
-
-        events = [
-            meowmx.NewEvent(
-                event_type=event_type,
-                json=json.dumps(
-                    {
-                        "version": version,
-                        "random_slug": _generate_slug(),
-                    }
-                ),
-            )
-        ]
-        meow.save_events(args.aggregate_type, aggregate_id, events, version)
-        aggregate_versions[aggregate_id] += 1
-        count += 1
-
-        end_time = time.perf_counter()
-        elapsed = end_time - start_time
+    # give the subscribers a moment to see the last writes
+    time.sleep(1)
+    stop.set()
+    for thread in subscribers:
+        thread.join()
 
-        avg_count_per_second = count / elapsed
+    report = stats.report(elapsed)
+    if args.json:
+        print(json.dumps({"elapsed": elapsed, "operations": report}, indent=2))
+        return
 
+    print(f"{stats.count()} operations in {elapsed:.1f}s")
+    print(
+        f"{'operation':<20}{'count':>8}{'per/s':>10}{'conflicts':>11}"
+        f"{'conflict%':>11}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for op, row in report.items():
         print(
-            f"saved {args.aggregate_type} / {aggregate_id} / {version}, {count} total... ({elapsed} elapsed, {avg_count_per_second} per/s)"
+            f"{op:<20}{row['count']:>8}{row['per_second']:>10.1f}"
+            f"{row['conflicts']:>11}{row['conflict_rate'] * 100:>10.1f}%"
+            f"{row['errors']:>8}{row['p50'] * 1000:>10.2f}"
+            f"{row['p95'] * 1000:>10.2f}{row['p99'] * 1000:>10.2f}"
         )
 
-        if version > args.max_length:
-            # remove this so we stop writing to it
-            del aggregate_versions[aggregate_id]
-            aggregate_ids = list(aggregate_versions.keys())
-
 
 if __name__ == "__main__":
     main()
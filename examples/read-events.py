@@ -1,8 +1,11 @@
 import argparse
+import contextlib
 import json
 import sys
 import time
+import typing as t
 import demolib
+import meowmx
 from meowmx.backoff import BackoffCalc
 
 
@@ -43,6 +46,18 @@ def main() -> None:
         action="store_true",
         help="If true, treat `limit` as batch size and continue to watch for new events",
     )
+    parser.add_argument(
+        "--export",
+        type=str,
+        default=None,
+        help="Stream every matching event to this file ('-' for stdout) instead of printing them. Ignores --limit and --tail.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "binary"],
+        default="ndjson",
+        help="The format used by --export",
+    )
 
     args = parser.parse_args()
 
@@ -60,7 +75,51 @@ def main() -> None:
         )
         sys.exit(1)
 
+    if args.export:
+        if args.aggregate_id:
+            print("--export can't be used with --aggregate-id", file=sys.stderr)
+            sys.exit(1)
+        with contextlib.ExitStack() as stack:
+            if args.export == "-":
+                file = sys.stdout.buffer
+            else:
+                file = stack.enter_context(open(args.export, "wb"))
+            count = meow.export_events(
+                file,
+                from_tx_id=args.from_var,
+                to_tx_id=args.to,
+                aggregate_type=args.aggregate_type,
+                format=args.format,
+            )
+        print(f"exported {count} events", file=sys.stderr)
+        return
+
+    indent = 4 if args.pretty_json else None
+
+    def print_event(event: meowmx.RecordedEvent) -> None:
+        print(
+            f"{event.id} (tx {event.tx_id}) : {event.aggregate_type} / {event.aggregate_id} [{event.version}] {event.event_type} : {json.dumps(event.json, indent=indent)}"
+        )
+
+    if args.tail and not id_mode:
+        position: t.Optional[meowmx.SubCheckpoint] = None
+        if args.from_var is not None:
+            # no event ID is bigger, so this starts after the whole transaction
+            position = meowmx.SubCheckpoint(
+                last_tx_id=args.from_var, last_event_id=2**63 - 1
+            )
+        try:
+            for event in meow.tail_all_events(position, page_size=args.limit):
+                if args.to is not None and args.to < event.tx_id:
+                    break
+                print_event(event)
+        except KeyboardInterrupt:
+            pass
+        return
+
     backoff = BackoffCalc(1, 5)
+    # the ID of the last event read, so the next page starts after it
+    after_event_id: t.Optional[int] = None
     while True:
         if id_mode:
             events = meow.load_events(
@@ -72,14 +131,14 @@ def main() -> None:
             )
         else:
             events = meow.load_all_events(
-                from_tx_id=args.from_var, to_tx_id=args.to, limit=args.limit
+                from_tx_id=args.from_var,
+                to_tx_id=args.to,
+                limit=args.limit,
+                after_event_id=after_event_id,
             )
 
-        indent = 4 if args.pretty_json else None
         for event in events:
-            print(
-                f"{event.id} (tx {event.tx_id}) : {event.aggregate_type} / {event.aggregate_id} [{event.version}] {event.event_type} : {json.dumps(event.json, indent=indent)}"
-            )
+            print_event(event)
 
         if not args.tail:
             break
@@ -93,6 +152,7 @@ def main() -> None:
                     current_position = events[-1].version
                 else:
                     current_position = events[-1].tx_id
+                    after_event_id = events[-1].id
                 if args.to is not None and args.to <= current_position:
                     break
 
@@ -1,25 +1,53 @@
+from .batch_size import AdaptiveBatchSize
+from .batching import BatchingWriter
 from .client import Client, ExpectedVersionFailure
 from .common import (
+    Codec,
     Engine,
+    EventBatch,
     EventCompatible,
+    EventFilter,
+    EventPage,
+    JsonCodec,
+    MsgspecCodec,
     NewEvent,
     NewEventRow,
+    OrjsonCodec,
     RecordedEvent,
     Session,
     SessionMaker,
+    SubCheckpoint,
+    SubscriptionBatch,
+    SubscriptionStatus,
 )
 from .aggregates import EventBuffer, PendingEvents
+from .hooks import Hooks
+from .projections import Projection
 
 __all__ = [
+    "AdaptiveBatchSize",
+    "BatchingWriter",
     "Client",
+    "Codec",
     "Engine",
+    "EventBatch",
     "EventBuffer",
     "EventCompatible",
+    "EventFilter",
+    "EventPage",
     "ExpectedVersionFailure",
+    "Hooks",
+    "JsonCodec",
+    "MsgspecCodec",
     "NewEvent",
     "NewEventRow",
+    "OrjsonCodec",
     "RecordedEvent",
     "PendingEvents",
+    "Projection",
     "Session",
     "SessionMaker",
+    "SubCheckpoint",
+    "SubscriptionBatch",
+    "SubscriptionStatus",
 ]
@@ -1,6 +1,6 @@
 from .aggregate import SavableAggregate
 from .buffer import EventBuffer
-from .aggregate import LoadableAggregate
+from .aggregate import LoadableAggregate, RefreshableAggregate
 from .pending import PendingEvents
 
 __all__ = [
@@ -8,4 +8,5 @@ __all__ = [
     "EventBuffer",
     "LoadableAggregate",
     "PendingEvents",
+    "RefreshableAggregate",
 ]
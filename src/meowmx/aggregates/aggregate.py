@@ -27,3 +27,30 @@ class SavableAggregate(t.Protocol):
     def collect_pending_events(self) -> pending.PendingEvents:
         """Grabs evens emitted by the aggregate but not yet saved."""
         ...
+
+
+class RefreshableAggregate(t.Protocol):
+    """Defines an aggregate which can be loaded, saved and brought up to date
+    with events written after it was loaded."""
+
+    aggregate_type: str  # String for the aggregate_type row
+
+    def __init__(self, recorded_events: t.List[common.RecordedEvent]) -> None: ...
+
+    @property
+    def aggregate_id(self) -> str:
+        """Used for the aggreate ID row."""
+        ...
+
+    def collect_pending_events(self) -> pending.PendingEvents:
+        """Grabs evens emitted by the aggregate but not yet saved."""
+        ...
+
+    @property
+    def db_version(self) -> int:
+        """The version of the last event loaded or saved, or -1 if none were."""
+        ...
+
+    def catch_up(self, recorded_events: t.List[common.RecordedEvent]) -> None:
+        """Applies events which follow the ones already loaded."""
+        ...
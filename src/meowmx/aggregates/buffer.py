@@ -85,3 +85,24 @@ class EventBuffer(t.Generic[T]):
 
             self._applier(self._loader(event))
             self._next_version += 1
+
+    def catch_up(self, events: t.List[common.RecordedEvent]) -> None:
+        """Applies events written since the buffer was loaded or last saved.
+
+        Unlike the load methods this can be called any number of times, so a
+        long-lived aggregate can be kept current by reading only new events.
+        Events the buffer already has are skipped, but there can't be a gap
+        before the first new one, and there can't be pending events, as the
+        new events happened before them.
+        """
+        if len(self._pending_events) > 0:
+            raise RuntimeError("Cannot catch up while there are pending events.")
+        for event in events:
+            if event.version < self._next_version:
+                continue
+            if event.version != self._next_version:
+                raise RuntimeError(
+                    f"events are missing before the one caught up with. Expected={self._next_version}, received: {event.version}"
+                )
+            self._applier(self._loader(event))
+            self._next_version += 1
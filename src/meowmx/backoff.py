@@ -1,15 +1,119 @@
+import random
+import threading
+import time
+import typing as t
+
+_relay_lock = threading.Lock()
+# events being watched, and the events to set once they are
+_relay_targets: t.Dict[threading.Event, t.List[threading.Event]] = {}
+# how often a watcher checks whether its relays have all been cancelled
+_WATCH_INTERVAL = 1.0
+
+
+def relay(source: threading.Event, target: threading.Event) -> t.Callable[[], None]:
+    """Sets `target` once `source` is set, unless the returned function has
+    been called first.
+
+    This lets a thread which should wake up for either of two events block on
+    just one of them. A thread per source waits for it to be set, and exits
+    within `_WATCH_INTERVAL` seconds of every relay from it being cancelled,
+    so sources which are never set don't leave threads behind.
+    """
+    with _relay_lock:
+        targets = _relay_targets.get(source)
+        if targets is None:
+            if source.is_set():
+                target.set()
+                return lambda: None
+            targets = _relay_targets[source] = []
+            threading.Thread(
+                target=_watch,
+                args=(source, targets),
+                name="meowmx-relay",
+                daemon=True,
+            ).start()
+        targets.append(target)
+
+    def cancel() -> None:
+        with _relay_lock:
+            if target in targets:
+                targets.remove(target)
+            if not targets and _relay_targets.get(source) is targets:
+                del _relay_targets[source]
+
+    return cancel
+
+
+def _watch(source: threading.Event, targets: t.List[threading.Event]) -> None:
+    while not source.wait(_WATCH_INTERVAL):
+        with _relay_lock:
+            if _relay_targets.get(source) is not targets:
+                # every relay was cancelled
+                return
+    with _relay_lock:
+        if _relay_targets.get(source) is targets:
+            del _relay_targets[source]
+        to_set = list(targets)
+        targets.clear()
+    for target in to_set:
+        target.set()
+
+
 class BackoffCalc:
-    def __init__(self, min_value: int, max_value: int) -> None:
+    """Calculates how long to wait after something doesn't pan out.
+
+    Each failure multiplies the wait by `factor` until it reaches `max_value`.
+    If `jitter` is true the wait is instead picked at random between
+    `min_value` and `factor` times the previous wait ("decorrelated jitter"),
+    so many callers that start failing at the same time drift apart instead of
+    retrying in lockstep. Values are in seconds and may be fractional.
+    """
+
+    def __init__(
+        self,
+        min_value: float,
+        max_value: float,
+        factor: float = 2,
+        jitter: bool = False,
+        rng: t.Optional[random.Random] = None,
+    ) -> None:
+        if min_value <= 0:
+            raise ValueError("min_value must be positive")
+        if max_value < min_value:
+            raise ValueError("max_value must be greater than or equal to min_value")
+        if factor < 1:
+            raise ValueError("factor must be at least 1")
         self._min = min_value
         self._max = max_value
+        self._factor = factor
+        self._jitter = jitter
+        self._rng = rng or random.Random()
         self._current = self._min
 
-    def failure(self) -> int:
+    def failure(self) -> float:
         """Returns time to wait."""
+        if self._jitter:
+            wait = min(
+                self._max, self._rng.uniform(self._min, self._current * self._factor)
+            )
+            self._current = wait
+            return wait
         wait = self._current
-        self._current = min(self._current * 2, self._max)
+        self._current = min(self._current * self._factor, self._max)
         return wait
 
     def success(self) -> None:
         """Resets the wait time."""
         self._current = self._min
+
+    def wait(self, event: t.Optional[threading.Event] = None) -> bool:
+        """Waits for the time returned by `failure`.
+
+        Returns True early if `event` is set. To wake up for other events
+        too, `relay` them to it.
+        """
+        timeout = self.failure()
+        if event is None:
+            time.sleep(timeout)
+            return False
+        return event.wait(timeout)
@@ -0,0 +1,86 @@
+import typing as t
+
+
+class AdaptiveBatchSize:
+    """Picks the batch size a subscription uses based on how recent batches went.
+
+    The size grows while there's a backlog and the time spent handling each
+    event stays steady, and shrinks when a batch runs long or a handler fails.
+    `max_tx_time` is also used to stop a batch early so a single transaction
+    is never held open much longer than that many seconds.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 10,
+        max_size: int = 1000,
+        max_tx_time: float = 5.0,
+        growth_factor: float = 2.0,
+        tolerance: float = 0.5,
+    ) -> None:
+        if min_size < 1:
+            raise ValueError("min_size must be at least 1")
+        if max_size < min_size:
+            raise ValueError("max_size must be greater than or equal to min_size")
+        if max_tx_time <= 0:
+            raise ValueError("max_tx_time must be positive")
+        if growth_factor <= 1:
+            raise ValueError("growth_factor must be greater than 1")
+        self._min = min_size
+        self._max = max_size
+        self._max_tx_time = max_tx_time
+        self._growth_factor = growth_factor
+        self._tolerance = tolerance
+        self._size = min_size
+        # moving average of the seconds spent per event
+        self._time_per_event: t.Optional[float] = None
+
+    @property
+    def max_tx_time(self) -> float:
+        """The longest a batch should keep its transaction open, in seconds."""
+        return self._max_tx_time
+
+    @property
+    def size(self) -> int:
+        """The size to use for the next batch."""
+        return self._size
+
+    def failure(self) -> int:
+        """Call when a handler raised. Returns the new size, which is the
+        same as before once it's down to `min_size`."""
+        self._size = max(self._min, self._size // 2)
+        return self._size
+
+    def success(self, processed: int, elapsed: float, has_more: bool) -> int:
+        """Call after a batch commits. Returns the new size.
+
+        `elapsed` is how long the transaction was open and `has_more` should
+        be true if there were still events waiting after the batch.
+        """
+        if processed == 0:
+            return self._size
+
+        time_per_event = elapsed / processed
+        if elapsed >= self._max_tx_time:
+            self._size = max(self._min, self._size // 2)
+        elif has_more and processed >= self._size and self._is_steady(time_per_event):
+            self._size = min(
+                self._max,
+                max(self._size + 1, int(self._size * self._growth_factor)),
+            )
+
+        # never grow past what fits into the transaction time budget
+        if time_per_event > 0:
+            fits = int(self._max_tx_time / time_per_event)
+            self._size = max(self._min, min(self._size, fits))
+
+        if self._time_per_event is None:
+            self._time_per_event = time_per_event
+        else:
+            self._time_per_event = 0.7 * self._time_per_event + 0.3 * time_per_event
+        return self._size
+
+    def _is_steady(self, time_per_event: float) -> bool:
+        if self._time_per_event is None:
+            return True
+        return time_per_event <= self._time_per_event * (1 + self._tolerance)
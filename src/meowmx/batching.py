@@ -0,0 +1,228 @@
+import abc
+import concurrent.futures
+import threading
+import time
+import typing as t
+
+from . import common
+
+if t.TYPE_CHECKING:
+    from .client import Client
+
+# Seconds a queued event may wait for others to be saved with.
+DEFAULT_MAX_DELAY = 0.005
+# How many queued events cause a save straight away.
+DEFAULT_MAX_EVENTS = 1000
+
+
+class _Write:
+    """Events queued to be saved, and the future waiting on them."""
+
+    def __init__(
+        self,
+        aggregate_type: str,
+        aggregate_id: str,
+        events: t.List[common.NewEvent],
+        version: t.Optional[int],
+    ) -> None:
+        self.aggregate_type = aggregate_type
+        self.aggregate_id = aggregate_id
+        self.events = events
+        self.version = version
+        self.future: concurrent.futures.Future[t.List[common.RecordedEvent]] = (
+            concurrent.futures.Future()
+        )
+
+    def resolve(
+        self, outcome: t.Union[t.List[common.RecordedEvent], BaseException]
+    ) -> None:
+        if self.future.cancelled():
+            return
+        if isinstance(outcome, BaseException):
+            self.future.set_exception(outcome)
+        else:
+            self.future.set_result(outcome)
+
+
+class _Batcher(abc.ABC):
+    """Gathers writes from many threads and saves them on a background thread.
+
+    A batch is saved once its oldest write has waited `max_delay` seconds or
+    it holds `max_events` events.
+    """
+
+    def __init__(self, client: "Client", max_delay: float, max_events: int) -> None:
+        if max_delay < 0:
+            raise ValueError("max_delay can't be negative")
+        if max_events < 1:
+            raise ValueError("max_events must be at least 1")
+        self._client = client
+        self._max_delay = max_delay
+        self._max_events = max_events
+        self._condition = threading.Condition()
+        self._queued: t.List[_Write] = []
+        self._queued_count = 0
+        # when the oldest queued write was made
+        self._oldest: t.Optional[float] = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"meowmx-{type(self).__name__}", daemon=True
+        )
+        self._thread.start()
+        client._add_batcher(self)
+
+    def close(self) -> None:
+        """Saves anything still queued and stops the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._client._remove_batcher(self)
+
+    def _queue(self, write: _Write) -> _Write:
+        if len(write.events) == 0:
+            write.resolve([])
+            return write
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the writer has been closed")
+            self._queued.append(write)
+            self._queued_count += len(write.events)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify()
+        return write
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._queued_count >= self._max_events:
+                        break
+                    if self._oldest is None:
+                        if self._closed:
+                            return
+                        self._condition.wait()
+                        continue
+                    if self._closed:
+                        break
+                    remaining = self._oldest + self._max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._queued
+                self._queued = []
+                self._queued_count = 0
+                self._oldest = None
+            try:
+                self._save(batch)
+            except Exception as error:
+                for write in batch:
+                    write.resolve(error)
+            except BaseException as error:
+                # the thread is going away, so don't leave anyone waiting
+                with self._condition:
+                    self._closed = True
+                    batch.extend(self._queued)
+                    self._queued = []
+                for write in batch:
+                    write.resolve(error)
+                raise
+
+    @abc.abstractmethod
+    def _save(self, batch: t.List[_Write]) -> None:
+        """Saves the batch, resolving each write's future, or raises if none
+        of it was saved."""
+
+
+class BatchingWriter(_Batcher):
+    """Saves events written from many threads in batches.
+
+    `write` queues events for an aggregate and returns a future. A background
+    thread waits until the oldest queued event has waited `max_delay` seconds
+    or `max_events` are queued, then saves everything queued in one
+    transaction, with one save per aggregate, and gives each future the
+    events it queued once they're recorded. A few milliseconds of latency buy
+    far fewer transactions when many small events are written at once.
+
+    Events are appended after whatever their aggregate already has, so this
+    suits aggregates whose events don't depend on their state, such as
+    telemetry. If the transaction fails every future in it gets the error.
+
+    Use it as a context manager, or call `close`, which saves anything still
+    queued.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_events: int = DEFAULT_MAX_EVENTS,
+    ) -> None:
+        super().__init__(client, max_delay, max_events)
+
+    def __enter__(self) -> "BatchingWriter":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def write(
+        self,
+        aggregate_type: str,
+        aggregate_id: str,
+        events: t.Sequence[common.NewEvent],
+    ) -> concurrent.futures.Future[t.List[common.RecordedEvent]]:
+        """Queues events to be appended to the aggregate."""
+        return self._queue(
+            _Write(aggregate_type, aggregate_id, list(events), None)
+        ).future
+
+    def _save(self, batch: t.List[_Write]) -> None:
+        by_aggregate: t.Dict[t.Tuple[str, str], t.List[_Write]] = {}
+        for write in batch:
+            by_aggregate.setdefault(
+                (write.aggregate_type, write.aggregate_id), []
+            ).append(write)
+        results = self._client._save_together(
+            [
+                (
+                    aggregate_type,
+                    aggregate_id,
+                    [event for write in writes for event in write.events],
+                    None,
+                )
+                for (aggregate_type, aggregate_id), writes in by_aggregate.items()
+            ]
+        )
+        for writes, recorded in zip(by_aggregate.values(), results):
+            start = 0
+            for write in writes:
+                write.resolve(recorded[start : start + len(write.events)])
+                start += len(write.events)
+
+
+class _GroupCommitter(_Batcher):
+    """Commits saves made by concurrent callers of `Client.save_events`
+    together, each in its own savepoint."""
+
+    def save(
+        self,
+        aggregate_type: str,
+        aggregate_id: str,
+        events: t.List[common.NewEvent],
+        version: t.Optional[int],
+    ) -> t.List[common.RecordedEvent]:
+        """Queues the save and waits for it to be committed."""
+        write = self._queue(_Write(aggregate_type, aggregate_id, events, version))
+        return write.future.result()
+
+    def _save(self, batch: t.List[_Write]) -> None:
+        outcomes = self._client._save_each(
+            [
+                (write.aggregate_type, write.aggregate_id, write.events, write.version)
+                for write in batch
+            ]
+        )
+        for write, outcome in zip(batch, outcomes):
+            write.resolve(outcome)
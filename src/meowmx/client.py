@@ -1,12 +1,21 @@
+import collections
 import contextlib
+import copy
+import itertools
 import threading
 import time
 import typing as t
 
+from sqlalchemy import Connection, event as sqlalchemy_event
+
 from . import aggregates
-from .esp import esp
-from .backoff import BackoffCalc
+from . import batching
+from .esp import esp, listener, raw
+from .backoff import BackoffCalc, relay
+from .batch_size import AdaptiveBatchSize
 from . import common
+from . import hooks as hooks_module
+from . import projections
 from . import sqlalchemy
 
 
@@ -20,10 +29,34 @@ class ExpectedVersionFailure(RuntimeError):
 
 DEFAULT_LIMIT = 512
 
+# How many events `Client.bulk_import` writes per transaction.
+DEFAULT_IMPORT_BATCH_SIZE = 50_000
+
+# How many times `Client.execute` retries after a version conflict.
+DEFAULT_EXECUTE_RETRIES = 5
+# Bounds in seconds of the jittered wait before each of those retries.
+_EXECUTE_MIN_BACKOFF = 0.005
+_EXECUTE_MAX_BACKOFF = 0.5
+
+# Seconds `Client.rebuild_projection` waits when its checkpoint is locked.
+_REBUILD_RETRY_DELAY = 0.05
+
 
 LoadableAggregateType = t.TypeVar(
     "LoadableAggregateType", bound=aggregates.LoadableAggregate
 )
+RefreshableAggregateType = t.TypeVar(
+    "RefreshableAggregateType", bound=aggregates.RefreshableAggregate
+)
+
+# The aggregate type, aggregate ID, events and version of a save.
+_Save = t.Tuple[str, str, t.List[common.NewEvent], t.Optional[int]]
+
+
+# How many batch records are kept per subscription to work out throughput.
+_RECENT_BATCH_COUNT = 128
+# Only batches started within this many seconds count towards throughput.
+_THROUGHPUT_WINDOW = 60.0
 
 
 class Client:
@@ -31,19 +64,88 @@ class Client:
         self,
         engine: common.Engine,
         session_maker: t.Optional[common.SessionMaker] = None,
+        hooks: t.Optional[hooks_module.Hooks] = None,
+        codec: t.Optional[common.Codec] = None,
+        read_engines: t.Union[None, common.Engine, t.Sequence[common.Engine]] = None,
+        group_commit_delay: t.Optional[float] = None,
     ) -> None:
         self._engine = engine
+        # replicas which loads and subscriptions read events from, taking
+        # turns; writes and anything run in a caller's session use `engine`
+        if read_engines is None:
+            read_engines = []
+        elif isinstance(read_engines, common.Engine):
+            read_engines = [read_engines]
+        self._read_engines = list(read_engines)
+        for read_engine in self._read_engines:
+            if read_engine.dialect.name != engine.dialect.name:
+                raise ValueError(
+                    f"read engines must use the same database as the engine, {engine.dialect.name}"
+                )
+        self._read_turns = itertools.count()
+        self._hooks = hooks
+        # encodes the data of new events and decodes the data of recorded ones
+        self._codec = codec or common.default_codec()
+        # events used to wake up subscriptions, by aggregate type; those under
+        # None are woken up for every aggregate type
+        self._wakeups: t.Dict[t.Optional[str], t.Set[threading.Event]] = {}
+        self._wakeups_lock = threading.Lock()
+        # batches recently handled by subscriptions in this process, by name
+        self._recent_batches: t.Dict[str, t.Deque[common.SubscriptionBatch]] = {}
+        # Sessions are only made for subscriptions, whose handlers are given
+        # one. Everything else the client does in its own transactions runs
+        # on Core connections, skipping the ORM's bookkeeping.
         if session_maker is not None:
             self._session_maker = session_maker
         else:
             self._session_maker = sqlalchemy.create_session_maker(engine)
         self._esp: common.Client
         if self._engine.dialect.name == "postgresql":
-            self._esp = esp.Esp()
+            self._esp = esp.Esp(self._codec)
+            for prepared_engine in [self._engine, *self._read_engines]:
+                raw.prepare_marked_statements(prepared_engine)
         else:
-            self._esp = sqlalchemy.Client()
-            if sqlalchemy.engine_is_in_memory_db(self._engine):
-                self._esp = sqlalchemy.MutexLockedClient(self._esp)
+            self._esp = sqlalchemy.Client(self._codec)
+            for sqlite_engine in [self._engine, *self._read_engines]:
+                sqlalchemy.configure_engine(sqlite_engine)
+        if hooks is not None:
+            self._esp = hooks_module.InstrumentedClient(self._esp, hooks)
+        # background threads saving events for this client; see `close`
+        self._batchers: t.Set[batching._Batcher] = set()
+        self._batchers_lock = threading.Lock()
+        # With a delay, saves made without a session by concurrent callers
+        # are committed together by a background thread, waiting at most
+        # that many seconds for others to join them.
+        self._group_committer: t.Optional[batching._GroupCommitter] = None
+        if group_commit_delay is not None:
+            self._group_committer = batching._GroupCommitter(
+                self, group_commit_delay, batching.DEFAULT_MAX_EVENTS
+            )
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the client's background threads once they've saved what's
+        queued: the group committer and any `BatchingWriter` still open.
+
+        The engines are left alone; dispose of them separately.
+        """
+        with self._batchers_lock:
+            batchers = list(self._batchers)
+        for batcher in batchers:
+            batcher.close()
+
+    def _add_batcher(self, batcher: batching._Batcher) -> None:
+        with self._batchers_lock:
+            self._batchers.add(batcher)
+
+    def _remove_batcher(self, batcher: batching._Batcher) -> None:
+        with self._batchers_lock:
+            self._batchers.discard(batcher)
 
     def setup_tables(self, aggregate_id_column_type: t.Optional[str] = None) -> None:
         self._esp.setup_tables(self._engine, aggregate_id_column_type)
@@ -51,74 +153,335 @@ class Client:
     def _handle_subscription_events(
         self,
         subscription_name: str,
-        aggregate_type: str,
+        aggregate_type: t.Union[str, t.Collection[str]],
         batch_size: int,
-        handler: common.EventHandler,
-    ) -> int:
-        """Handles the next event in the subscription.
+        handler: t.Union[common.EventHandler, common.BatchHandler],
+        max_tx_time: t.Optional[float] = None,
+        event_types: t.Optional[t.Collection[str]] = None,
+        batched: bool = False,
+    ) -> common.SubscriptionBatch:
+        """Handles the next batch of events in the subscription.
 
-        Returns the number of events handled, or zero if there was no event.
-        If there is an event, calls the handler. On success updates the
-        checkpoint.
+        Returns a record of the batch, whose `processed` count is zero if there
+        were no events. For each event calls the handler and on success updates
+        the checkpoint. If `max_tx_time` is given the batch is cut short once
+        the transaction has been open for that many seconds.
         If the handler raises an exception, then releases the lock on the event.
+        If `batched` is true the handler is instead called once with all of
+        the batch's events, and the checkpoint is updated once after it.
+        The subscription must already be registered; see `register_subscription`.
         """
+        event_filter = common.EventFilter.create(aggregate_type, event_types)
+        started_at = time.time()
+        start_time = time.perf_counter()
+        lock_acquired = False
+        processed_count = 0
+        has_more = False
+        read_time = 0.0
+        handler_time = 0.0
+        last_event: t.Optional[common.RecordedEvent] = None
         with self._session_maker() as session:
             with session.begin():
-                self._esp.create_subscription_if_absent(session, subscription_name)
+                # the checkpoint is written to, so start as a writer
+                session.connection(execution_options={sqlalchemy.WRITE: True})
                 checkpoint = self._esp.read_checkpoint_and_lock_subscription(
                     session, subscription_name
                 )
                 if not checkpoint:
                     # this can happen if we can't lock a record
                     session.commit()
-                    return 0
+                    read_time = time.perf_counter() - start_time
                 else:
-                    events = self._esp.read_events_after_checkpoint(
-                        session,
-                        aggregate_type,
-                        checkpoint.last_tx_id,
-                        checkpoint.last_event_id,
+                    lock_acquired = True
+                    # the checkpoint stays locked on the primary while the
+                    # events are read from a replica, if there is one
+                    reader: contextlib.AbstractContextManager[common.Executor] = (
+                        self._read_engine().connect()
+                        if self._read_engines
+                        else contextlib.nullcontext(session)
                     )
+                    with reader as reader_session:
+                        # read one extra event to find out if there's a backlog
+                        events = self._esp.read_events_after_checkpoint(
+                            reader_session,
+                            event_filter.aggregate_types,
+                            checkpoint.last_tx_id,
+                            checkpoint.last_event_id,
+                            limit=batch_size + 1,
+                            event_types=event_filter.event_types,
+                        )
+                    has_more = len(events) > batch_size
+                    read_time = time.perf_counter() - start_time
 
                     updated_checkpoint = False
 
-                    processed_count = 0
-                    for event in events:
-                        if processed_count >= batch_size:
-                            break
-                        processed_count += 1
-
-                        with session.begin_nested() as nested_tx:
-                            try:
-                                handler(session, event)
-                            except Exception:
-                                nested_tx.rollback()
-                                # if we need to update the check point at all,
-                                # commit what we got, especially if this is being
-                                # a problematic event
-                                if updated_checkpoint:
-                                    session.commit()
-                                raise
-                            # session2.commit()
+                    if batched:
+                        handled = events[:batch_size]
+                        if handled:
+                            t.cast(common.BatchHandler, handler)(session, handled)
                             self._esp.update_event_subscription(
                                 session,
                                 subscription_name,
-                                event.tx_id,
-                                event.id,
+                                handled[-1].tx_id,
+                                handled[-1].id,
                             )
-                            updated_checkpoint = True
+                            processed_count = len(handled)
+                            last_event = handled[-1]
+                    else:
+                        for event in events:
+                            if processed_count >= batch_size:
+                                break
+                            if (
+                                max_tx_time is not None
+                                and processed_count > 0
+                                and time.perf_counter() - start_time >= max_tx_time
+                            ):
+                                has_more = True
+                                break
+                            processed_count += 1
+
+                            with session.begin_nested() as nested_tx:
+                                if self._hooks is not None:
+                                    handler_start = time.perf_counter()
+                                try:
+                                    t.cast(common.EventHandler, handler)(session, event)
+                                except Exception:
+                                    if self._hooks is not None:
+                                        self._hooks.handler(
+                                            subscription_name,
+                                            event,
+                                            time.perf_counter() - handler_start,
+                                            succeeded=False,
+                                        )
+                                    nested_tx.rollback()
+                                    # if we need to update the check point at all,
+                                    # commit what we got, especially if this is being
+                                    # a problematic event
+                                    if updated_checkpoint:
+                                        session.commit()
+                                    raise
+                                if self._hooks is not None:
+                                    self._hooks.handler(
+                                        subscription_name,
+                                        event,
+                                        time.perf_counter() - handler_start,
+                                        succeeded=True,
+                                    )
+                                # session2.commit()
+                                self._esp.update_event_subscription(
+                                    session,
+                                    subscription_name,
+                                    event.tx_id,
+                                    event.id,
+                                )
+                                updated_checkpoint = True
+                                last_event = event
 
+                    handler_time = time.perf_counter() - start_time - read_time
                     session.commit()
-                    return processed_count
+        elapsed = time.perf_counter() - start_time
+        batch = common.SubscriptionBatch(
+            subscription_name=subscription_name,
+            aggregate_type=event_filter.describe(),
+            batch_size=batch_size,
+            lock_acquired=lock_acquired,
+            processed=processed_count,
+            has_more=has_more,
+            started_at=started_at,
+            read_time=read_time,
+            handler_time=handler_time,
+            elapsed=elapsed,
+            last_tx_id=last_event.tx_id if last_event is not None else None,
+            last_event_id=last_event.id if last_event is not None else None,
+        )
+        self._record_batch(batch)
+        return batch
+
+    def _record_batch(self, batch: common.SubscriptionBatch) -> None:
+        recent = self._recent_batches.get(batch.subscription_name)
+        if recent is None:
+            recent = self._recent_batches.setdefault(
+                batch.subscription_name,
+                collections.deque(maxlen=_RECENT_BATCH_COUNT),
+            )
+        recent.append(batch)
+        if self._hooks is not None:
+            self._hooks.subscription_batch(batch)
+
+    def recent_subscription_batches(
+        self, subscription_name: str
+    ) -> t.List[common.SubscriptionBatch]:
+        """Returns records of the latest batches handled in this process."""
+        return list(self._recent_batches.get(subscription_name, ()))
+
+    def register_subscription(
+        self,
+        subscription_name: str,
+        aggregate_type: t.Union[None, str, t.Collection[str]] = None,
+        event_types: t.Optional[t.Collection[str]] = None,
+    ) -> None:
+        """Creates the subscription's checkpoint if it doesn't exist yet.
+
+        `sub` calls this once when it starts, so polling for events afterwards
+        only has to lock and read the checkpoint. If `aggregate_type` is given
+        it's stored with the subscription, along with `event_types`, so
+        `subscription_status` can find them.
+        """
+        single_type: t.Optional[str] = None
+        # only stored when the aggregate type alone doesn't say what's read
+        event_filter: t.Optional[common.EventFilter] = None
+        if aggregate_type is not None:
+            event_filter = common.EventFilter.create(aggregate_type, event_types)
+            single_type = event_filter.aggregate_type
+            if event_filter.is_simple:
+                event_filter = None
+        with self._write_connection() as connection, connection.begin():
+            self._esp.create_subscription_if_absent(
+                connection, subscription_name, single_type, event_filter
+            )
+
+    def subscription_status(
+        self,
+        subscription_name: str,
+        aggregate_type: t.Union[None, str, t.Collection[str]] = None,
+        max_lag_count: int = 10_000,
+        event_types: t.Optional[t.Collection[str]] = None,
+    ) -> t.Optional[common.SubscriptionStatus]:
+        """Reports how far behind a subscription is, or None if it doesn't exist.
+
+        The aggregate and event types are taken from the subscription unless
+        they're given. Counting stops at `max_lag_count` events so checking on
+        a subscription which is far behind stays cheap.
+        """
+        event_filter: t.Optional[common.EventFilter] = None
+        if aggregate_type is not None:
+            event_filter = common.EventFilter.create(aggregate_type, event_types)
+        with self._engine.begin() as connection:
+            subscriptions = self._esp.read_subscriptions(connection, subscription_name)
+            if len(subscriptions) == 0:
+                return None
+            return self._subscription_status(
+                connection, subscriptions[0], event_filter, max_lag_count
+            )
+
+    def all_subscription_status(
+        self, max_lag_count: int = 10_000
+    ) -> t.List[common.SubscriptionStatus]:
+        """Reports on every subscription. See `subscription_status`."""
+        with self._engine.begin() as connection:
+            return [
+                self._subscription_status(connection, info, None, max_lag_count)
+                for info in self._esp.read_subscriptions(connection, None)
+            ]
+
+    def _subscription_status(
+        self,
+        session: common.Executor,
+        info: common.SubscriptionInfo,
+        event_filter: t.Optional[common.EventFilter],
+        max_lag_count: int,
+    ) -> common.SubscriptionStatus:
+        if event_filter is None:
+            event_filter = info.event_filter
+        if event_filter is None and info.aggregate_type is not None:
+            event_filter = common.EventFilter.create(info.aggregate_type)
+        head: t.Optional[common.SubCheckpoint] = None
+        lag_events: t.Optional[int] = None
+        lag_transactions: t.Optional[int] = None
+        if event_filter is not None:
+            head = self._esp.read_head_position(
+                session, event_filter.aggregate_types, event_filter.event_types
+            )
+            lag_events, lag_transactions = self._esp.count_events_after_checkpoint(
+                session,
+                event_filter.aggregate_types,
+                info.last_tx_id,
+                info.last_event_id,
+                max_lag_count,
+                event_filter.event_types,
+            )
+        return common.SubscriptionStatus(
+            subscription_name=info.subscription_name,
+            aggregate_type=event_filter.describe() if event_filter else None,
+            last_tx_id=info.last_tx_id,
+            last_event_id=info.last_event_id,
+            head_tx_id=head.last_tx_id if head is not None else None,
+            head_event_id=head.last_event_id if head is not None else None,
+            lag_events=lag_events,
+            lag_transactions=lag_transactions,
+            lag_capped=lag_events is not None and lag_events >= max_lag_count,
+            events_per_second=self._events_per_second(info.subscription_name),
+            event_filter=event_filter,
+        )
+
+    def _events_per_second(self, subscription_name: str) -> t.Optional[float]:
+        recent = self.recent_subscription_batches(subscription_name)
+        if len(recent) == 0:
+            return None
+        now = time.time()
+        window = [
+            batch for batch in recent if now - batch.started_at <= _THROUGHPUT_WINDOW
+        ]
+        if len(window) == 0:
+            return 0.0
+        elapsed = now - window[0].started_at
+        if elapsed <= 0:
+            return None
+        return sum(batch.processed for batch in window) / elapsed
 
     def _start_session_if_desired(
-        self, session: t.Optional[common.Session]
-    ) -> contextlib.AbstractContextManager[common.Session]:
+        self, session: t.Optional[common.Session], write: bool = False
+    ) -> contextlib.AbstractContextManager[common.Executor]:
+        """Returns the caller's session, or if there isn't one a Core
+        connection, which is cheaper than a session of our own."""
         if session is not None:
             # return the already created session
             return contextlib.nullcontext(session)
+        elif write:
+            return self._write_connection()
         else:
-            return self._session_maker()
+            return self._engine.connect()
+
+    def _write_connection(self) -> Connection:
+        """A connection for transactions which write, which SQLite begins
+        by taking the write lock."""
+        return self._engine.connect().execution_options(**{sqlalchemy.WRITE: True})
+
+    def _read_engine(self) -> common.Engine:
+        return self._read_engines[next(self._read_turns) % len(self._read_engines)]
+
+    def _start_read_if_desired(
+        self,
+        session: t.Optional[common.Session],
+        caught_up: t.Optional[t.Callable[[common.Executor], bool]] = None,
+    ) -> contextlib.AbstractContextManager[common.Executor]:
+        """Like `_start_session_if_desired`, but a connection is taken from a
+        read engine if there are any.
+
+        If `caught_up` is given and returns False for the replica's
+        connection, a connection to the primary is used instead.
+        """
+        if session is not None or not self._read_engines:
+            return self._start_session_if_desired(session)
+        return self._replica_connection(caught_up)
+
+    def _caught_up_to_tx(
+        self, min_tx_id: t.Optional[int]
+    ) -> t.Optional[t.Callable[[common.Executor], bool]]:
+        if min_tx_id is None:
+            return None
+        return lambda executor: self._esp.has_caught_up(executor, min_tx_id)
+
+    @contextlib.contextmanager
+    def _replica_connection(
+        self, caught_up: t.Optional[t.Callable[[common.Executor], bool]]
+    ) -> t.Iterator[common.Executor]:
+        with self._read_engine().connect() as connection:
+            if caught_up is None or caught_up(connection):
+                yield connection
+                return
+        with self._engine.connect() as connection:
+            yield connection
 
     def load_all_events(
         self,
@@ -126,14 +489,203 @@ class Client:
         to_tx_id: t.Optional[int],
         limit: t.Optional[int],
         session: t.Optional[common.Session] = None,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+        min_tx_id: t.Optional[int] = None,
     ) -> t.List[common.RecordedEvent]:
+        """Reads events from the global log, ordered by transaction and ID.
+
+        Reading starts after the transaction `from_tx_id`, or if
+        `after_event_id` is also given, after that event within it. As a
+        transaction can hold more than `limit` events, page through the log
+        with `load_all_events_page` or `iter_all_events`, which do this.
+
+        Transactions don't always commit in the order they started, so
+        events can still appear before the newest one read. Pass
+        `committed_only` to only read as far as subscriptions do, which is
+        up to the oldest transaction still in progress.
+
+        Without a `session` the events are read from a read engine, if the
+        client has any. To be sure of seeing your own writes pass the
+        `tx_id` of the last event written as `min_tx_id`; if the replica
+        hasn't caught up to it the primary is read instead.
+        """
         limit = limit or DEFAULT_LIMIT
-        with self._start_session_if_desired(session) as session:
+        with self._start_read_if_desired(
+            session, self._caught_up_to_tx(min_tx_id)
+        ) as session_2:
             return self._esp.read_all_events(
-                session,
+                session_2,
                 limit=limit,
                 from_tx_id=from_tx_id,
                 to_tx_id=to_tx_id,
+                after_event_id=after_event_id,
+                committed_only=committed_only,
+            )
+
+    def load_all_events_page(
+        self,
+        position: t.Optional[common.SubCheckpoint],
+        to_tx_id: t.Optional[int] = None,
+        limit: t.Optional[int] = None,
+        session: t.Optional[common.Session] = None,
+        committed_only: bool = False,
+        min_tx_id: t.Optional[int] = None,
+    ) -> common.EventPage:
+        """Reads the events after `position`, or from the start if it's None.
+
+        The page's `position` is where to carry on from, so no event is
+        skipped or read twice however many a transaction holds.
+        `committed_only` and `min_tx_id` are as for `load_all_events`.
+        """
+        events = self.load_all_events(
+            from_tx_id=None if position is None else position.last_tx_id,
+            to_tx_id=to_tx_id,
+            limit=limit,
+            session=session,
+            after_event_id=None if position is None else position.last_event_id,
+            committed_only=committed_only,
+            min_tx_id=min_tx_id,
+        )
+        if events:
+            position = common.SubCheckpoint(
+                last_tx_id=events[-1].tx_id, last_event_id=events[-1].id
+            )
+        return common.EventPage(events=events, position=position)
+
+    def iter_all_events(
+        self,
+        position: t.Optional[common.SubCheckpoint] = None,
+        to_tx_id: t.Optional[int] = None,
+        page_size: t.Optional[int] = None,
+    ) -> t.Iterator[common.RecordedEvent]:
+        """Yields every event after `position`, reading a page at a time.
+
+        Each page is read in its own session. Stops once there are no more
+        events, so events written while iterating may or may not be seen; to
+        keep following the log use `tail_all_events`.
+        """
+        while True:
+            page = self.load_all_events_page(
+                position, to_tx_id=to_tx_id, limit=page_size
+            )
+            if not page.events:
+                return
+            yield from page.events
+            position = page.position
+
+    def tail_all_events(
+        self,
+        position: t.Optional[common.SubCheckpoint] = None,
+        page_size: t.Optional[int] = None,
+        stop_signal: t.Optional[threading.Event] = None,
+        min_sleep_time: float = 0.1,
+        max_sleep_time: float = 1,
+        jitter: bool = True,
+    ) -> t.Iterator[common.RecordedEvent]:
+        """Yields every event after `position`, of every aggregate type, and
+        then each new one as it's committed, until `stop_signal` is set.
+
+        Like subscriptions this only reads up to the oldest transaction still
+        in progress, so an event from a transaction which is slow to commit
+        is never skipped. To carry on later, keep the `tx_id` and `id` of the
+        last event handled and pass them back as `position`.
+
+        When caught up this waits like `sub` does. On Postgres it also
+        listens for the notifications sent when events are committed, so it
+        wakes up for events written by other processes too.
+        """
+        backoff = BackoffCalc(min_sleep_time, max_sleep_time, jitter=jitter)
+        wakeup = threading.Event()
+        # stopping wakes it up too, so waiting only needs to watch `wakeup`
+        unrelay = relay(stop_signal, wakeup) if stop_signal is not None else None
+        self._add_wakeup(None, wakeup)
+        try:
+            with self.listen_for_events():
+                while stop_signal is None or not stop_signal.is_set():
+                    wakeup.clear()
+                    page = self.load_all_events_page(
+                        position, limit=page_size, committed_only=True
+                    )
+                    if not page.events:
+                        backoff.wait(wakeup)
+                        continue
+                    backoff.success()
+                    position = page.position
+                    yield from page.events
+        finally:
+            self._remove_wakeup(None, wakeup)
+            if unrelay is not None:
+                unrelay()
+
+    def listen_for_events(self) -> contextlib.AbstractContextManager[t.Any]:
+        """Wakes up waiting subscriptions when any process writes events.
+
+        While the returned context manager is open a background thread
+        listens for the notifications Postgres sends as events are committed
+        and passes them to `wake_subscriptions`. Does nothing unless the
+        engine uses Postgres and psycopg.
+        """
+        if self._engine.dialect.name != "postgresql" or (
+            self._engine.dialect.driver != "psycopg"
+        ):
+            return contextlib.nullcontext()
+        return listener.NotificationListener(self._engine, self.wake_subscriptions)
+
+    def load_all_events_batch(
+        self,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: t.Optional[int],
+        session: t.Optional[common.Session] = None,
+        after_event_id: t.Optional[int] = None,
+        min_tx_id: t.Optional[int] = None,
+    ) -> common.EventBatch:
+        """Like `load_all_events`, but returns a compact `EventBatch`.
+
+        Prefer this when reading many events at once, such as for replays.
+        """
+        limit = limit or DEFAULT_LIMIT
+        with self._start_read_if_desired(
+            session, self._caught_up_to_tx(min_tx_id)
+        ) as session_2:
+            return self._esp.read_all_events_batch(
+                session_2,
+                limit=limit,
+                from_tx_id=from_tx_id,
+                to_tx_id=to_tx_id,
+                after_event_id=after_event_id,
+            )
+
+    def export_events(
+        self,
+        file: t.BinaryIO,
+        from_tx_id: t.Optional[int] = None,
+        to_tx_id: t.Optional[int] = None,
+        aggregate_type: t.Optional[str] = None,
+        format: str = "ndjson",
+        session: t.Optional[common.Session] = None,
+    ) -> int:
+        """Streams events to `file`, a binary file object, oldest first.
+
+        Unlike `load_all_events` there's no limit: every event after
+        `from_tx_id` up to and including `to_tx_id`, optionally only those
+        of `aggregate_type`, is written as it's read, so memory use stays
+        flat however many there are. Postgres uses `COPY ... TO STDOUT`.
+
+        `format` is "ndjson", writing one JSON object per event with its
+        data under "data", or "binary", which is PostgreSQL's binary `COPY`
+        format; see `meowmx.common.export` for the columns. Returns the
+        number of events written.
+        """
+        with self._start_read_if_desired(session) as session_2:
+            return self._esp.export_events(
+                session_2,
+                file,
+                from_tx_id=from_tx_id,
+                to_tx_id=to_tx_id,
+                aggregate_type=aggregate_type,
+                format=format,
             )
 
     def load_events(
@@ -145,12 +697,29 @@ class Client:
         limit: t.Optional[int] = None,
         reverse: bool = False,
         session: t.Optional[common.Session] = None,
+        min_version: t.Optional[int] = None,
     ) -> t.List[common.RecordedEvent]:
+        """Reads the aggregate's events, ordered by version.
+
+        Without a `session` the events are read from a read engine, if the
+        client has any. To be sure of seeing your own writes pass the
+        version of the last event written as `min_version`; if the replica
+        doesn't have it yet the primary is read instead.
+        """
         limit = limit or DEFAULT_LIMIT
         if from_version is None and not reverse:
             from_version = 0
 
-        with self._start_session_if_desired(session) as session2:
+        caught_up: t.Optional[t.Callable[[common.Executor], bool]] = None
+        if min_version is not None:
+
+            def caught_up(executor: common.Executor) -> bool:
+                version = self._esp.get_aggregate_version(
+                    executor, aggregate_type, aggregate_id
+                )
+                return version is not None and version >= t.cast(int, min_version)
+
+        with self._start_read_if_desired(session, caught_up) as session2:
             return self._esp.read_events_by_aggregate_id(
                 session2,
                 aggregate_id=aggregate_id,
@@ -165,14 +734,20 @@ class Client:
         aggregate_type: t.Type[LoadableAggregateType],
         id: str,
         session: t.Optional[common.Session] = None,
+        min_version: t.Optional[int] = None,
     ) -> LoadableAggregateType:
         """Constructs an aggregate by loading it's events.
 
         To support this, the type passed must define it's aggregate_type string
         as a class field and have an __init__ which can accept `recorded_events`.
+        `min_version` is as for `load_events`.
         """
         recorded_events = self.load_events(
-            aggregate_type.aggregate_type, id, from_version=0, session=session
+            aggregate_type.aggregate_type,
+            id,
+            from_version=0,
+            session=session,
+            min_version=min_version,
         )
         return aggregate_type(recorded_events=recorded_events)
 
@@ -191,6 +766,74 @@ class Client:
             session=session,
         )
 
+    def execute(
+        self,
+        aggregate_type: t.Type[RefreshableAggregateType],
+        id: str,
+        command: t.Callable[[RefreshableAggregateType], None],
+        retries: int = DEFAULT_EXECUTE_RETRIES,
+    ) -> RefreshableAggregateType:
+        """Loads an aggregate, runs `command` on it and saves the events it
+        emits, trying again if the aggregate is written to in the meantime.
+
+        The command runs on a copy of the aggregate made with `copy.deepcopy`.
+        After a version conflict the original is brought up to date with
+        `refresh_aggregate` before the command runs on a new copy, so a busy
+        aggregate isn't loaded from scratch every time.
+        Retries wait a growing, jittered amount of time. If the save still
+        conflicts after `retries` retries `ExpectedVersionFailure` is raised.
+
+        Returns the copy of the aggregate whose events were saved.
+        """
+        recorded_events = self.load_events(
+            aggregate_type.aggregate_type, id, from_version=0
+        )
+        original = aggregate_type(recorded_events=recorded_events)
+        backoff = BackoffCalc(_EXECUTE_MIN_BACKOFF, _EXECUTE_MAX_BACKOFF, jitter=True)
+        attempt = 0
+        while True:
+            aggregate = copy.deepcopy(original)
+            command(aggregate)
+            try:
+                self.save_aggregate(aggregate)
+                return aggregate
+            except ExpectedVersionFailure:
+                if attempt >= retries:
+                    raise
+            attempt += 1
+            time.sleep(backoff.failure())
+            # there's at least one newer event, so don't read a replica
+            # which doesn't have it yet
+            self.refresh_aggregate(original, min_version=original.db_version + 1)
+
+    def refresh_aggregate(
+        self,
+        aggregate: aggregates.RefreshableAggregate,
+        session: t.Optional[common.Session] = None,
+        min_version: t.Optional[int] = None,
+    ) -> t.List[common.RecordedEvent]:
+        """Brings an aggregate loaded earlier up to date.
+
+        Only the events after its `db_version` are read, and they're passed
+        to its `catch_up`. Returns those events. `min_version` is as for
+        `load_events`.
+        """
+        caught_up: t.List[common.RecordedEvent] = []
+        while True:
+            newer = self.load_events(
+                aggregate.aggregate_type,
+                aggregate.aggregate_id,
+                from_version=aggregate.db_version + 1,
+                session=session,
+                min_version=min_version,
+            )
+            if len(newer) == 0:
+                return caught_up
+            aggregate.catch_up(newer)
+            caught_up.extend(newer)
+            if len(newer) < DEFAULT_LIMIT:
+                return caught_up
+
     def save_events(
         self,
         aggregate_type: str,
@@ -202,14 +845,29 @@ class Client:
         """Writes the events to database under the given aggregate.
 
         `version` should be the first version number of the new events (zero if
-        starting a new stream).
+        starting a new stream), or None to put them after the last event.
         If `session` is passed in the user is responsible for starting and
         committing the transaction. If None is passed this code will do those
-        things itself.
+        things itself, unless the client was made with `group_commit_delay`, in
+        which case the events are committed along with those of other threads
+        saving at the same time. A version conflict still only fails the save
+        it belongs to.
         """
         if len(events) == 0:
             return []
-        with self._start_session_if_desired(session) as session_2:
+        if (
+            session is None
+            and self._group_committer is not None
+            # a thread already writing to SQLite, such as a subscription's
+            # handler, would wait for itself to finish if the save was queued
+            and not sqlalchemy.thread_is_writing(self._engine)
+        ):
+            return self._group_committer.save(
+                aggregate_type, aggregate_id, events, version
+            )
+        if self._hooks is not None:
+            start_time = time.perf_counter()
+        with self._start_session_if_desired(session, write=True) as session_2:
             tx: contextlib.AbstractContextManager
             if session is None:
                 # If we're controlling things, commit / rollback at the end of this.
@@ -218,63 +876,429 @@ class Client:
                 # If the user is controlling it, don't commit or rollback.
                 tx = contextlib.nullcontext()
             with tx:
-                if version is None:
-                    version = self._esp.get_aggregate_version(
-                        session_2, aggregate_type, aggregate_id
-                    )
-                    if version is None:
-                        version = 0
+                results = self._append_events(
+                    session_2, aggregate_type, aggregate_id, events, version
+                )
+            if self._hooks is not None:
+                self._hooks.save_events(
+                    aggregate_type, time.perf_counter() - start_time, len(results)
+                )
+            if session is None:
+                self.wake_subscriptions(aggregate_type)
+            else:
+                self._wake_subscriptions_after_commit(session, aggregate_type)
+            return results
 
-                next_expected_version: int = version
-                new_event_rows: t.List[common.NewEventRow] = [
-                    common.NewEventRow(
-                        aggregate_id=aggregate_id,
-                        event_type=element.event_type,
-                        json=element.json,
-                        version=next_expected_version + index,
-                    )
-                    for index, element in enumerate(events)
-                ]
-                expected_version = version - 1
-                next_version = expected_version + len(events)
+    def _save_together(
+        self, saves: t.Sequence[_Save]
+    ) -> t.List[t.List[common.RecordedEvent]]:
+        """Saves events to several aggregates in one transaction, returning
+        the recorded events of each save."""
+        if self._hooks is not None:
+            start_time = time.perf_counter()
+        with self._write_connection() as connection, connection.begin():
+            results = [self._append_events(connection, *save) for save in saves]
+        if self._hooks is not None:
+            elapsed = time.perf_counter() - start_time
+            for save, recorded in zip(saves, results):
+                self._hooks.save_events(save[0], elapsed, len(recorded))
+        for aggregate_type in {save[0] for save in saves}:
+            self.wake_subscriptions(aggregate_type)
+        return results
+
+    def _save_each(
+        self, saves: t.Sequence[_Save]
+    ) -> t.List[t.Union[t.List[common.RecordedEvent], Exception]]:
+        """Saves events to several aggregates in one transaction, each in a
+        savepoint so a save which fails is rolled back without the others.
 
-                self._esp.create_aggregate_if_absent(
-                    session_2,
-                    aggregate_type,
-                    aggregate_id,
+        Returns the recorded events of each save, or the error it raised.
+        """
+        if self._hooks is not None:
+            start_time = time.perf_counter()
+        outcomes: t.List[t.Union[t.List[common.RecordedEvent], Exception]] = []
+        with self._write_connection() as connection, connection.begin():
+            for save in saves:
+                try:
+                    with connection.begin_nested():
+                        outcomes.append(self._append_events(connection, *save))
+                except Exception as error:
+                    outcomes.append(error)
+        saved_types = set()
+        for save, outcome in zip(saves, outcomes):
+            if isinstance(outcome, Exception):
+                continue
+            saved_types.add(save[0])
+            if self._hooks is not None:
+                self._hooks.save_events(
+                    save[0], time.perf_counter() - start_time, len(outcome)
                 )
-                if not self._esp.check_and_update_aggregate_version(
-                    session_2, aggregate_id, expected_version, next_version
-                ):
-                    raise ExpectedVersionFailure(
-                        f"{aggregate_type} - {aggregate_id} did not match expected_version of {expected_version}"
-                    )
-                results = []
-                for new_event_row in new_event_rows:
-                    recorded_event = self._esp.append_event(
-                        session_2, new_event_row, aggregate_type
+        for aggregate_type in saved_types:
+            self.wake_subscriptions(aggregate_type)
+        return outcomes
+
+    def _append_events(
+        self,
+        session: common.Executor,
+        aggregate_type: str,
+        aggregate_id: str,
+        events: t.List[common.NewEvent],
+        version: t.Optional[int],
+    ) -> t.List[common.RecordedEvent]:
+        """Does the work of `save_events` in a transaction which has begun."""
+        if version is None:
+            # append to whatever's there
+            current = self._esp.get_aggregate_version(
+                session, aggregate_type, aggregate_id
+            )
+            version = 0 if current is None else current + 1
+
+        next_expected_version: int = version
+        new_event_rows: t.List[common.NewEventRow] = [
+            common.NewEventRow(
+                aggregate_id=aggregate_id,
+                event_type=element.event_type,
+                json=element.encode_json(self._codec),
+                version=next_expected_version + index,
+            )
+            for index, element in enumerate(events)
+        ]
+        expected_version = version - 1
+        next_version = expected_version + len(events)
+
+        self._esp.create_aggregate_if_absent(
+            session,
+            aggregate_type,
+            aggregate_id,
+        )
+        if not self._esp.check_and_update_aggregate_version(
+            session, aggregate_id, expected_version, next_version
+        ):
+            if self._hooks is not None:
+                self._hooks.version_conflict(aggregate_type, aggregate_id)
+            raise ExpectedVersionFailure(
+                f"{aggregate_type} - {aggregate_id} did not match expected_version of {expected_version}"
+            )
+        results = []
+        for new_event_row in new_event_rows:
+            recorded_event = self._esp.append_event(
+                session, new_event_row, aggregate_type
+            )
+            results.append(recorded_event)
+        return results
+
+    def bulk_import(
+        self,
+        streams: t.Iterable[t.Tuple[str, str, t.Iterable[common.NewEvent]]],
+        batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+    ) -> int:
+        """Writes a large number of events, such as when migrating from
+        another system.
+
+        Each item of `streams` is an aggregate type, an aggregate ID and
+        events, which are appended after any events the aggregate already
+        has. An aggregate can appear more than once. The events are written
+        in transactions of about `batch_size` events: on Postgres they're
+        loaded into a staging table with a binary `COPY` and moved into place
+        with a few set-based statements, while SQLite uses `executemany`.
+
+        Returns the number of events written. If an aggregate already exists
+        with a different type, ValueError is raised, and any transactions
+        which were already committed stay that way.
+        """
+        total = 0
+        rows: t.List[common.ImportEventRow] = []
+        positions: t.Dict[str, int] = collections.Counter()
+
+        def write() -> None:
+            nonlocal total
+            with self._write_connection() as connection, connection.begin():
+                self._esp.import_events(connection, rows)
+            for aggregate_type in {row.aggregate_type for row in rows}:
+                self.wake_subscriptions(aggregate_type)
+            total += len(rows)
+            rows.clear()
+            positions.clear()
+
+        for aggregate_type, aggregate_id, events in streams:
+            for event in events:
+                rows.append(
+                    common.ImportEventRow(
+                        aggregate_type=aggregate_type,
+                        aggregate_id=aggregate_id,
+                        position=positions[aggregate_id],
+                        event_type=event.event_type,
+                        json=event.encode_json(self._codec),
                     )
-                    results.append(recorded_event)
-                return results
+                )
+                positions[aggregate_id] += 1
+                if len(rows) >= batch_size:
+                    write()
+        if rows:
+            write()
+        return total
 
     def sub(
         self,
         subscription_name: str,
-        aggregate_type: str,
+        aggregate_type: t.Union[str, t.Collection[str]],
         handler: common.EventHandler,
-        batch_size: int = 10,
-        max_sleep_time: int = 1,
+        batch_size: t.Union[int, AdaptiveBatchSize] = 10,
+        max_sleep_time: float = 1,
         stop_signal: t.Optional[threading.Event] = None,
+        min_sleep_time: float = 0.1,
+        jitter: bool = True,
+        event_types: t.Optional[t.Collection[str]] = None,
     ) -> None:
-        backoff = BackoffCalc(1, max_sleep_time)
-        while stop_signal is None or not stop_signal.is_set():
-            processed = self._handle_subscription_events(
-                subscription_name=subscription_name,
-                aggregate_type=aggregate_type,
+        """Calls `handler` for each event of the given aggregate type.
+
+        `aggregate_type` can also be a collection of aggregate types, in which
+        case events of all of them are handled in the order they were written.
+        If `event_types` is given only events of those types are read; the
+        filtering happens in the database, so skipped events are never loaded.
+
+        `batch_size` is either a fixed number of events handled per
+        transaction or an `AdaptiveBatchSize`, which tunes the size as the
+        subscription runs. Runs until `stop_signal` is set, or the handler
+        raises. With an `AdaptiveBatchSize` a handler's exception shrinks the
+        batch size and the subscription carries on, only raising once the
+        size can't shrink any further.
+
+        When there are no new events this waits between `min_sleep_time` and
+        `max_sleep_time` seconds before looking again, backing off the longer
+        the subscription stays idle. It wakes up early if `stop_signal` is set
+        or `wake_subscriptions` is called for the aggregate type, which this
+        client does itself whenever it commits new events.
+        """
+        self._run_subscription(
+            subscription_name,
+            aggregate_type,
+            handler,
+            False,
+            batch_size,
+            max_sleep_time,
+            stop_signal,
+            min_sleep_time,
+            jitter,
+            event_types,
+        )
+
+    def sub_batches(
+        self,
+        subscription_name: str,
+        aggregate_type: t.Union[str, t.Collection[str]],
+        handler: common.BatchHandler,
+        batch_size: t.Union[int, AdaptiveBatchSize] = 100,
+        max_sleep_time: float = 1,
+        stop_signal: t.Optional[threading.Event] = None,
+        min_sleep_time: float = 0.1,
+        jitter: bool = True,
+        event_types: t.Optional[t.Collection[str]] = None,
+    ) -> None:
+        """Like `sub`, but calls `handler` once per batch with a list of its
+        events.
+
+        The checkpoint is updated once the handler returns, in the same
+        transaction, so a handler which raises leaves none of the batch done.
+        """
+        self._run_subscription(
+            subscription_name,
+            aggregate_type,
+            handler,
+            True,
+            batch_size,
+            max_sleep_time,
+            stop_signal,
+            min_sleep_time,
+            jitter,
+            event_types,
+        )
+
+    def project(
+        self,
+        projection: projections.Projection,
+        batch_size: t.Union[int, AdaptiveBatchSize] = 500,
+        max_sleep_time: float = 1,
+        stop_signal: t.Optional[threading.Event] = None,
+        min_sleep_time: float = 0.1,
+        jitter: bool = True,
+    ) -> None:
+        """Keeps the projection's table up to date until `stop_signal` is set.
+
+        The projection has its own subscription, named after it, so its
+        checkpoint is written in the same transaction as the rows. See
+        `sub_batches` for the other arguments.
+        """
+        self.sub_batches(
+            projection.name,
+            projection.event_filter.aggregate_types,
+            projection.apply,
+            batch_size=batch_size,
+            max_sleep_time=max_sleep_time,
+            stop_signal=stop_signal,
+            min_sleep_time=min_sleep_time,
+            jitter=jitter,
+            event_types=projection.event_filter.event_types,
+        )
+
+    def rebuild_projection(
+        self, projection: projections.Projection, batch_size: int = 10_000
+    ) -> int:
+        """Empties the projection's table and replays every event into it.
+
+        The table is emptied and the checkpoint moved back to the start in
+        one transaction, then events are applied `batch_size` at a time until
+        the projection has caught up. Returns how many events were applied.
+        A running `project` for the same projection carries on from wherever
+        this gets to.
+        """
+        event_filter = projection.event_filter
+        self.register_subscription(
+            projection.name, event_filter.aggregate_types, event_filter.event_types
+        )
+        with self._session_maker() as session, session.begin():
+            session.connection(execution_options={sqlalchemy.WRITE: True})
+            # moving the checkpoint first waits for any batch being applied
+            self._esp.update_event_subscription(session, projection.name, 0, 0)
+            projection.clear(session)
+        total = 0
+        while True:
+            result = self._handle_subscription_events(
+                subscription_name=projection.name,
+                aggregate_type=event_filter.aggregate_types,
                 batch_size=batch_size,
-                handler=handler,
+                handler=projection.apply,
+                event_types=event_filter.event_types,
+                batched=True,
             )
-            if processed == 0:
-                time.sleep(backoff.failure())
+            if not result.lock_acquired:
+                # a running `project` has the checkpoint for now
+                time.sleep(_REBUILD_RETRY_DELAY)
+                continue
+            total += result.processed
+            if not result.has_more:
+                return total
+
+    def _run_subscription(
+        self,
+        subscription_name: str,
+        aggregate_type: t.Union[str, t.Collection[str]],
+        handler: t.Union[common.EventHandler, common.BatchHandler],
+        batched: bool,
+        batch_size: t.Union[int, AdaptiveBatchSize],
+        max_sleep_time: float,
+        stop_signal: t.Optional[threading.Event],
+        min_sleep_time: float,
+        jitter: bool,
+        event_types: t.Optional[t.Collection[str]],
+    ) -> None:
+        event_filter = common.EventFilter.create(aggregate_type, event_types)
+        self.register_subscription(
+            subscription_name, event_filter.aggregate_types, event_filter.event_types
+        )
+        adaptive: t.Optional[AdaptiveBatchSize] = None
+        if isinstance(batch_size, AdaptiveBatchSize):
+            adaptive = batch_size
+        backoff = BackoffCalc(min_sleep_time, max_sleep_time, jitter=jitter)
+        wakeup = threading.Event()
+        # stopping wakes it up too, so waiting only needs to watch `wakeup`
+        unrelay = relay(stop_signal, wakeup) if stop_signal is not None else None
+        for type_ in event_filter.aggregate_types:
+            self._add_wakeup(type_, wakeup)
+        try:
+            while stop_signal is None or not stop_signal.is_set():
+                wakeup.clear()
+                size = (
+                    adaptive.size if adaptive is not None else t.cast(int, batch_size)
+                )
+                if self._hooks is not None:
+                    self._hooks.subscription_batch_size(subscription_name, size)
+                try:
+                    result = self._handle_subscription_events(
+                        subscription_name=subscription_name,
+                        aggregate_type=event_filter.aggregate_types,
+                        batch_size=size,
+                        handler=handler,
+                        max_tx_time=(
+                            adaptive.max_tx_time if adaptive is not None else None
+                        ),
+                        event_types=event_filter.event_types,
+                        batched=batched,
+                    )
+                except sqlalchemy.WriteTimeout:
+                    # SQLite's other writers kept it busy, so come back later
+                    backoff.wait(wakeup)
+                    continue
+                except Exception:
+                    # a smaller batch may get past a failing handler, or at
+                    # least redo less, so only give up at the smallest size
+                    if adaptive is not None and adaptive.failure() < size:
+                        continue
+                    raise
+                if adaptive is not None:
+                    adaptive.success(result.processed, result.elapsed, result.has_more)
+                if result.processed == 0:
+                    backoff.wait(wakeup)
+                else:
+                    backoff.success()
+        finally:
+            for type_ in event_filter.aggregate_types:
+                self._remove_wakeup(type_, wakeup)
+            if unrelay is not None:
+                unrelay()
+
+    def wake_subscriptions(self, aggregate_type: t.Optional[str] = None) -> None:
+        """Wakes up subscriptions in this process which are waiting for events.
+
+        This client does this itself after committing events, so this is only
+        needed to pass along news of events written elsewhere. If
+        `aggregate_type` is None every subscription is woken up.
+        """
+        if not self._wakeups:
+            return
+        with self._wakeups_lock:
+            if aggregate_type is None:
+                wakeups = [
+                    wakeup
+                    for type_wakeups in self._wakeups.values()
+                    for wakeup in type_wakeups
+                ]
             else:
-                backoff.success()
+                wakeups = [
+                    *self._wakeups.get(aggregate_type, ()),
+                    *self._wakeups.get(None, ()),
+                ]
+        for wakeup in wakeups:
+            wakeup.set()
+
+    def _add_wakeup(
+        self, aggregate_type: t.Optional[str], wakeup: threading.Event
+    ) -> None:
+        with self._wakeups_lock:
+            self._wakeups.setdefault(aggregate_type, set()).add(wakeup)
+
+    def _remove_wakeup(
+        self, aggregate_type: t.Optional[str], wakeup: threading.Event
+    ) -> None:
+        with self._wakeups_lock:
+            type_wakeups = self._wakeups.get(aggregate_type)
+            if type_wakeups is not None:
+                type_wakeups.discard(wakeup)
+                if not type_wakeups:
+                    del self._wakeups[aggregate_type]
+
+    def _wake_subscriptions_after_commit(
+        self, session: common.Session, aggregate_type: str
+    ) -> None:
+        """Wakes subscriptions once the caller commits their session."""
+        if aggregate_type not in self._wakeups and None not in self._wakeups:
+            return
+        pending: t.Set[str] = session.info.setdefault("meowmx_wake", set())
+        if not pending:
+
+            def after_commit(session: common.Session) -> None:
+                for aggregate_type in session.info.pop("meowmx_wake", ()):
+                    self.wake_subscriptions(aggregate_type)
+
+            sqlalchemy_event.listen(session, "after_commit", after_commit, once=True)
+        pending.add(aggregate_type)
@@ -1,20 +1,41 @@
+from .batch import EventBatch
 from .client import Client
+from .codecs import Codec, JsonCodec, MsgspecCodec, OrjsonCodec, default_codec
 from .types import (
     EventCompatible,
+    EventFilter,
+    BatchHandler,
     EventHandler,
+    EventPage,
+    Executor,
+    ImportEventRow,
     NewEvent,
     NewEventRow,
     RecordedEvent,
     SessionMaker,
     SubCheckpoint,
+    SubscriptionBatch,
+    SubscriptionInfo,
+    SubscriptionStatus,
+    core_connection,
 )
 from sqlalchemy import Engine
 from sqlalchemy.orm import Session, SessionTransaction
 
 __all__ = [
     "Client",
+    "Codec",
     "Engine",
+    "EventBatch",
+    "EventFilter",
+    "BatchHandler",
     "EventHandler",
+    "EventPage",
+    "Executor",
+    "ImportEventRow",
+    "JsonCodec",
+    "MsgspecCodec",
+    "OrjsonCodec",
     "EventCompatible",
     "EventBuffer",
     "NewEvent",
@@ -25,4 +46,9 @@ __all__ = [
     "SessionTransaction",
     "SessionTx",
     "SubCheckpoint",
+    "SubscriptionBatch",
+    "SubscriptionInfo",
+    "SubscriptionStatus",
+    "core_connection",
+    "default_codec",
 ]
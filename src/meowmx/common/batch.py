@@ -0,0 +1,177 @@
+import array
+import itertools
+import typing as t
+from collections import abc
+
+from . import codecs
+from .types import RecordedEvent
+
+
+class EventBatch(abc.Sequence):
+    """Events read in bulk, stored column by column.
+
+    Ids, transaction IDs and versions are kept in `array("q")`s and every JSON
+    payload in one UTF-8 buffer, which takes a fraction of the memory and time
+    of building a `RecordedEvent` per row. Indexing or iterating creates
+    `RecordedEvent`s on demand; `payload` and `json` read a single event's
+    data without creating one.
+    """
+
+    __slots__ = (
+        "ids",
+        "tx_ids",
+        "versions",
+        "aggregate_types",
+        "aggregate_ids",
+        "event_types",
+        "_payloads",
+        "_offsets",
+        "_strings",
+        "codec",
+    )
+
+    def __init__(self, codec: t.Optional[codecs.Codec] = None) -> None:
+        # decodes `data`; if None the fastest installed codec is used
+        self.codec = codec
+        self.ids = array.array("q")
+        self.tx_ids = array.array("q")
+        self.versions = array.array("q")
+        self.aggregate_types: t.List[str] = []
+        self.aggregate_ids: t.List[str] = []
+        self.event_types: t.List[str] = []
+        self._payloads = bytearray()
+        self._offsets = array.array("q", [0])
+        # aggregate and event types repeat a lot, so share one copy of each
+        self._strings: t.Dict[str, str] = {}
+
+    def append(
+        self,
+        aggregate_type: str,
+        aggregate_id: str,
+        id: int,
+        tx_id: int,
+        event_type: str,
+        json: t.Union[str, bytes],
+        version: int,
+    ) -> None:
+        strings = self._strings
+        self.aggregate_types.append(strings.setdefault(aggregate_type, aggregate_type))
+        self.event_types.append(strings.setdefault(event_type, event_type))
+        self.aggregate_ids.append(aggregate_id)
+        self.ids.append(id)
+        self.tx_ids.append(tx_id)
+        self.versions.append(version)
+        self._payloads += json.encode() if isinstance(json, str) else json
+        self._offsets.append(len(self._payloads))
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: t.Sequence[t.Sequence[t.Any]],
+        aggregate_type: int,
+        aggregate_id: int,
+        id: int,
+        tx_id: int,
+        event_type: int,
+        json: int,
+        version: int,
+        codec: t.Optional[codecs.Codec] = None,
+    ) -> "EventBatch":
+        """Builds a batch from database rows, given the index of each column.
+
+        This fills each column in one go, which is much faster than calling
+        `append` for every row.
+        """
+        batch = cls(codec)
+        strings = batch._strings
+        batch.aggregate_types = [
+            strings.setdefault(row[aggregate_type], row[aggregate_type]) for row in rows
+        ]
+        batch.event_types = [
+            strings.setdefault(row[event_type], row[event_type]) for row in rows
+        ]
+        batch.aggregate_ids = [row[aggregate_id] for row in rows]
+        batch.ids = array.array("q", [row[id] for row in rows])
+        batch.tx_ids = array.array("q", [int(row[tx_id]) for row in rows])
+        batch.versions = array.array("q", [row[version] for row in rows])
+        payloads = [
+            row[json].encode() if isinstance(row[json], str) else row[json]
+            for row in rows
+        ]
+        batch._payloads = bytearray(b"".join(payloads))
+        batch._offsets.extend(itertools.accumulate(len(p) for p in payloads))
+        return batch
+
+    @classmethod
+    def from_events(
+        cls,
+        events: t.Iterable[RecordedEvent],
+        codec: t.Optional[codecs.Codec] = None,
+    ) -> "EventBatch":
+        """Builds a batch from events, decoding them with `codec`, or if that's
+        None the codec of the first event."""
+        batch = cls(codec)
+        for event in events:
+            if batch.codec is None and len(batch) == 0:
+                batch.codec = event.codec
+            batch.append(
+                aggregate_type=event.aggregate_type,
+                aggregate_id=event.aggregate_id,
+                id=event.id,
+                tx_id=event.tx_id,
+                event_type=event.event_type,
+                json=event.json,
+                version=event.version,
+            )
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @t.overload
+    def __getitem__(self, index: int) -> RecordedEvent: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.List[RecordedEvent]: ...
+
+    def __getitem__(
+        self, index: t.Union[int, slice]
+    ) -> t.Union[RecordedEvent, t.List[RecordedEvent]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return RecordedEvent(
+            aggregate_type=self.aggregate_types[index],
+            aggregate_id=self.aggregate_ids[index],
+            id=self.ids[index],
+            tx_id=self.tx_ids[index],
+            event_type=self.event_types[index],
+            json=self.json(index),
+            version=self.versions[index],
+            codec=self.codec,
+        )
+
+    def payload(self, index: int) -> memoryview:
+        """The UTF-8 encoded JSON of an event, without copying it.
+
+        Nothing can be appended to the batch while the view is held.
+        """
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return memoryview(self._payloads)[start:end]
+
+    def json(self, index: int) -> str:
+        """The JSON of an event."""
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._payloads[start:end].decode()
+
+    def data(self, index: int) -> t.Any:
+        """The decoded data of an event."""
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return (self.codec or codecs.default_codec()).decode(self._payloads[start:end])
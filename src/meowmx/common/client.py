@@ -1,10 +1,14 @@
 import typing as t
 from sqlalchemy import Engine
+from .batch import EventBatch
 from .types import (
+    EventFilter,
+    Executor,
+    ImportEventRow,
     NewEventRow,
     RecordedEvent,
-    Session,
     SubCheckpoint,
+    SubscriptionInfo,
 )
 
 
@@ -15,50 +19,96 @@ class Client(t.Protocol):
 
     def append_event(
         self,
-        session: Session,
+        session: Executor,
         event: NewEventRow,
         assumed_aggregate_type: str,
     ) -> RecordedEvent: ...
 
     def create_aggregate_if_absent(
         self,
-        session: Session,
+        session: Executor,
         aggregate_type: str,
         aggregate_id: str,  # UUID string – SQLAlchemy will coerce to UUID if the column type is UUID
     ) -> None: ...
 
     def create_subscription_if_absent(
-        self, session: Session, subscription_name: str
+        self,
+        session: Executor,
+        subscription_name: str,
+        aggregate_type: t.Optional[str] = None,
+        event_filter: t.Optional[EventFilter] = None,
     ) -> None: ...
 
     def check_and_update_aggregate_version(
         self,
-        session: Session,
+        session: Executor,
         aggregate_id: str,
         expected_version: int,
         new_version: int,
     ) -> bool: ...
 
     def get_aggregate_version(
-        self, session: Session, aggregate_type: str, aggregate_id: str
+        self, session: Executor, aggregate_type: str, aggregate_id: str
     ) -> t.Optional[int]: ...
 
+    def count_events_after_checkpoint(
+        self,
+        session: Executor,
+        aggregate_types: t.Sequence[str],
+        last_processed_tx_id: int,
+        last_processed_event_id: int,
+        limit: int,
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Tuple[int, int]: ...
+
+    def has_caught_up(self, session: Executor, tx_id: int) -> bool: ...
+
     def read_checkpoint_and_lock_subscription(
-        self, session: Session, subscription_name: str
+        self, session: Executor, subscription_name: str
     ) -> t.Optional[SubCheckpoint]: ...
 
     def read_all_events(
         self,
-        session: Session,
+        session: Executor,
         from_tx_id: t.Optional[int],
         to_tx_id: t.Optional[int],
         limit: int,
         reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
     ) -> t.List[RecordedEvent]: ...
 
+    def read_all_events_batch(
+        self,
+        session: Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> EventBatch: ...
+
+    def export_events(
+        self,
+        session: Executor,
+        file: t.BinaryIO,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        aggregate_type: t.Optional[str],
+        format: str,
+    ) -> int: ...
+
+    def read_head_position(
+        self,
+        session: Executor,
+        aggregate_types: t.Sequence[str],
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Optional[SubCheckpoint]: ...
+
     def read_events_by_aggregate_id(
         self,
-        session: Session,
+        session: Executor,
         aggregate_id: str,
         limit: int,
         from_version: t.Optional[int],
@@ -68,15 +118,25 @@ class Client(t.Protocol):
 
     def read_events_after_checkpoint(
         self,
-        session: Session,
-        aggregate_type: str,
+        session: Executor,
+        aggregate_types: t.Sequence[str],
         last_processed_tx_id: int,
         last_processed_event_id: int,
+        limit: t.Optional[int] = None,
+        event_types: t.Optional[t.Sequence[str]] = None,
     ) -> t.List[RecordedEvent]: ...
 
+    def import_events(
+        self, session: Executor, events: t.Sequence[ImportEventRow]
+    ) -> None: ...
+
+    def read_subscriptions(
+        self, session: Executor, subscription_name: t.Optional[str]
+    ) -> t.List[SubscriptionInfo]: ...
+
     def update_event_subscription(
         self,
-        session: Session,
+        session: Executor,
         subscription_name: str,
         last_tx_id: int,
         last_event_id: int,
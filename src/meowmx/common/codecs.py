@@ -0,0 +1,73 @@
+import functools
+import json
+import typing as t
+
+
+class Codec(t.Protocol):
+    """Converts event data to and from JSON."""
+
+    def encode(self, data: t.Any) -> str: ...
+
+    def decode(self, json_data: t.Union[str, bytes, bytearray]) -> t.Any: ...
+
+
+class JsonCodec:
+    """Uses the standard library's `json` module."""
+
+    def encode(self, data: t.Any) -> str:
+        return json.dumps(data)
+
+    def decode(self, json_data: t.Union[str, bytes, bytearray]) -> t.Any:
+        return json.loads(json_data)
+
+
+class OrjsonCodec:
+    """Uses orjson, which is several times faster than `json`.
+
+    Requires the `orjson` package (`pip install meowmx[orjson]`).
+    """
+
+    def __init__(self) -> None:
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError("OrjsonCodec requires the orjson package") from e
+        self._orjson = orjson
+
+    def encode(self, data: t.Any) -> str:
+        return t.cast(str, self._orjson.dumps(data).decode())
+
+    def decode(self, json_data: t.Union[str, bytes, bytearray]) -> t.Any:
+        return self._orjson.loads(json_data)
+
+
+class MsgspecCodec:
+    """Uses msgspec's JSON encoder and decoder.
+
+    Requires the `msgspec` package (`pip install meowmx[msgspec]`).
+    """
+
+    def __init__(self) -> None:
+        try:
+            import msgspec  # type: ignore
+        except ImportError as e:
+            raise ImportError("MsgspecCodec requires the msgspec package") from e
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def encode(self, data: t.Any) -> str:
+        return t.cast(str, self._encoder.encode(data).decode())
+
+    def decode(self, json_data: t.Union[str, bytes, bytearray]) -> t.Any:
+        return self._decoder.decode(json_data)
+
+
+@functools.cache
+def default_codec() -> Codec:
+    """Returns the fastest codec whose library is installed."""
+    for codec_type in (OrjsonCodec, MsgspecCodec):
+        try:
+            return codec_type()
+        except ImportError:
+            pass
+    return JsonCodec()
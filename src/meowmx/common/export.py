@@ -0,0 +1,89 @@
+"""Writes exported events to files.
+
+Rows are tuples of (id, tx_id, aggregate_type, aggregate_id, version,
+event_type, json), with the JSON as text or UTF-8 bytes.
+
+Two formats are supported:
+
+* "ndjson": one JSON object per line, with the event's data under "data".
+* "binary": PostgreSQL's binary `COPY` format, which can be loaded with
+  `COPY ... FROM STDIN (FORMAT BINARY)` into a table with the columns
+  `(id BIGINT, tx_id BIGINT, aggregate_type TEXT, aggregate_id TEXT,
+  version INTEGER, event_type TEXT, json_data JSON)`.
+"""
+
+import json
+import struct
+import typing as t
+
+FORMATS = ("ndjson", "binary")
+
+# How many rows are fetched from the database at a time.
+ROWS_PER_FETCH = 10_000
+
+ExportRow = t.Tuple[int, int, str, str, int, str, t.Union[str, bytes]]
+
+BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+BINARY_TRAILER = struct.pack("!h", -1)
+
+# field count, id and tx_id, which every binary row starts with
+_BINARY_ROW_START = struct.Struct("!hiqiq")
+_INT4 = struct.Struct("!ii")
+_LENGTH = struct.Struct("!i")
+
+
+def check_format(format: str) -> None:
+    if format not in FORMATS:
+        raise ValueError(f"unknown export format {format!r}, expected one of {FORMATS}")
+
+
+def _utf8(value: t.Union[str, bytes]) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+def ndjson_line(row: ExportRow) -> bytes:
+    id, tx_id, aggregate_type, aggregate_id, version, event_type, json_data = row
+    head = json.dumps(
+        {
+            "id": id,
+            "tx_id": tx_id,
+            "aggregate_type": aggregate_type,
+            "aggregate_id": str(aggregate_id),
+            "version": version,
+            "event_type": event_type,
+        }
+    )
+    # the event JSON is spliced in as is rather than decoded and re-encoded
+    return b"".join((head[:-1].encode(), b', "data": ', _utf8(json_data), b"}\n"))
+
+
+def binary_row(row: ExportRow) -> bytes:
+    id, tx_id, aggregate_type, aggregate_id, version, event_type, json_data = row
+    parts = [_BINARY_ROW_START.pack(7, 8, id, 8, tx_id)]
+    for text in (aggregate_type, str(aggregate_id)):
+        encoded = text.encode()
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    parts.append(_INT4.pack(4, version))
+    for value in (event_type, json_data):
+        encoded = _utf8(value)
+        parts.append(_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def write_rows(file: t.BinaryIO, rows: t.Iterable[ExportRow], format: str) -> int:
+    """Writes the rows to `file` as they arrive and returns how many there were."""
+    check_format(format)
+    count = 0
+    if format == "ndjson":
+        for row in rows:
+            file.write(ndjson_line(row))
+            count += 1
+    else:
+        file.write(BINARY_HEADER)
+        for row in rows:
+            file.write(binary_row(row))
+            count += 1
+        file.write(BINARY_TRAILER)
+    return count
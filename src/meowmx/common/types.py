@@ -1,8 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import json
 import typing as t
 
+from sqlalchemy import Connection
 from sqlalchemy.orm import Session
 
+from . import codecs
+
 
 class EventCompatible(t.Protocol):
     """Used by any type which can be converted into event data."""
@@ -13,17 +17,75 @@ class EventCompatible(t.Protocol):
     def to_event_data(self) -> str: ...
 
 
-@dataclass
+# The event types use slots, as thousands of them can be created at once when
+# reading events in bulk.
+
+# Marks event data which hasn't been decoded from JSON yet.
+_NOT_DECODED: t.Any = object()
+
+
+@dataclass(slots=True, init=False, eq=False)
 class NewEvent:
+    """An event to be saved.
+
+    Pass either `json`, which is saved as is, or `data`, which the client
+    encodes with its codec when the event is saved.
+    """
+
     event_type: str
-    json: str
+    # None until `data` has been encoded
+    json: t.Optional[str]
+    _data: t.Any = field(default=_NOT_DECODED, init=False, repr=False, compare=False)
 
-    def to_event_data(self) -> str:
+    def __init__(
+        self,
+        event_type: str,
+        json: t.Optional[str] = None,
+        *,
+        data: t.Any = _NOT_DECODED,
+    ) -> None:
+        if (json is None) == (data is _NOT_DECODED):
+            raise ValueError("exactly one of json or data must be given")
+        self.event_type = event_type
+        self.json = json
+        self._data = data
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, NewEvent) or other.__class__ is not self.__class__:
+            return NotImplemented
+        if self.event_type != other.event_type:
+            return False
+        if self.json is not None and other.json is not None:
+            return self.json == other.json
+        return bool(self.data == other.data)
+
+    def _decode(self) -> t.Any:
+        assert self.json is not None
+        return codecs.default_codec().decode(self.json)
+
+    @property
+    def data(self) -> t.Any:
+        """The event data, decoded from the JSON the first time it's needed."""
+        if self._data is _NOT_DECODED:
+            self._data = self._decode()
+        return self._data
+
+    def encode_json(self, codec: codecs.Codec) -> str:
+        """Returns the JSON, encoding the data with `codec` if needed."""
+        if self.json is None:
+            self.json = codec.encode(self._data)
         return self.json
 
+    def to_event_data(self) -> str:
+        if self.json is not None:
+            return self.json
+        # not kept, so the client's codec is still used when it's saved
+        return codecs.default_codec().encode(self._data)
 
-@dataclass
+
+@dataclass(slots=True)
 class NewEventRow(NewEvent):
+    json: str
     aggregate_id: str
     version: int
 
@@ -31,22 +93,185 @@ class NewEventRow(NewEvent):
         return self.json
 
 
-@dataclass
+@dataclass(slots=True)
 class RecordedEvent(NewEventRow):
     aggregate_type: str
     id: int
     tx_id: int
+    # decodes `data`; if None the fastest installed codec is used
+    codec: t.Optional[codecs.Codec] = field(
+        default=None, kw_only=True, repr=False, compare=False
+    )
+
+    def _decode(self) -> t.Any:
+        return (self.codec or codecs.default_codec()).decode(self.json)
 
     def to_event_data(self) -> str:
         return self.json
 
 
+@dataclass(slots=True)
+class ImportEventRow:
+    """An event being bulk imported."""
+
+    aggregate_type: str
+    aggregate_id: str
+    # where the event goes among the aggregate's events in the same import
+    # call, starting at 0 for the first event after those already stored
+    position: int
+    event_type: str
+    json: str
+
+
 @dataclass
 class SubCheckpoint:
     last_tx_id: int
     last_event_id: int
 
 
+@dataclass
+class EventPage:
+    """A page of events read from the global log with `Client.load_all_events_page`."""
+
+    events: t.List[RecordedEvent]
+    # the position of the last event read, or the starting position if there
+    # were no events; pass it back in to read the next page
+    position: t.Optional[SubCheckpoint]
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """Which events a subscription reads.
+
+    Events of any of `aggregate_types` are read; if `event_types` is given,
+    only events of those types are. Use `create` to build one from a single
+    aggregate type or a collection of them.
+    """
+
+    aggregate_types: t.Tuple[str, ...]
+    event_types: t.Optional[t.Tuple[str, ...]] = None
+
+    @classmethod
+    def create(
+        cls,
+        aggregate_types: t.Union[str, t.Iterable[str]],
+        event_types: t.Optional[t.Iterable[str]] = None,
+    ) -> "EventFilter":
+        if isinstance(aggregate_types, str):
+            aggregate_types = (aggregate_types,)
+        types = tuple(sorted(set(aggregate_types)))
+        if len(types) == 0:
+            raise ValueError("at least one aggregate type is needed")
+        if event_types is None:
+            return cls(types)
+        if isinstance(event_types, str):
+            event_types = (event_types,)
+        event_type_tuple = tuple(sorted(set(event_types)))
+        if len(event_type_tuple) == 0:
+            raise ValueError("event_types can't be empty; pass None to read them all")
+        return cls(types, event_type_tuple)
+
+    @property
+    def aggregate_type(self) -> t.Optional[str]:
+        """The aggregate type if there's only one, otherwise None."""
+        return self.aggregate_types[0] if len(self.aggregate_types) == 1 else None
+
+    @property
+    def is_simple(self) -> bool:
+        """True if this reads every event of a single aggregate type."""
+        return len(self.aggregate_types) == 1 and self.event_types is None
+
+    def describe(self) -> str:
+        """The aggregate types as one string, for labels and logs."""
+        return ",".join(self.aggregate_types)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"aggregate_types": self.aggregate_types, "event_types": self.event_types}
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "EventFilter":
+        data = json.loads(text)
+        return cls.create(data["aggregate_types"], data.get("event_types"))
+
+
+@dataclass
+class SubscriptionInfo:
+    """A row from the subscriptions table."""
+
+    subscription_name: str
+    aggregate_type: t.Optional[str]
+    last_tx_id: int
+    last_event_id: int
+    # set if the subscription reads several aggregate types or only some
+    # event types
+    event_filter: t.Optional[EventFilter] = None
+
+
+@dataclass
+class SubscriptionBatch:
+    """Describes one pass a subscription made over its events."""
+
+    subscription_name: str
+    # the aggregate types read, joined with commas if there are several
+    aggregate_type: str
+    batch_size: int
+    # False if another worker held the subscription's lock
+    lock_acquired: bool
+    processed: int
+    # True if there were still events waiting after this batch
+    has_more: bool
+    # wall clock time (as from `time.time()`) the batch started
+    started_at: float
+    # seconds spent locking the checkpoint and reading events
+    read_time: float
+    # seconds spent in handlers and updating the checkpoint
+    handler_time: float
+    # seconds the transaction was open, including the commit
+    elapsed: float
+    last_tx_id: t.Optional[int]
+    last_event_id: t.Optional[int]
+
+
+@dataclass
+class SubscriptionStatus:
+    """How far along a subscription is compared to the events written."""
+
+    subscription_name: str
+    # the aggregate types read, joined with commas if there are several
+    aggregate_type: t.Optional[str]
+    last_tx_id: int
+    last_event_id: int
+    # position of the newest event of the aggregate type, if there is one
+    head_tx_id: t.Optional[int]
+    head_event_id: t.Optional[int]
+    # events and transactions not yet handled; None if the aggregate type
+    # isn't known
+    lag_events: t.Optional[int]
+    lag_transactions: t.Optional[int]
+    # True if there were too many events to count and lag is a lower bound
+    lag_capped: bool
+    # events handled per second recently by subscriptions in this process,
+    # or None if none have run here
+    events_per_second: t.Optional[float]
+    # the events the subscription reads, if known
+    event_filter: t.Optional[EventFilter] = None
+
+
 SessionMaker = t.Callable[[], Session]
 
+# What the backends run statements on: an ORM session, or a Core connection,
+# which skips the session's identity map and unit of work.
+Executor = t.Union[Session, Connection]
+
+
+def core_connection(session: Executor) -> Connection:
+    """Returns the Core connection a session or connection runs on."""
+    if isinstance(session, Connection):
+        return session
+    return session.connection()
+
+
 EventHandler = t.Callable[[Session, RecordedEvent], None]
+BatchHandler = t.Callable[[Session, t.List[RecordedEvent]], None]
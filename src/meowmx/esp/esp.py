@@ -1,13 +1,25 @@
-import textwrap
 import typing as t
-from sqlalchemy import Engine, text, bindparam, Integer, Text, String
+from sqlalchemy import Engine, text
 from . import migrations
+from . import raw
+from . import statements
 from .. import common
+from ..common import export
+
+
+def _event_filter_args(
+    aggregate_types: t.Sequence[str], event_types: t.Optional[t.Sequence[str]]
+) -> t.Dict[str, t.Any]:
+    """Returns the arguments for statements built with `filter_event_types`."""
+    args: t.Dict[str, t.Any] = {"aggregate_types": list(aggregate_types)}
+    if event_types is not None:
+        args["event_types"] = list(event_types)
+    return args
 
 
 class Esp:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, codec: t.Optional[common.Codec] = None) -> None:
+        self._codec = codec
 
     def setup_tables(
         self, engine: Engine, alternate_aggregate_id_type: t.Optional[str] = None
@@ -24,7 +36,7 @@ class Esp:
 
     def append_event(
         self,
-        session: common.Session,
+        session: common.Executor,
         event: common.NewEventRow,
         assumed_aggregate_type: str,
     ) -> common.RecordedEvent:
@@ -32,13 +44,8 @@ class Esp:
 
         The aggregate type is assumed to be known by the caller.
         """
-        query = textwrap.dedent("""
-        INSERT INTO es_events (transaction_id, aggregate_id, version, event_type, json_data)
-            VALUES(pg_current_xact_id(), :aggregate_id, :version, :event_type, CAST(:json_data AS JSON))
-            RETURNING id, transaction_id, event_type, json_data
-        """)
         row = session.execute(
-            text(query),
+            statements.APPEND_EVENT,
             {
                 "aggregate_id": event.aggregate_id,
                 "version": event.version,
@@ -56,62 +63,46 @@ class Esp:
             json=event.json,
             tx_id=int(row[1]),
             version=event.version,
+            codec=self._codec,
         )
 
     def create_aggregate_if_absent(
-        self, session: common.Session, aggregate_type: str, aggregate_id: str
+        self, session: common.Executor, aggregate_type: str, aggregate_id: str
     ) -> None:
         """Inserts the aggregate type into the table"""
-        query = textwrap.dedent("""
-            INSERT INTO es_aggregates (id, version, aggregate_type)
-                VALUES (:aggregate_id, -1, :aggregate_type)
-                ON CONFLICT DO NOTHING
-            """)
         session.execute(
-            text(query),
+            statements.CREATE_AGGREGATE_IF_ABSENT,
             {"aggregate_id": aggregate_id, "aggregate_type": aggregate_type},
         )
 
     def create_subscription_if_absent(
-        self, session: common.Session, subscription_name: str
+        self,
+        session: common.Executor,
+        subscription_name: str,
+        aggregate_type: t.Optional[str] = None,
+        event_filter: t.Optional[common.EventFilter] = None,
     ) -> None:
-        query = textwrap.dedent(
-            """
-                INSERT INTO es_event_subscriptions (
-                    subscription_name,
-                    last_transaction_id,
-                    last_event_id
-                )
-                VALUES (
-                    :subscription_name,
-                    '0'::xid8,
-                    0
-                )
-                ON CONFLICT DO NOTHING
-                """
-        )
+        """Inserts the subscription, or updates what it reads if that's given."""
         session.execute(
-            text(query),
-            {"subscription_name": subscription_name},
+            statements.CREATE_SUBSCRIPTION_IF_ABSENT,
+            {
+                "subscription_name": subscription_name,
+                "aggregate_type": aggregate_type,
+                "event_filter": (
+                    event_filter.to_json() if event_filter is not None else None
+                ),
+            },
         )
 
     def check_and_update_aggregate_version(
         self,
-        session: common.Session,
+        session: common.Executor,
         aggregate_id: str,
         expected_version: int,
         new_version: int,
     ) -> bool:
-        query = textwrap.dedent(
-            """
-                UPDATE es_aggregates
-                SET version = :new_version
-                WHERE ID = :aggregate_id
-                AND version = :expected_version
-                """
-        )
         result = session.execute(
-            text(query),
+            statements.CHECK_AND_UPDATE_AGGREGATE_VERSION,
             {
                 "new_version": new_version,
                 "aggregate_id": aggregate_id,
@@ -121,35 +112,55 @@ class Esp:
         return result.rowcount == 1  # type: ignore
 
     def get_aggregate_version(
-        self, session: common.Session, aggregate_type: str, aggregate_id: str
+        self, session: common.Executor, aggregate_type: str, aggregate_id: str
     ) -> t.Optional[int]:
         """Inserts the aggregate type into the table"""
-        query = textwrap.dedent("""
-            SELECT version
-                FROM   es_aggregates
-                WHERE  id = :aggregate_id            
-            """)
         return session.execute(
-            text(query),
+            statements.GET_AGGREGATE_VERSION,
             {"aggregate_id": aggregate_id, "aggregate_type": aggregate_type},
         ).scalar_one_or_none()
 
+    def count_events_after_checkpoint(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        last_processed_tx_id: int,
+        last_processed_event_id: int,
+        limit: int,
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Tuple[int, int]:
+        """Counts events and transactions after the checkpoint, up to `limit`."""
+        row = session.execute(
+            statements.count_events_after_checkpoint(event_types is not None),
+            {
+                **_event_filter_args(aggregate_types, event_types),
+                "last_processed_tx_id": str(last_processed_tx_id),
+                "last_processed_event_id": last_processed_event_id,
+                "limit": limit,
+            },
+        ).one()
+        return int(row[0]), int(row[1])
+
+    def has_caught_up(self, session: common.Executor, tx_id: int) -> bool:
+        """True if every event written by transactions up to and including
+        `tx_id` can be read.
+
+        Meant for replicas, which are caught up once the transaction is
+        older than any still in progress in their snapshot. Transactions
+        still running from before `tx_id` make this False even on the
+        primary.
+        """
+        return bool(
+            session.execute(
+                statements.HAS_CAUGHT_UP, {"tx_id": str(tx_id)}
+            ).scalar_one()
+        )
+
     def read_checkpoint_and_lock_subscription(
         self, session: t.Any, subscription_name: str
     ) -> t.Optional[common.SubCheckpoint]:
-        query = textwrap.dedent(
-            """
-            SELECT
-                last_transaction_id::text AS last_transaction_id,
-                last_event_id AS last_event_id
-            FROM es_event_subscriptions
-            WHERE subscription_name = :subscription_name
-            FOR UPDATE SKIP LOCKED
-            """
-        )
-
         result = session.execute(
-            text(query),
+            statements.READ_CHECKPOINT_AND_LOCK_SUBSCRIPTION,
             {"subscription_name": subscription_name},
         )
         row = result.fetchone()  # None if the row is locked or absent
@@ -161,58 +172,79 @@ class Esp:
             last_event_id=row[1],
         )
 
-    def read_all_events(
+    def _all_events_args(
         self,
-        session: common.Session,
         from_tx_id: t.Optional[int],
         to_tx_id: t.Optional[int],
         limit: int,
-        reverse: bool = False,
-    ) -> t.List[common.RecordedEvent]:
-        """Reads all the events from the table via the transaction ID."""
+        after_event_id: t.Optional[int],
+    ) -> t.Dict[str, t.Any]:
         if to_tx_id is None and limit is None:
             raise ValueError(
                 "Neither to_tx_id or limit are set. Too many rows would be returned."
             )
-        order = "DESC" if reverse else "ASC"
-        query = textwrap.dedent(f"""
-                SELECT
-                    a.aggregate_type,
-                    e.id,
-                    e.transaction_id::text AS tx_id,
-                    e.aggregate_id,                    
-                    e.event_type,
-                    e.json_data::text as json_data,
-                    e.version
-                FROM es_events e
-                JOIN es_aggregates a ON a.ID = e.aggregate_id
-                WHERE (:from_tx_id IS NULL OR e.transaction_id > CAST(:from_tx_id AS xid8))
-                AND (:to_tx_id IS NULL OR e.transaction_id <= CAST(:to_tx_id AS xid8))
-                ORDER BY transaction_id {order}
-                LIMIT :limit
-                """)
-
-        stmt = text(query).bindparams(
-            bindparam("from_tx_id", type_=String),
-            bindparam("to_tx_id", type_=String),
-            bindparam("limit", type_=Integer),
+        args: t.Dict[str, t.Any] = {"limit": limit}
+        if from_tx_id is not None:
+            args["from_tx_id"] = str(from_tx_id)
+            if after_event_id is not None:
+                args["after_event_id"] = after_event_id
+        if to_tx_id is not None:
+            args["to_tx_id"] = str(to_tx_id)
+        return args
+
+    def _select_all_events(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> t.Sequence[t.Any]:
+        args = self._all_events_args(from_tx_id, to_tx_id, limit, after_event_id)
+        stmt = statements.read_all_events(
+            from_tx_id is not None,
+            to_tx_id is not None,
+            after_event_id is not None,
+            committed_only,
+            reverse,
         )
+        result = session.execute(stmt, args)
+        return result.fetchall()
 
-        args = {
-            "from_tx_id": from_tx_id,
-            "to_tx_id": to_tx_id,
-            "limit": limit,
-        }
-        result = session.execute(
-            stmt,
-            args,
+    def read_all_events(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> t.List[common.RecordedEvent]:
+        """Reads all the events from the table via the transaction ID.
+
+        If `after_event_id` is given, reading starts after that event of
+        `from_tx_id` instead of after the whole transaction. If
+        `committed_only` is True no events are read from transactions newer
+        than the oldest one still in progress, as those could be followed
+        by events from it once it commits.
+        """
+        rows = self._select_all_events(
+            session,
+            from_tx_id,
+            to_tx_id,
+            limit,
+            reverse,
+            after_event_id,
+            committed_only,
         )
-        rows = result.fetchall()
         events: t.List[common.RecordedEvent] = []
         for row in rows:
             # Row order matches the SELECT list above:
-            #   0 → id, 1 → tx_id (as string), 2 → event_type,
-            #   3 → json data, 4 → version
+            #   0 → aggregate_type, 1 → id, 2 → tx_id (as string),
+            #   3 → aggregate_id, 4 → event_type, 5 → json data, 6 → version
             events.append(
                 common.RecordedEvent(
                     aggregate_type=row[0],
@@ -222,48 +254,131 @@ class Esp:
                     event_type=row[4],
                     json=row[5],
                     version=row[6],
+                    codec=self._codec,
                 )
             )
 
         return events
 
+    def read_all_events_batch(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> common.EventBatch:
+        """Like `read_all_events`, but stores the events column by column.
+
+        With psycopg the JSON is read as raw bytes and copied straight into
+        the batch, skipping the conversion to text and back.
+        """
+        args = self._all_events_args(from_tx_id, to_tx_id, limit, after_event_id)
+        query = statements.read_all_events_raw(
+            from_tx_id is not None,
+            to_tx_id is not None,
+            after_event_id is not None,
+            committed_only,
+            reverse,
+        )
+        rows: t.Optional[t.Sequence[t.Any]] = raw.fetch_all(session, query, args)
+        if rows is None:
+            rows = self._select_all_events(
+                session,
+                from_tx_id,
+                to_tx_id,
+                limit,
+                reverse,
+                after_event_id,
+                committed_only,
+            )
+        return common.EventBatch.from_rows(
+            rows,
+            aggregate_type=0,
+            aggregate_id=3,
+            id=1,
+            tx_id=2,
+            event_type=4,
+            json=5,
+            version=6,
+            codec=self._codec,
+        )
+
+    def export_events(
+        self,
+        session: common.Executor,
+        file: t.BinaryIO,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        aggregate_type: t.Optional[str],
+        format: str,
+    ) -> int:
+        """Streams events to `file`, oldest first.
+
+        With psycopg this uses `COPY ... TO STDOUT (FORMAT BINARY)`, which in
+        the binary format is written to the file as is. Otherwise the rows
+        are read through a server side cursor.
+        """
+        export.check_format(format)
+        args = {
+            "from_tx_id": None if from_tx_id is None else str(from_tx_id),
+            "to_tx_id": None if to_tx_id is None else str(to_tx_id),
+            "aggregate_type": aggregate_type,
+        }
+        copy = statements.EXPORT_EVENTS_COPY
+        if format == "binary":
+            count = raw.copy_to_file(session, copy, args, file)
+            if count is not None:
+                return count
+        else:
+            rows = raw.copy_rows_out(
+                session,
+                copy,
+                args,
+                ["int8", "int8", "text", "text", "int4", "text", "json"],
+            )
+            if rows is not None:
+                return export.write_rows(
+                    file, (t.cast(export.ExportRow, row) for row in rows), format
+                )
+
+        result = session.execute(
+            statements.EXPORT_EVENTS,
+            args,
+            execution_options={"yield_per": export.ROWS_PER_FETCH},
+        )
+        return export.write_rows(
+            file, (t.cast(export.ExportRow, tuple(row)) for row in result), format
+        )
+
+    def read_head_position(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Optional[common.SubCheckpoint]:
+        """Finds the position of the newest event of the aggregate types."""
+        row = session.execute(
+            statements.read_head_position(event_types is not None),
+            _event_filter_args(aggregate_types, event_types),
+        ).fetchone()
+        if row is None:
+            return None
+        return common.SubCheckpoint(last_tx_id=int(row[0]), last_event_id=row[1])
+
     def read_events_by_aggregate_id(
         self,
-        session: common.Session,
+        session: common.Executor,
         aggregate_id: str,
         limit: int,
         from_version: t.Optional[int],
         to_version: t.Optional[int],
         reverse: bool = False,
     ) -> t.List[common.RecordedEvent]:
-        order = "DESC" if reverse else "ASC"
-        query = textwrap.dedent(
-            f"""
-                SELECT
-                    a.aggregate_type,
-                    e.id,
-                    e.transaction_id::text AS tx_id,
-                    e.event_type,
-                    e.json_data::text as json_data,
-                    e.version
-                FROM es_events e
-                JOIN es_aggregates a ON a.ID = e.aggregate_id
-                WHERE aggregate_id = :aggregate_id
-                AND (:from_version IS NULL OR e.version >= :from_version)
-                AND (:to_version IS NULL OR e.version < :to_version)
-                ORDER BY e.version {order}
-                LIMIT :limit
-                """
-        )
-        stmt = text(query).bindparams(
-            bindparam("aggregate_id"),
-            bindparam("from_version", type_=Integer),
-            bindparam("to_version", type_=Integer),
-            bindparam("limit", type_=Integer),
-        )
-
         result = session.execute(
-            stmt,
+            statements.READ_EVENTS_BY_AGGREGATE_ID[reverse],
             {
                 "aggregate_id": aggregate_id,
                 "from_version": from_version,
@@ -274,9 +389,10 @@ class Esp:
         rows = result.fetchall()
         events: t.List[common.RecordedEvent] = []
         for row in rows:
-            # Row order matches the SELECT list above:
-            #   0 → id, 1 → tx_id (as string), 2 → event_type,
-            #   3 → json data, 4 → version
+            # Row order matches the SELECT list of
+            # statements.READ_EVENTS_BY_AGGREGATE_ID:
+            #   0 → aggregate_type, 1 → id, 2 → tx_id (as string),
+            #   3 → event_type, 4 → json data, 5 → version
             events.append(
                 common.RecordedEvent(
                     aggregate_type=row[0],
@@ -286,6 +402,7 @@ class Esp:
                     event_type=row[3],
                     json=row[4],
                     version=row[5],
+                    codec=self._codec,
                 )
             )
 
@@ -294,34 +411,19 @@ class Esp:
     def read_events_after_checkpoint(
         self,
         session: t.Any,
-        aggregate_type: str,
+        aggregate_types: t.Sequence[str],
         last_processed_tx_id: int,
         last_processed_event_id: int,
+        limit: t.Optional[int] = None,
+        event_types: t.Optional[t.Sequence[str]] = None,
     ) -> t.List[common.RecordedEvent]:
-        query = textwrap.dedent(
-            """
-                SELECT
-                    e.id,
-                    e.transaction_id::text AS tx_id,
-                    e.event_type,
-                    e.json_data::text as json_data,
-                    e.version,
-                    e.aggregate_id
-                FROM es_events e
-                JOIN es_aggregates a ON a.ID = e.aggregate_id
-                WHERE a.aggregate_type = :aggregate_type
-                AND (e.transaction_id, e.ID) >
-                        (CAST(:last_processed_tx_id AS xid8), :last_processed_event_id)
-                AND e.transaction_id < pg_snapshot_xmin(pg_current_snapshot())
-                ORDER BY e.transaction_id ASC, e.ID ASC
-                """
-        )
         result = session.execute(
-            text(query),
+            statements.read_events_after_checkpoint(event_types is not None),
             {
-                "aggregate_type": aggregate_type,
+                **_event_filter_args(aggregate_types, event_types),
                 "last_processed_tx_id": last_processed_tx_id,
                 "last_processed_event_id": last_processed_event_id,
+                "limit": limit,
             },
         )
         rows = result.fetchall()
@@ -329,18 +431,89 @@ class Esp:
         for row in rows:
             events.append(
                 common.RecordedEvent(
-                    aggregate_type=aggregate_type,
+                    aggregate_type=row[6],
                     aggregate_id=str(row[5]),
                     id=row[0],
                     tx_id=int(row[1]),
                     event_type=row[2],
                     json=row[3],
                     version=row[4],
+                    codec=self._codec,
                 )
             )
 
         return events
 
+    def import_events(
+        self, session: common.Executor, events: t.Sequence[common.ImportEventRow]
+    ) -> None:
+        """Appends many events at once. Does not commit the session.
+
+        The events are copied into a temporary table, then moved into
+        `es_aggregates` and `es_events` with a handful of set-based
+        statements. The aggregates are locked first, so the events are
+        appended after whatever they have when the lock is taken. Raises
+        ValueError if an aggregate exists with a different type.
+        """
+        session.execute(statements.CREATE_IMPORT_TABLE)
+        rows = (
+            (e.aggregate_type, e.aggregate_id, e.position, e.event_type, e.json)
+            for e in events
+        )
+        if not raw.copy_rows(
+            session, statements.IMPORT_COPY, statements.IMPORT_COPY_TYPES, rows
+        ):
+            session.execute(
+                statements.INSERT_IMPORT_ROW,
+                [
+                    {
+                        "aggregate_type": e.aggregate_type,
+                        "aggregate_id": e.aggregate_id,
+                        "position": e.position,
+                        "event_type": e.event_type,
+                        "json_data": e.json,
+                    }
+                    for e in events
+                ],
+            )
+
+        id_type = session.execute(statements.AGGREGATE_ID_TYPE).scalar_one()
+        session.execute(statements.create_imported_aggregates(id_type))
+        session.execute(statements.lock_imported_aggregates(id_type))
+        mismatch = session.execute(
+            statements.find_import_type_mismatch(id_type)
+        ).fetchone()
+        if mismatch is not None:
+            raise ValueError(
+                f"can't import {mismatch[1]} events to {mismatch[0]}, which is a {mismatch[2]}"
+            )
+        session.execute(statements.insert_imported_events(id_type))
+        session.execute(statements.update_imported_versions(id_type))
+        session.execute(statements.TRUNCATE_IMPORT)
+
+    def read_subscriptions(
+        self, session: common.Executor, subscription_name: t.Optional[str]
+    ) -> t.List[common.SubscriptionInfo]:
+        """Reads subscriptions without locking them.
+
+        If `subscription_name` is None every subscription is returned.
+        """
+        rows = session.execute(
+            statements.READ_SUBSCRIPTIONS, {"subscription_name": subscription_name}
+        ).fetchall()
+        return [
+            common.SubscriptionInfo(
+                subscription_name=row[0],
+                aggregate_type=row[1],
+                last_tx_id=int(row[2]),
+                last_event_id=row[3],
+                event_filter=(
+                    common.EventFilter.from_json(row[4]) if row[4] is not None else None
+                ),
+            )
+            for row in rows
+        ]
+
     def update_event_subscription(
         self,
         session: t.Any,
@@ -349,21 +522,8 @@ class Esp:
         last_event_id: int,
     ) -> bool:
         """Updates the subscription. Does not commit the session."""
-        query = textwrap.dedent(
-            """
-            UPDATE es_event_subscriptions
-            SET last_transaction_id = CAST(:last_tx_id AS xid8),
-                last_event_id       = :last_event_id
-            WHERE subscription_name = :subscription_name
-            """
-        )
-        stmt = text(query).bindparams(
-            bindparam("subscription_name"),
-            bindparam("last_tx_id", type_=Text),
-            bindparam("last_event_id", type_=Integer),
-        )
         result = session.execute(
-            stmt,
+            statements.UPDATE_EVENT_SUBSCRIPTION,
             {
                 "subscription_name": subscription_name,
                 "last_tx_id": last_tx_id,
@@ -0,0 +1,77 @@
+import threading
+import typing as t
+
+from .. import common
+
+# The channel the `channel_event_notify_trg` trigger sends to. The payload is
+# the aggregate type of the new event.
+CHANNEL = "channel_event_notify"
+
+
+class NotificationListener:
+    """Passes along the notifications Postgres sends when events are written.
+
+    The trigger on `es_events` notifies `CHANNEL` with the aggregate type of
+    every event once its transaction commits, whichever process wrote it.
+    This holds a connection open on a background thread, `LISTEN`s to the
+    channel and calls `on_notify` with each aggregate type. Requires psycopg.
+    """
+
+    def __init__(
+        self,
+        engine: common.Engine,
+        on_notify: t.Callable[[str], None],
+        poll_interval: float = 1.0,
+    ) -> None:
+        self._engine = engine
+        self._on_notify = on_notify
+        # how often the thread checks if it's been told to stop
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._listening = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def __enter__(self) -> "NotificationListener":
+        self.start()
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Starts listening, returning once `LISTEN` has run."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._listening.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="meowmx-notification-listener", daemon=True
+        )
+        self._thread.start()
+        self._listening.wait()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        connection = self._engine.raw_connection()
+        try:
+            driver_connection = t.cast(t.Any, connection.driver_connection)
+            driver_connection.autocommit = True
+            driver_connection.execute(f"LISTEN {CHANNEL}")
+            self._listening.set()
+            while not self._stop.is_set():
+                for notify in driver_connection.notifies(timeout=self._poll_interval):
+                    self._on_notify(notify.payload)
+                    if self._stop.is_set():
+                        break
+        finally:
+            self._listening.set()
+            # the connection is still listening, so don't hand it back to the
+            # pool
+            connection.invalidate()
+            connection.close()
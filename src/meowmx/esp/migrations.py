@@ -34,9 +34,16 @@ CREATE INDEX IF NOT EXISTS idx_es_aggregate_snapshot_version ON es_aggregate_sna
 CREATE TABLE IF NOT EXISTS es_event_subscriptions (
   subscription_name    TEXT    PRIMARY KEY,
   last_transaction_id  XID8    NOT NULL,
-  last_event_id        BIGINT  NOT NULL
+  last_event_id        BIGINT  NOT NULL,
+  aggregate_type       TEXT,
+  -- JSON set when the subscription reads several aggregate types or only
+  -- some event types
+  event_filter         TEXT
 );
 
+ALTER TABLE es_event_subscriptions ADD COLUMN IF NOT EXISTS aggregate_type TEXT;
+ALTER TABLE es_event_subscriptions ADD COLUMN IF NOT EXISTS event_filter TEXT;
+
 
 CREATE OR REPLACE FUNCTION channel_event_notify_fct()
 RETURNS TRIGGER AS
@@ -0,0 +1,156 @@
+"""Talks to psycopg directly where SQLAlchemy would get in the way.
+
+Going through SQLAlchemy with `json_data::text` makes Postgres convert the
+JSON to text and psycopg decode it into a `str`, which is wasted work for
+callers who only want to pass the bytes on. `fetch_all` runs queries on the
+session's own psycopg connection with the binary protocol and a loader that
+hands back JSON columns exactly as they came off the wire. `copy_rows` uses
+the same connection for binary `COPY`, the fastest way to load many rows.
+`prepare_marked_statements` has psycopg prepare the statements run most
+often on the server.
+"""
+
+import functools
+import typing as t
+
+from sqlalchemy import event as sqlalchemy_event
+
+from .. import common
+from . import statements
+
+
+@functools.cache
+def _json_bytes_loader() -> t.Optional[t.Type[t.Any]]:
+    try:
+        from psycopg import adapt, pq
+    except ImportError:
+        return None
+
+    class JsonBytesLoader(adapt.Loader):
+        format = pq.Format.BINARY
+
+        def load(self, data: t.Any) -> bytes:
+            return bytes(data)
+
+    return JsonBytesLoader
+
+
+def _psycopg_connection(session: common.Executor) -> t.Optional[t.Any]:
+    connection = common.core_connection(session)
+    if connection.dialect.driver != "psycopg":
+        return None
+    return connection.connection.driver_connection
+
+
+def fetch_all(
+    session: common.Executor, query: str, params: t.Dict[str, t.Any]
+) -> t.Optional[t.List[t.Tuple[t.Any, ...]]]:
+    """Runs `query`, which uses psycopg's `%(name)s` placeholders.
+
+    Returns None if the session isn't using psycopg, in which case the caller
+    should fall back to SQLAlchemy.
+    """
+    driver_connection = _psycopg_connection(session)
+    loader = _json_bytes_loader()
+    if driver_connection is None or loader is None:
+        return None
+    with driver_connection.cursor(binary=True) as cursor:
+        cursor.adapters.register_loader("json", loader)
+        cursor.execute(query, params)
+        return t.cast(t.List[t.Tuple[t.Any, ...]], cursor.fetchall())
+
+
+def copy_rows(
+    session: common.Executor,
+    statement: str,
+    types: t.Sequence[str],
+    rows: t.Iterable[t.Sequence[t.Any]],
+) -> bool:
+    """Writes `rows` with `statement`, a `COPY ... FROM STDIN (FORMAT BINARY)`.
+
+    `types` names the Postgres type of each column. Returns False, without
+    writing anything, if the session isn't using psycopg.
+    """
+    driver_connection = _psycopg_connection(session)
+    if driver_connection is None:
+        return False
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(statement) as copy:
+            copy.set_types(types)
+            for row in rows:
+                copy.write_row(row)
+    return True
+
+
+def copy_to_file(
+    session: common.Executor,
+    statement: str,
+    params: t.Dict[str, t.Any],
+    file: t.BinaryIO,
+) -> t.Optional[int]:
+    """Writes the output of `statement`, a `COPY ... TO STDOUT`, to `file`.
+
+    The data is passed along in chunks as the server sends it. Returns the
+    number of rows copied, or None if the session isn't using psycopg.
+    """
+    driver_connection = _psycopg_connection(session)
+    if driver_connection is None:
+        return None
+    with driver_connection.cursor() as cursor:
+        with cursor.copy(statement, params) as copy:
+            for data in copy:
+                file.write(data)
+        return t.cast(int, cursor.rowcount)
+
+
+def copy_rows_out(
+    session: common.Executor,
+    statement: str,
+    params: t.Dict[str, t.Any],
+    types: t.Sequence[str],
+) -> t.Optional[t.Iterator[t.Tuple[t.Any, ...]]]:
+    """Iterates the rows of `statement`, a `COPY ... TO STDOUT (FORMAT BINARY)`.
+
+    JSON columns come back as bytes. Returns None if the session isn't using
+    psycopg. The iterator must be exhausted before the session is used again.
+    """
+    driver_connection = _psycopg_connection(session)
+    loader = _json_bytes_loader()
+    if driver_connection is None or loader is None:
+        return None
+
+    def rows() -> t.Iterator[t.Tuple[t.Any, ...]]:
+        with driver_connection.cursor() as cursor:
+            cursor.adapters.register_loader("json", loader)
+            with cursor.copy(statement, params) as copy:
+                copy.set_types(types)
+                yield from copy.rows()
+
+    return rows()
+
+
+def _execute_prepared(
+    cursor: t.Any, statement: str, parameters: t.Any, context: t.Any
+) -> bool:
+    if not context.execution_options.get(statements.PREPARE):
+        return False
+    # a threshold of None means the user has turned prepared statements off,
+    # for instance to work with pgbouncer
+    if cursor.connection.prepare_threshold is None:
+        return False
+    cursor.execute(statement, parameters, prepare=True)
+    return True
+
+
+def prepare_marked_statements(engine: common.Engine) -> None:
+    """Prepares statements marked with `statements.PREPARE` on first use.
+
+    psycopg already prepares queries after a connection has run them a few
+    times (see its `prepare_threshold`); this skips the unprepared runs for
+    the statements used by every save and subscription poll. Does nothing
+    unless the engine uses psycopg.
+    """
+    if engine.dialect.driver != "psycopg":
+        return
+    if not sqlalchemy_event.contains(engine, "do_execute", _execute_prepared):
+        sqlalchemy_event.listen(engine, "do_execute", _execute_prepared)
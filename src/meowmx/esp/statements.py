@@ -0,0 +1,531 @@
+"""The SQL run by `Esp`, built once and reused.
+
+Building a `text()` clause means dedenting the SQL and parsing its bind
+parameters, and SQLAlchemy then has to work out a cache key for it on every
+execution; in tight write loops that shows up next to the network time.
+Statements which don't change are module constants, and those whose SQL
+depends on the arguments are built by functions cached on each variant.
+
+Statements marked with `PREPARE` are the ones run most often. With psycopg
+they're prepared on the server the first time a connection runs them; see
+`raw.prepare_marked_statements`.
+"""
+
+import functools
+import textwrap
+import typing as t
+
+from sqlalchemy import Integer, String, Text, TextClause, bindparam, text
+
+# Execution option which marks statements to prepare on the server.
+PREPARE = "meowmx_prepare"
+
+
+def _sql(query: str) -> str:
+    return textwrap.dedent(query).strip()
+
+
+def _prepared(clause: TextClause) -> TextClause:
+    return clause.execution_options(**{PREPARE: True})
+
+
+APPEND_EVENT = _prepared(
+    text(
+        _sql("""
+        INSERT INTO es_events (transaction_id, aggregate_id, version, event_type, json_data)
+            VALUES(pg_current_xact_id(), :aggregate_id, :version, :event_type, CAST(:json_data AS JSON))
+            RETURNING id, transaction_id, event_type, json_data
+        """)
+    )
+)
+
+CREATE_AGGREGATE_IF_ABSENT = _prepared(
+    text(
+        _sql("""
+        INSERT INTO es_aggregates (id, version, aggregate_type)
+            VALUES (:aggregate_id, -1, :aggregate_type)
+            ON CONFLICT DO NOTHING
+        """)
+    )
+)
+
+CREATE_SUBSCRIPTION_IF_ABSENT = text(
+    _sql("""
+    INSERT INTO es_event_subscriptions (
+        subscription_name,
+        last_transaction_id,
+        last_event_id,
+        aggregate_type,
+        event_filter
+    )
+    VALUES (
+        :subscription_name,
+        '0'::xid8,
+        0,
+        :aggregate_type,
+        :event_filter
+    )
+    ON CONFLICT (subscription_name) DO UPDATE
+        SET aggregate_type = EXCLUDED.aggregate_type,
+            event_filter = EXCLUDED.event_filter
+        WHERE (
+            EXCLUDED.aggregate_type IS NOT NULL
+            OR EXCLUDED.event_filter IS NOT NULL
+        )
+        AND (
+            es_event_subscriptions.aggregate_type
+                IS DISTINCT FROM EXCLUDED.aggregate_type
+            OR es_event_subscriptions.event_filter
+                IS DISTINCT FROM EXCLUDED.event_filter
+        )
+    """)
+).bindparams(
+    bindparam("aggregate_type", type_=Text),
+    bindparam("event_filter", type_=Text),
+)
+
+CHECK_AND_UPDATE_AGGREGATE_VERSION = _prepared(
+    text(
+        _sql("""
+        UPDATE es_aggregates
+        SET version = :new_version
+        WHERE ID = :aggregate_id
+        AND version = :expected_version
+        """)
+    )
+)
+
+GET_AGGREGATE_VERSION = _prepared(
+    text(
+        _sql("""
+        SELECT version
+            FROM   es_aggregates
+            WHERE  id = :aggregate_id
+        """)
+    )
+)
+
+# True once every transaction up to the one given has finished, so a replica
+# has replayed all of them
+HAS_CAUGHT_UP = text(
+    "SELECT pg_snapshot_xmin(pg_current_snapshot()) > CAST(CAST(:tx_id AS TEXT) AS xid8)"
+)
+
+READ_CHECKPOINT_AND_LOCK_SUBSCRIPTION = _prepared(
+    text(
+        _sql("""
+        SELECT
+            last_transaction_id::text AS last_transaction_id,
+            last_event_id AS last_event_id
+        FROM es_event_subscriptions
+        WHERE subscription_name = :subscription_name
+        FOR UPDATE SKIP LOCKED
+        """)
+    )
+)
+
+UPDATE_EVENT_SUBSCRIPTION = _prepared(
+    text(
+        _sql("""
+        UPDATE es_event_subscriptions
+        SET last_transaction_id = CAST(:last_tx_id AS xid8),
+            last_event_id       = :last_event_id
+        WHERE subscription_name = :subscription_name
+        """)
+    ).bindparams(
+        bindparam("subscription_name"),
+        bindparam("last_tx_id", type_=Text),
+        bindparam("last_event_id", type_=Integer),
+    )
+)
+
+READ_SUBSCRIPTIONS = text(
+    _sql("""
+    SELECT
+        subscription_name,
+        aggregate_type,
+        last_transaction_id::text AS last_transaction_id,
+        last_event_id,
+        event_filter
+    FROM es_event_subscriptions
+    WHERE (:subscription_name IS NULL OR subscription_name = :subscription_name)
+    ORDER BY subscription_name
+    """)
+).bindparams(
+    bindparam("subscription_name", type_=Text),
+)
+
+
+def _read_events_by_aggregate_id(order: str) -> TextClause:
+    return _prepared(
+        text(
+            _sql(f"""
+            SELECT
+                a.aggregate_type,
+                e.id,
+                e.transaction_id::text AS tx_id,
+                e.event_type,
+                e.json_data::text as json_data,
+                e.version
+            FROM es_events e
+            JOIN es_aggregates a ON a.ID = e.aggregate_id
+            WHERE aggregate_id = :aggregate_id
+            AND (:from_version IS NULL OR e.version >= :from_version)
+            AND (:to_version IS NULL OR e.version < :to_version)
+            ORDER BY e.version {order}
+            LIMIT :limit
+            """)
+        ).bindparams(
+            bindparam("aggregate_id"),
+            bindparam("from_version", type_=Integer),
+            bindparam("to_version", type_=Integer),
+            bindparam("limit", type_=Integer),
+        )
+    )
+
+
+# keyed by `reverse`
+READ_EVENTS_BY_AGGREGATE_ID = {
+    False: _read_events_by_aggregate_id("ASC"),
+    True: _read_events_by_aggregate_id("DESC"),
+}
+
+
+def _event_filter(filter_event_types: bool) -> t.Tuple[str, t.List[t.Any]]:
+    """Returns the WHERE condition and bind parameters which limit events to
+    some aggregate types and, if `filter_event_types` is True, event types."""
+    condition = "a.aggregate_type IN :aggregate_types"
+    params: t.List[t.Any] = [bindparam("aggregate_types", expanding=True)]
+    if filter_event_types:
+        condition += " AND e.event_type IN :event_types"
+        params.append(bindparam("event_types", expanding=True))
+    return condition, params
+
+
+@functools.cache
+def count_events_after_checkpoint(filter_event_types: bool) -> TextClause:
+    condition, params = _event_filter(filter_event_types)
+    return text(
+        _sql(f"""
+        SELECT COUNT(*), COUNT(DISTINCT e.transaction_id)
+        FROM (
+            SELECT e.transaction_id
+            FROM es_events e
+            JOIN es_aggregates a ON a.ID = e.aggregate_id
+            WHERE {condition}
+            AND (e.transaction_id, e.ID) >
+                    (CAST(:last_processed_tx_id AS xid8), :last_processed_event_id)
+            ORDER BY e.transaction_id ASC, e.ID ASC
+            LIMIT :limit
+        ) e
+        """)
+    ).bindparams(
+        *params,
+        bindparam("last_processed_tx_id", type_=String),
+        bindparam("last_processed_event_id", type_=Integer),
+        bindparam("limit", type_=Integer),
+    )
+
+
+@functools.cache
+def read_head_position(filter_event_types: bool) -> TextClause:
+    condition, params = _event_filter(filter_event_types)
+    return text(
+        _sql(f"""
+        SELECT
+            e.transaction_id::text AS tx_id,
+            e.id
+        FROM es_events e
+        JOIN es_aggregates a ON a.ID = e.aggregate_id
+        WHERE {condition}
+        ORDER BY e.transaction_id DESC, e.ID DESC
+        LIMIT 1
+        """)
+    ).bindparams(*params)
+
+
+@functools.cache
+def read_events_after_checkpoint(filter_event_types: bool) -> TextClause:
+    condition, params = _event_filter(filter_event_types)
+    return _prepared(
+        text(
+            _sql(f"""
+            SELECT
+                e.id,
+                e.transaction_id::text AS tx_id,
+                e.event_type,
+                e.json_data::text as json_data,
+                e.version,
+                e.aggregate_id,
+                a.aggregate_type
+            FROM es_events e
+            JOIN es_aggregates a ON a.ID = e.aggregate_id
+            WHERE {condition}
+            AND (e.transaction_id, e.ID) >
+                    (CAST(:last_processed_tx_id AS xid8), :last_processed_event_id)
+            AND e.transaction_id < pg_snapshot_xmin(pg_current_snapshot())
+            ORDER BY e.transaction_id ASC, e.ID ASC
+            LIMIT :limit
+            """)
+        ).bindparams(
+            *params,
+            bindparam("limit", type_=Integer),
+        )
+    )
+
+
+def _all_events_where(
+    from_tx_id: bool,
+    to_tx_id: bool,
+    after_event_id: bool,
+    committed_only: bool,
+    psycopg: bool,
+) -> str:
+    """Builds the WHERE clause used to read all events.
+
+    With `after_event_id` the lower bound is the `(transaction_id, id)`
+    position, which can be read straight off the
+    `idx_es_event_transaction_id_id` index. `committed_only` stops at the
+    oldest transaction still in progress, like subscriptions do.
+    """
+
+    def param(name: str) -> str:
+        return f"%({name})s" if psycopg else f":{name}"
+
+    def xid(name: str) -> str:
+        return f"CAST(CAST({param(name)} AS TEXT) AS xid8)"
+
+    conditions = ["TRUE"]
+    if from_tx_id:
+        if not after_event_id:
+            conditions.append(f"e.transaction_id > {xid('from_tx_id')}")
+        else:
+            conditions.append(
+                f"(e.transaction_id, e.id) > ({xid('from_tx_id')}, {param('after_event_id')})"
+            )
+    if to_tx_id:
+        conditions.append(f"e.transaction_id <= {xid('to_tx_id')}")
+    if committed_only:
+        conditions.append("e.transaction_id < pg_snapshot_xmin(pg_current_snapshot())")
+    return " AND ".join(conditions)
+
+
+@functools.cache
+def read_all_events(
+    from_tx_id: bool,
+    to_tx_id: bool,
+    after_event_id: bool,
+    committed_only: bool,
+    reverse: bool,
+) -> TextClause:
+    """Reads all events; the flags say which of the arguments are given."""
+    where = _all_events_where(
+        from_tx_id, to_tx_id, after_event_id, committed_only, psycopg=False
+    )
+    order = "DESC" if reverse else "ASC"
+    return text(
+        _sql(f"""
+        SELECT
+            a.aggregate_type,
+            e.id,
+            e.transaction_id::text AS tx_id,
+            e.aggregate_id,
+            e.event_type,
+            e.json_data::text as json_data,
+            e.version
+        FROM es_events e
+        JOIN es_aggregates a ON a.ID = e.aggregate_id
+        WHERE {where}
+        ORDER BY e.transaction_id {order}, e.id {order}
+        LIMIT :limit
+        """)
+    )
+
+
+@functools.cache
+def read_all_events_raw(
+    from_tx_id: bool,
+    to_tx_id: bool,
+    after_event_id: bool,
+    committed_only: bool,
+    reverse: bool,
+) -> str:
+    """Like `read_all_events`, but for psycopg, with the JSON left as is."""
+    where = _all_events_where(
+        from_tx_id, to_tx_id, after_event_id, committed_only, psycopg=True
+    )
+    order = "DESC" if reverse else "ASC"
+    return _sql(f"""
+        SELECT
+            a.aggregate_type,
+            e.id,
+            e.transaction_id::text::bigint AS tx_id,
+            e.aggregate_id,
+            e.event_type,
+            e.json_data,
+            e.version
+        FROM es_events e
+        JOIN es_aggregates a ON a.ID = e.aggregate_id
+        WHERE {where}
+        ORDER BY e.transaction_id {order}, e.id {order}
+        LIMIT %(limit)s
+        """)
+
+
+_EXPORT_QUERY = _sql("""
+    SELECT
+        e.id,
+        e.transaction_id::text::bigint AS tx_id,
+        a.aggregate_type,
+        e.aggregate_id::text,
+        e.version,
+        e.event_type,
+        {json_data}
+    FROM es_events e
+    JOIN es_aggregates a ON a.ID = e.aggregate_id
+    WHERE ({from_tx_id}::text IS NULL
+           OR e.transaction_id > {from_tx_id}::text::xid8)
+    AND ({to_tx_id}::text IS NULL
+         OR e.transaction_id <= {to_tx_id}::text::xid8)
+    AND ({aggregate_type}::text IS NULL
+         OR a.aggregate_type = {aggregate_type}::text)
+    ORDER BY e.transaction_id, e.id
+    """)
+
+_EXPORT_PARAMS = ("from_tx_id", "to_tx_id", "aggregate_type")
+
+# `COPY` for psycopg, which takes the arguments named in `_EXPORT_PARAMS`
+EXPORT_EVENTS_COPY = "COPY ({}) TO STDOUT (FORMAT BINARY)".format(
+    _EXPORT_QUERY.format(
+        json_data="e.json_data", **{name: f"%({name})s" for name in _EXPORT_PARAMS}
+    )
+)
+
+EXPORT_EVENTS = text(
+    _EXPORT_QUERY.format(
+        json_data="e.json_data::text",
+        **{name: f"CAST(:{name} AS TEXT)" for name in _EXPORT_PARAMS},
+    )
+)
+
+# `Esp.import_events` stages events in a temporary table, then moves them
+# into place with the statements below. The staged IDs are text, so the
+# statements joining on them are built for the type the aggregate ID column
+# was created with, as read by `AGGREGATE_ID_TYPE`.
+
+CREATE_IMPORT_TABLE = text(
+    _sql("""
+    CREATE TEMPORARY TABLE IF NOT EXISTS es_import (
+        seq             BIGINT   GENERATED ALWAYS AS IDENTITY,
+        aggregate_type  TEXT     NOT NULL,
+        aggregate_id    TEXT     NOT NULL,
+        position        INTEGER  NOT NULL,
+        event_type      TEXT     NOT NULL,
+        json_data       TEXT     NOT NULL
+    ) ON COMMIT DROP;
+    TRUNCATE es_import;
+    """)
+)
+
+# `COPY` for psycopg, with the types of the columns it's given
+IMPORT_COPY = (
+    "COPY es_import (aggregate_type, aggregate_id, position, event_type, json_data)"
+    " FROM STDIN (FORMAT BINARY)"
+)
+IMPORT_COPY_TYPES = ["text", "text", "int4", "text", "text"]
+
+INSERT_IMPORT_ROW = text(
+    _sql("""
+    INSERT INTO es_import (aggregate_type, aggregate_id, position, event_type, json_data)
+    VALUES (:aggregate_type, :aggregate_id, :position, :event_type, :json_data)
+    """)
+)
+
+AGGREGATE_ID_TYPE = text(
+    _sql("""
+    SELECT format_type(atttypid, atttypmod)
+    FROM pg_attribute
+    WHERE attrelid = 'es_aggregates'::regclass AND attname = 'id'
+    """)
+)
+
+
+def _staged_id(aggregate_id_type: str) -> str:
+    return f"CAST(s.aggregate_id AS {aggregate_id_type})"
+
+
+@functools.cache
+def create_imported_aggregates(aggregate_id_type: str) -> TextClause:
+    return text(
+        _sql(f"""
+        INSERT INTO es_aggregates (id, version, aggregate_type)
+            SELECT DISTINCT {_staged_id(aggregate_id_type)}, -1, s.aggregate_type
+            FROM es_import s
+            ON CONFLICT DO NOTHING
+        """)
+    )
+
+
+@functools.cache
+def lock_imported_aggregates(aggregate_id_type: str) -> TextClause:
+    return text(
+        _sql(f"""
+        SELECT count(*) FROM (
+            SELECT a.id
+            FROM es_aggregates a
+            WHERE a.id IN (SELECT {_staged_id(aggregate_id_type)} FROM es_import s)
+            ORDER BY a.id
+            FOR UPDATE
+        ) locked
+        """)
+    )
+
+
+@functools.cache
+def find_import_type_mismatch(aggregate_id_type: str) -> TextClause:
+    return text(
+        _sql(f"""
+        SELECT s.aggregate_id, s.aggregate_type, a.aggregate_type
+        FROM es_import s
+        JOIN es_aggregates a ON a.id = {_staged_id(aggregate_id_type)}
+        WHERE a.aggregate_type <> s.aggregate_type
+        LIMIT 1
+        """)
+    )
+
+
+@functools.cache
+def insert_imported_events(aggregate_id_type: str) -> TextClause:
+    return text(
+        _sql(f"""
+        INSERT INTO es_events (transaction_id, aggregate_id, version, event_type, json_data)
+            SELECT
+                pg_current_xact_id(),
+                a.id,
+                a.version + 1 + s.position,
+                s.event_type,
+                CAST(s.json_data AS JSON)
+            FROM es_import s
+            JOIN es_aggregates a ON a.id = {_staged_id(aggregate_id_type)}
+            ORDER BY s.seq
+        """)
+    )
+
+
+@functools.cache
+def update_imported_versions(aggregate_id_type: str) -> TextClause:
+    return text(
+        _sql(f"""
+        UPDATE es_aggregates a
+        SET version = a.version + c.count
+        FROM (
+            SELECT {_staged_id(aggregate_id_type)} AS id, count(*) AS count
+            FROM es_import s
+            GROUP BY 1
+        ) c
+        WHERE a.id = c.id
+        """)
+    )
+
+
+TRUNCATE_IMPORT = text("TRUNCATE es_import")
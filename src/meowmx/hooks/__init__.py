@@ -0,0 +1,11 @@
+from .hooks import Hooks
+from .instrumented import InstrumentedClient
+from .otel import OpenTelemetryHooks
+from .prometheus import PrometheusHooks
+
+__all__ = [
+    "Hooks",
+    "InstrumentedClient",
+    "OpenTelemetryHooks",
+    "PrometheusHooks",
+]
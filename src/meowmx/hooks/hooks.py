@@ -0,0 +1,46 @@
+from .. import common
+
+
+class Hooks:
+    """Receives measurements from meowmx.
+
+    Every method does nothing by default. Subclass this, override the methods
+    you care about and pass an instance to `meowmx.Client(hooks=...)`. When no
+    hooks are passed meowmx skips taking the measurements entirely.
+
+    Durations are in seconds.
+    """
+
+    def operation(self, name: str, duration: float, rows: int) -> None:
+        """Called after each call to the database backend (see `common.Client`).
+
+        `name` is the method's name. `rows` is the number of rows read or
+        written, or for methods returning a bool, 1 if it was True.
+        """
+
+    def save_events(self, aggregate_type: str, duration: float, count: int) -> None:
+        """Called after `Client.save_events` writes `count` events."""
+
+    def version_conflict(self, aggregate_type: str, aggregate_id: str) -> None:
+        """Called when saving events fails because the version didn't match."""
+
+    def handler(
+        self,
+        subscription_name: str,
+        event: common.RecordedEvent,
+        duration: float,
+        succeeded: bool,
+    ) -> None:
+        """Called after a subscription's handler returns or raises."""
+
+    def checkpoint_updated(self, subscription_name: str, duration: float) -> None:
+        """Called after a subscription's checkpoint is moved forward."""
+
+    def subscription_lock_missed(self, subscription_name: str) -> None:
+        """Called when a subscription's checkpoint is locked by someone else."""
+
+    def subscription_batch_size(self, subscription_name: str, batch_size: int) -> None:
+        """Called with the batch size a subscription picked for its next batch."""
+
+    def subscription_batch(self, batch: common.SubscriptionBatch) -> None:
+        """Called after every pass a subscription makes over its events."""
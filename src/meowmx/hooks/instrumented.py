@@ -0,0 +1,294 @@
+import time
+import typing as t
+
+from .. import common
+from .hooks import Hooks
+
+
+class InstrumentedClient:
+    """Wraps a client, timing every method and reporting it to `Hooks`.
+
+    `meowmx.Client` only puts this in front of its backend when hooks are
+    given, so there's no cost at all otherwise.
+    """
+
+    def __init__(self, client: common.Client, hooks: Hooks) -> None:
+        self._client = client
+        self._hooks = hooks
+
+    def setup_tables(
+        self, engine: common.Engine, aggregate_id_column_type: t.Optional[str]
+    ) -> None:
+        start = time.perf_counter()
+        self._client.setup_tables(engine, aggregate_id_column_type)
+        self._hooks.operation("setup_tables", time.perf_counter() - start, 0)
+
+    def append_event(
+        self,
+        session: common.Executor,
+        event: common.NewEventRow,
+        assumed_aggregate_type: str,
+    ) -> common.RecordedEvent:
+        start = time.perf_counter()
+        result = self._client.append_event(session, event, assumed_aggregate_type)
+        self._hooks.operation("append_event", time.perf_counter() - start, 1)
+        return result
+
+    def create_aggregate_if_absent(
+        self,
+        session: common.Executor,
+        aggregate_type: str,
+        aggregate_id: str,
+    ) -> None:
+        start = time.perf_counter()
+        self._client.create_aggregate_if_absent(session, aggregate_type, aggregate_id)
+        self._hooks.operation(
+            "create_aggregate_if_absent", time.perf_counter() - start, 0
+        )
+
+    def create_subscription_if_absent(
+        self,
+        session: common.Executor,
+        subscription_name: str,
+        aggregate_type: t.Optional[str] = None,
+        event_filter: t.Optional[common.EventFilter] = None,
+    ) -> None:
+        start = time.perf_counter()
+        self._client.create_subscription_if_absent(
+            session, subscription_name, aggregate_type, event_filter
+        )
+        self._hooks.operation(
+            "create_subscription_if_absent", time.perf_counter() - start, 0
+        )
+
+    def check_and_update_aggregate_version(
+        self,
+        session: common.Executor,
+        aggregate_id: str,
+        expected_version: int,
+        new_version: int,
+    ) -> bool:
+        start = time.perf_counter()
+        result = self._client.check_and_update_aggregate_version(
+            session, aggregate_id, expected_version, new_version
+        )
+        self._hooks.operation(
+            "check_and_update_aggregate_version",
+            time.perf_counter() - start,
+            1 if result else 0,
+        )
+        return result
+
+    def count_events_after_checkpoint(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        last_processed_tx_id: int,
+        last_processed_event_id: int,
+        limit: int,
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Tuple[int, int]:
+        start = time.perf_counter()
+        result = self._client.count_events_after_checkpoint(
+            session,
+            aggregate_types,
+            last_processed_tx_id,
+            last_processed_event_id,
+            limit,
+            event_types,
+        )
+        self._hooks.operation(
+            "count_events_after_checkpoint", time.perf_counter() - start, 1
+        )
+        return result
+
+    def get_aggregate_version(
+        self, session: common.Executor, aggregate_type: str, aggregate_id: str
+    ) -> t.Optional[int]:
+        start = time.perf_counter()
+        result = self._client.get_aggregate_version(
+            session, aggregate_type, aggregate_id
+        )
+        self._hooks.operation(
+            "get_aggregate_version",
+            time.perf_counter() - start,
+            0 if result is None else 1,
+        )
+        return result
+
+    def has_caught_up(self, session: common.Executor, tx_id: int) -> bool:
+        start = time.perf_counter()
+        result = self._client.has_caught_up(session, tx_id)
+        self._hooks.operation("has_caught_up", time.perf_counter() - start, 1)
+        return result
+
+    def read_checkpoint_and_lock_subscription(
+        self, session: common.Executor, subscription_name: str
+    ) -> t.Optional[common.SubCheckpoint]:
+        start = time.perf_counter()
+        result = self._client.read_checkpoint_and_lock_subscription(
+            session, subscription_name
+        )
+        self._hooks.operation(
+            "read_checkpoint_and_lock_subscription",
+            time.perf_counter() - start,
+            0 if result is None else 1,
+        )
+        if result is None:
+            self._hooks.subscription_lock_missed(subscription_name)
+        return result
+
+    def read_all_events(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> t.List[common.RecordedEvent]:
+        start = time.perf_counter()
+        result = self._client.read_all_events(
+            session,
+            from_tx_id,
+            to_tx_id,
+            limit,
+            reverse,
+            after_event_id,
+            committed_only,
+        )
+        self._hooks.operation(
+            "read_all_events", time.perf_counter() - start, len(result)
+        )
+        return result
+
+    def read_all_events_batch(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> common.EventBatch:
+        start = time.perf_counter()
+        result = self._client.read_all_events_batch(
+            session,
+            from_tx_id,
+            to_tx_id,
+            limit,
+            reverse,
+            after_event_id,
+            committed_only,
+        )
+        self._hooks.operation(
+            "read_all_events_batch", time.perf_counter() - start, len(result)
+        )
+        return result
+
+    def export_events(
+        self,
+        session: common.Executor,
+        file: t.BinaryIO,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        aggregate_type: t.Optional[str],
+        format: str,
+    ) -> int:
+        start = time.perf_counter()
+        result = self._client.export_events(
+            session, file, from_tx_id, to_tx_id, aggregate_type, format
+        )
+        self._hooks.operation("export_events", time.perf_counter() - start, result)
+        return result
+
+    def read_head_position(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Optional[common.SubCheckpoint]:
+        start = time.perf_counter()
+        result = self._client.read_head_position(session, aggregate_types, event_types)
+        self._hooks.operation(
+            "read_head_position",
+            time.perf_counter() - start,
+            0 if result is None else 1,
+        )
+        return result
+
+    def read_events_by_aggregate_id(
+        self,
+        session: common.Executor,
+        aggregate_id: str,
+        limit: int,
+        from_version: t.Optional[int],
+        to_version: t.Optional[int],
+        reverse: bool = False,
+    ) -> t.List[common.RecordedEvent]:
+        start = time.perf_counter()
+        result = self._client.read_events_by_aggregate_id(
+            session, aggregate_id, limit, from_version, to_version, reverse
+        )
+        self._hooks.operation(
+            "read_events_by_aggregate_id", time.perf_counter() - start, len(result)
+        )
+        return result
+
+    def read_events_after_checkpoint(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        last_processed_tx_id: int,
+        last_processed_event_id: int,
+        limit: t.Optional[int] = None,
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.List[common.RecordedEvent]:
+        start = time.perf_counter()
+        result = self._client.read_events_after_checkpoint(
+            session,
+            aggregate_types,
+            last_processed_tx_id,
+            last_processed_event_id,
+            limit,
+            event_types,
+        )
+        self._hooks.operation(
+            "read_events_after_checkpoint", time.perf_counter() - start, len(result)
+        )
+        return result
+
+    def import_events(
+        self, session: common.Executor, events: t.Sequence[common.ImportEventRow]
+    ) -> None:
+        start = time.perf_counter()
+        self._client.import_events(session, events)
+        self._hooks.operation("import_events", time.perf_counter() - start, len(events))
+
+    def read_subscriptions(
+        self, session: common.Executor, subscription_name: t.Optional[str]
+    ) -> t.List[common.SubscriptionInfo]:
+        start = time.perf_counter()
+        result = self._client.read_subscriptions(session, subscription_name)
+        self._hooks.operation(
+            "read_subscriptions", time.perf_counter() - start, len(result)
+        )
+        return result
+
+    def update_event_subscription(
+        self,
+        session: common.Executor,
+        subscription_name: str,
+        last_tx_id: int,
+        last_event_id: int,
+    ) -> bool:
+        start = time.perf_counter()
+        result = self._client.update_event_subscription(
+            session, subscription_name, last_tx_id, last_event_id
+        )
+        duration = time.perf_counter() - start
+        self._hooks.operation("update_event_subscription", duration, 1 if result else 0)
+        self._hooks.checkpoint_updated(subscription_name, duration)
+        return result
@@ -0,0 +1,106 @@
+import time
+import typing as t
+
+from .. import common
+from .hooks import Hooks
+
+
+class OpenTelemetryHooks(Hooks):
+    """Reports meowmx measurements as OpenTelemetry spans.
+
+    Requires the `opentelemetry-api` package (`pip install meowmx[opentelemetry]`).
+    Database operations, saves, handlers and subscription batches each become
+    a span, created after the fact with its measured start and end times.
+    Lock misses and version conflicts are added as events to the current span.
+    """
+
+    def __init__(self, tracer: t.Any = None) -> None:
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryHooks requires the opentelemetry-api package"
+            ) from e
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("meowmx")
+
+    def _record_span(
+        self,
+        name: str,
+        duration: float,
+        attributes: t.Dict[str, t.Any],
+        failed: bool = False,
+    ) -> None:
+        end_time = time.time_ns()
+        span = self._tracer.start_span(
+            name,
+            start_time=end_time - int(duration * 1e9),
+            attributes=attributes,
+        )
+        if failed:
+            span.set_status(self._trace.StatusCode.ERROR)
+        span.end(end_time=end_time)
+
+    def operation(self, name: str, duration: float, rows: int) -> None:
+        self._record_span(f"meowmx.{name}", duration, {"meowmx.rows": rows})
+
+    def save_events(self, aggregate_type: str, duration: float, count: int) -> None:
+        self._record_span(
+            "meowmx.save_events",
+            duration,
+            {"meowmx.aggregate_type": aggregate_type, "meowmx.event_count": count},
+        )
+
+    def version_conflict(self, aggregate_type: str, aggregate_id: str) -> None:
+        self._trace.get_current_span().add_event(
+            "meowmx.version_conflict",
+            {
+                "meowmx.aggregate_type": aggregate_type,
+                "meowmx.aggregate_id": aggregate_id,
+            },
+        )
+
+    def handler(
+        self,
+        subscription_name: str,
+        event: common.RecordedEvent,
+        duration: float,
+        succeeded: bool,
+    ) -> None:
+        self._record_span(
+            "meowmx.handler",
+            duration,
+            {
+                "meowmx.subscription": subscription_name,
+                "meowmx.event_type": event.event_type,
+                "meowmx.event_id": event.id,
+            },
+            failed=not succeeded,
+        )
+
+    def checkpoint_updated(self, subscription_name: str, duration: float) -> None:
+        self._record_span(
+            "meowmx.checkpoint_updated",
+            duration,
+            {"meowmx.subscription": subscription_name},
+        )
+
+    def subscription_lock_missed(self, subscription_name: str) -> None:
+        self._trace.get_current_span().add_event(
+            "meowmx.subscription_lock_missed",
+            {"meowmx.subscription": subscription_name},
+        )
+
+    def subscription_batch(self, batch: common.SubscriptionBatch) -> None:
+        self._record_span(
+            "meowmx.subscription_batch",
+            batch.elapsed,
+            {
+                "meowmx.subscription": batch.subscription_name,
+                "meowmx.aggregate_type": batch.aggregate_type,
+                "meowmx.batch_size": batch.batch_size,
+                "meowmx.processed": batch.processed,
+                "meowmx.lock_acquired": batch.lock_acquired,
+            },
+        )
@@ -0,0 +1,134 @@
+import typing as t
+
+from .. import common
+from .hooks import Hooks
+
+
+class PrometheusHooks(Hooks):
+    """Records meowmx measurements as Prometheus counters and histograms.
+
+    Requires the `prometheus-client` package (`pip install meowmx[prometheus]`).
+    Metrics are registered with `registry`, or prometheus_client's default
+    registry if it's None.
+    """
+
+    def __init__(self, registry: t.Any = None, namespace: str = "meowmx") -> None:
+        try:
+            import prometheus_client
+        except ImportError as e:
+            raise ImportError(
+                "PrometheusHooks requires the prometheus-client package"
+            ) from e
+
+        kwargs: t.Dict[str, t.Any] = {"namespace": namespace}
+        if registry is not None:
+            kwargs["registry"] = registry
+
+        self._operation_seconds = prometheus_client.Histogram(
+            "operation_duration_seconds",
+            "Time spent in each database operation.",
+            ["operation"],
+            **kwargs,
+        )
+        self._operation_rows = prometheus_client.Counter(
+            "operation_rows",
+            "Rows read or written by each database operation.",
+            ["operation"],
+            **kwargs,
+        )
+        self._save_seconds = prometheus_client.Histogram(
+            "save_events_duration_seconds",
+            "Time spent saving events.",
+            ["aggregate_type"],
+            **kwargs,
+        )
+        self._events_saved = prometheus_client.Counter(
+            "events_saved",
+            "Events saved.",
+            ["aggregate_type"],
+            **kwargs,
+        )
+        self._version_conflicts = prometheus_client.Counter(
+            "version_conflicts",
+            "Saves which failed because the expected version didn't match.",
+            ["aggregate_type"],
+            **kwargs,
+        )
+        self._handler_seconds = prometheus_client.Histogram(
+            "handler_duration_seconds",
+            "Time spent in subscription handlers.",
+            ["subscription"],
+            **kwargs,
+        )
+        self._handler_failures = prometheus_client.Counter(
+            "handler_failures",
+            "Subscription handlers which raised an exception.",
+            ["subscription"],
+            **kwargs,
+        )
+        self._checkpoint_seconds = prometheus_client.Histogram(
+            "checkpoint_update_duration_seconds",
+            "Time spent updating subscription checkpoints.",
+            ["subscription"],
+            **kwargs,
+        )
+        self._lock_misses = prometheus_client.Counter(
+            "subscription_lock_misses",
+            "Polls which found the subscription locked by another worker.",
+            ["subscription"],
+            **kwargs,
+        )
+        self._batch_size = prometheus_client.Gauge(
+            "subscription_batch_size",
+            "Batch size picked for the latest subscription batch.",
+            ["subscription"],
+            **kwargs,
+        )
+        self._batch_seconds = prometheus_client.Histogram(
+            "subscription_batch_duration_seconds",
+            "Time each subscription batch kept its transaction open.",
+            ["subscription"],
+            **kwargs,
+        )
+        self._events_handled = prometheus_client.Counter(
+            "subscription_events_handled",
+            "Events handled by subscriptions.",
+            ["subscription"],
+            **kwargs,
+        )
+
+    def operation(self, name: str, duration: float, rows: int) -> None:
+        self._operation_seconds.labels(name).observe(duration)
+        self._operation_rows.labels(name).inc(rows)
+
+    def save_events(self, aggregate_type: str, duration: float, count: int) -> None:
+        self._save_seconds.labels(aggregate_type).observe(duration)
+        self._events_saved.labels(aggregate_type).inc(count)
+
+    def version_conflict(self, aggregate_type: str, aggregate_id: str) -> None:
+        self._version_conflicts.labels(aggregate_type).inc()
+
+    def handler(
+        self,
+        subscription_name: str,
+        event: common.RecordedEvent,
+        duration: float,
+        succeeded: bool,
+    ) -> None:
+        self._handler_seconds.labels(subscription_name).observe(duration)
+        if not succeeded:
+            self._handler_failures.labels(subscription_name).inc()
+
+    def checkpoint_updated(self, subscription_name: str, duration: float) -> None:
+        self._checkpoint_seconds.labels(subscription_name).observe(duration)
+
+    def subscription_lock_missed(self, subscription_name: str) -> None:
+        self._lock_misses.labels(subscription_name).inc()
+
+    def subscription_batch_size(self, subscription_name: str, batch_size: int) -> None:
+        self._batch_size.labels(subscription_name).set(batch_size)
+
+    def subscription_batch(self, batch: common.SubscriptionBatch) -> None:
+        if batch.lock_acquired:
+            self._batch_seconds.labels(batch.subscription_name).observe(batch.elapsed)
+        self._events_handled.labels(batch.subscription_name).inc(batch.processed)
@@ -0,0 +1,236 @@
+import typing as t
+
+import sqlalchemy
+from sqlalchemy.dialects import postgresql, sqlite
+
+from . import common
+
+
+class _Delete:
+    def __repr__(self) -> str:
+        return "meowmx.Projection.DELETE"
+
+
+# Returned by a reducer to delete the row.
+DELETE = _Delete()
+
+# Given the row an event affects as it stands, or None if there isn't one,
+# and the event, returns the columns to change, DELETE to delete the row, or
+# None if the event doesn't change it.
+Reducer = t.Callable[
+    [t.Optional[t.Mapping[str, t.Any]], common.RecordedEvent],
+    t.Union[None, t.Mapping[str, t.Any], _Delete],
+]
+
+# Returns the key of the row an event affects: a value for a single key
+# column, or a tuple with a value for each.
+RowKey = t.Callable[[common.RecordedEvent], t.Any]
+
+# How many keys are looked up per query when reading the rows a batch affects.
+_SELECT_CHUNK_SIZE = 500
+
+
+class Projection:
+    """Describes a read table kept up to date from events.
+
+    `row_key` says which row an event affects, by default the one keyed by
+    its aggregate ID, and `reducers` what each event type does to it: a
+    reducer is given the row as it stands, or None if there isn't one yet,
+    and the event, and returns the columns to change, which can be based on
+    the row's values, or `Projection.DELETE` to delete it. Missing rows are
+    inserted with the key columns filled in.
+
+    `Client.project` keeps the table up to date using a subscription named
+    after the projection. Each batch reads the rows its events affect in a
+    few queries and reduces the events in memory, so a row changed by several
+    events is written once, with `INSERT ... ON CONFLICT DO UPDATE`
+    statements run with `executemany`. Only one subscription writes the
+    table at a time, so the rows don't change under it.
+    `Client.rebuild_projection` empties the table and replays every event.
+    """
+
+    DELETE = DELETE
+
+    def __init__(
+        self,
+        name: str,
+        table: sqlalchemy.Table,
+        key: t.Union[str, t.Sequence[str]],
+        aggregate_types: t.Union[str, t.Collection[str]],
+        reducers: t.Mapping[str, Reducer],
+        row_key: t.Optional[RowKey] = None,
+    ) -> None:
+        if len(reducers) == 0:
+            raise ValueError("a projection needs at least one reducer")
+        self.name = name
+        self.table = table
+        self.key: t.Tuple[str, ...] = (key,) if isinstance(key, str) else tuple(key)
+        if row_key is None:
+            if len(self.key) != 1:
+                raise ValueError("row_key is needed when the key has several columns")
+            row_key = _aggregate_id
+        self._row_key = row_key
+        self.event_filter = common.EventFilter.create(aggregate_types, reducers)
+        self._reducers = dict(reducers)
+        self._upserts: t.Dict[t.Tuple[str, t.Tuple[str, ...]], t.Any] = {}
+        self._delete = sqlalchemy.delete(table).where(
+            *(
+                table.c[column] == sqlalchemy.bindparam(f"key_{column}")
+                for column in self.key
+            )
+        )
+
+    def reduce(
+        self,
+        session: common.Executor,
+        events: t.Sequence[common.RecordedEvent],
+    ) -> t.Tuple[t.List[t.Tuple[t.Any, ...]], t.List[t.Dict[str, t.Any]]]:
+        """Returns the keys of the rows to delete and the rows to write once
+        the events have been applied in order."""
+        changes: t.List[
+            t.Tuple[Reducer, common.RecordedEvent, t.Tuple[t.Any, ...]]
+        ] = []
+        for event in events:
+            reducer = self._reducers.get(event.event_type)
+            if reducer is not None:
+                changes.append((reducer, event, self._key_of(event)))
+        rows = self._read_rows(session, {key for _, _, key in changes})
+        changed: t.Set[t.Tuple[t.Any, ...]] = set()
+        # rows to delete before writing, even if they've been made again
+        deleted: t.Set[t.Tuple[t.Any, ...]] = set()
+        for reducer, event, key in changes:
+            row = rows.get(key)
+            outcome = reducer(row, event)
+            if outcome is None:
+                continue
+            if isinstance(outcome, _Delete):
+                if row is not None:
+                    rows[key] = None
+                    deleted.add(key)
+                continue
+            new_row = dict(row) if row is not None else dict(zip(self.key, key))
+            new_row.update(outcome)
+            rows[key] = new_row
+            changed.add(key)
+        writes: t.List[t.Dict[str, t.Any]] = []
+        for key in changed:
+            written = rows[key]
+            if written is not None:
+                writes.append(written)
+        return list(deleted), writes
+
+    def apply(
+        self, session: common.Executor, events: t.Sequence[common.RecordedEvent]
+    ) -> None:
+        """Writes the changes the events make to the table."""
+        connection = common.core_connection(session)
+        deleted, writes = self.reduce(connection, events)
+        if deleted:
+            connection.execute(
+                self._delete,
+                [
+                    {f"key_{column}": value for column, value in zip(self.key, key)}
+                    for key in deleted
+                ],
+            )
+        # rows setting different columns need different statements
+        by_columns: t.Dict[t.Tuple[str, ...], t.List[t.Dict[str, t.Any]]] = {}
+        for row in writes:
+            by_columns.setdefault(tuple(sorted(row)), []).append(row)
+        for columns, rows in by_columns.items():
+            connection.execute(self._upsert(connection.dialect.name, columns), rows)
+
+    def clear(self, session: common.Executor) -> None:
+        """Deletes every row of the table."""
+        common.core_connection(session).execute(sqlalchemy.delete(self.table))
+
+    def _key_of(self, event: common.RecordedEvent) -> t.Tuple[t.Any, ...]:
+        key = self._row_key(event)
+        if len(self.key) == 1:
+            key = (key,)
+        else:
+            key = tuple(key)
+            if len(key) != len(self.key):
+                raise ValueError(
+                    f"row_key returned {len(key)} values for {len(self.key)} key columns"
+                )
+        return self._normalize_key(key)
+
+    def _normalize_key(self, key: t.Iterable[t.Any]) -> t.Tuple[t.Any, ...]:
+        """Puts key values in the form the table gives them back in, so keys
+        from events match the rows read for them."""
+        return tuple(
+            _normalize(self.table.c[column].type, value)
+            for column, value in zip(self.key, key)
+        )
+
+    def _read_rows(
+        self, session: common.Executor, keys: t.Set[t.Tuple[t.Any, ...]]
+    ) -> t.Dict[t.Tuple[t.Any, ...], t.Optional[t.Dict[str, t.Any]]]:
+        columns = [self.table.c[column] for column in self.key]
+        key_expression: t.Any = (
+            columns[0] if len(columns) == 1 else sqlalchemy.tuple_(*columns)
+        )
+        ordered = list(keys)
+        rows: t.Dict[t.Tuple[t.Any, ...], t.Optional[t.Dict[str, t.Any]]] = {}
+        for start in range(0, len(ordered), _SELECT_CHUNK_SIZE):
+            chunk = ordered[start : start + _SELECT_CHUNK_SIZE]
+            result = session.execute(
+                sqlalchemy.select(self.table).where(
+                    key_expression.in_(
+                        [key[0] for key in chunk] if len(columns) == 1 else chunk
+                    )
+                )
+            )
+            for row in result.mappings():
+                key = self._normalize_key(row[column] for column in self.key)
+                rows[key] = dict(row)
+        return rows
+
+    def _upsert(self, dialect_name: str, columns: t.Tuple[str, ...]) -> t.Any:
+        statement = self._upserts.get((dialect_name, columns))
+        if statement is None:
+            insert: t.Union[postgresql.Insert, sqlite.Insert]
+            if dialect_name == "postgresql":
+                insert = postgresql.insert(self.table)
+            elif dialect_name == "sqlite":
+                insert = sqlite.insert(self.table)
+            else:
+                raise ValueError(f"projections don't support {dialect_name}")
+            updates = {
+                column: insert.excluded[column]
+                for column in columns
+                if column not in self.key
+            }
+            if updates:
+                statement = insert.on_conflict_do_update(
+                    index_elements=list(self.key), set_=updates
+                )
+            else:
+                statement = insert.on_conflict_do_nothing(index_elements=list(self.key))
+            self._upserts[(dialect_name, columns)] = statement
+        return statement
+
+
+def _aggregate_id(event: common.RecordedEvent) -> str:
+    return event.aggregate_id
+
+
+def _normalize(column_type: t.Any, value: t.Any) -> t.Any:
+    """Converts a key value to the Python type of its column, so a str
+    aggregate ID matches the uuid.UUID a UUID column returns, and drops the
+    padding CHAR columns add."""
+    if value is None:
+        return None
+    if isinstance(column_type, sqlalchemy.CHAR) and isinstance(value, str):
+        return value.rstrip(" ")
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, python_type):
+        return value
+    try:
+        return python_type(value)
+    except (TypeError, ValueError):
+        return value
@@ -1,9 +1,12 @@
 from .client import Client, create_session_maker, engine_is_in_memory_db
-from .locked import MutexLockedClient
+from .sqlite import WRITE, WriteTimeout, configure_engine, thread_is_writing
 
 __all__ = [
     "Client",
+    "configure_engine",
     "create_session_maker",
     "engine_is_in_memory_db",
-    "MutexLockedClient",
+    "thread_is_writing",
+    "WRITE",
+    "WriteTimeout",
 ]
@@ -1,9 +1,17 @@
+import collections
 import typing as t
+import weakref
+
 import sqlalchemy
+from sqlalchemy.dialects import sqlite
 
 from .. import common
+from ..common import export
 from . import tables
 
+# How many aggregate IDs `import_events` looks up per query.
+_IMPORT_IDS_PER_SELECT = 500
+
 
 def create_session_maker(engine: common.Engine) -> common.SessionMaker:
     return sqlalchemy.orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -13,18 +21,100 @@ def engine_is_in_memory_db(engine: common.Engine) -> bool:
     return engine.dialect.name == "sqlite" and engine.url.database in (None, ":memory:")
 
 
+def _event_filter(
+    aggregate_types: t.Sequence[str],
+    event_types: t.Optional[t.Sequence[str]],
+    in_log_order: bool = False,
+) -> t.List[sqlalchemy.ColumnElement[bool]]:
+    """Limits events to the given aggregate types and, if given, event types.
+
+    With `in_log_order` SQLite is kept from using the aggregate type's index,
+    so it walks the events from a checkpoint along the (transaction ID, ID)
+    index and stops at the limit, rather than finding and sorting every
+    event of the type.
+    """
+    aggregate_type = tables.EsAggregate.aggregate_type
+    conditions: t.List[sqlalchemy.ColumnElement[bool]] = [
+        # an expression of the column can't use its index
+        (aggregate_type + "" if in_log_order else aggregate_type).in_(aggregate_types)
+    ]
+    if event_types is not None:
+        conditions.append(tables.EsEvent.event_type.in_(event_types))
+    return conditions
+
+
 class Client:
-    def __init__(self) -> None:
-        pass
+    def __init__(self, codec: t.Optional[common.Codec] = None) -> None:
+        self._codec = codec
+        # the transaction ID taken by each transaction which is writing
+        self._transaction_ids: "weakref.WeakKeyDictionary[sqlalchemy.RootTransaction, int]" = weakref.WeakKeyDictionary()
+
+    def _transaction_id(self, session: common.Executor) -> int:
+        """Returns the ID of the current transaction, taking the next one from
+        the counter the first time it's asked for.
+
+        SQLite only lets one transaction write at a time, so the IDs go up in
+        the order the transactions commit, like they do on Postgres.
+        """
+        connection = common.core_connection(session)
+        transaction = connection.get_transaction()
+        if transaction is None:
+            raise RuntimeError("events can only be written in a transaction")
+        tx_id = self._transaction_ids.get(transaction)
+        if tx_id is None:
+            bump = (
+                sqlalchemy.update(tables.EsTransactionCounter)
+                .values(
+                    last_transaction_id=tables.EsTransactionCounter.last_transaction_id
+                    + 1
+                )
+                .returning(tables.EsTransactionCounter.last_transaction_id)
+            )
+            tx_id = int(connection.execute(bump).scalar_one())
+            self._transaction_ids[transaction] = tx_id
+        return tx_id
 
     def setup_tables(
         self, engine: common.Engine, aggregate_id_column_type: t.Optional[str]
     ) -> None:
         tables.Base.metadata.create_all(engine)
+        # `create_all` skips tables which already exist, so add any columns
+        # made since
+        columns = {
+            column["name"]
+            for column in sqlalchemy.inspect(engine).get_columns(
+                tables.EsEventSubscription.__tablename__
+            )
+        }
+        with engine.begin() as conn:
+            for name in ("aggregate_type", "event_filter"):
+                if name not in columns:
+                    conn.execute(
+                        sqlalchemy.text(
+                            f"ALTER TABLE {tables.EsEventSubscription.__tablename__}"
+                            f" ADD COLUMN {name} TEXT"
+                        )
+                    )
+            # events written before the counter existed keep their IDs
+            conn.execute(
+                sqlite.insert(tables.EsTransactionCounter)
+                .from_select(
+                    ["id", "last_transaction_id"],
+                    sqlalchemy.select(
+                        sqlalchemy.literal(1),
+                        sqlalchemy.func.coalesce(
+                            sqlalchemy.func.max(tables.EsEvent.transaction_id), 0
+                        ),
+                    )
+                    # without a WHERE, SQLite can't tell where the SELECT ends
+                    .where(sqlalchemy.true()),
+                )
+                .on_conflict_do_nothing()
+            )
 
     def append_event(
         self,
-        session: common.Session,
+        session: common.Executor,
         event: common.NewEventRow,
         assumed_aggregate_type: str,
     ) -> common.RecordedEvent:
@@ -32,6 +122,7 @@ class Client:
 
         The aggregate type is assumed to be known by the caller.
         """
+        tx_id = self._transaction_id(session)
         stmt = (
             sqlalchemy.insert(tables.EsEvent)
             .values(
@@ -39,63 +130,86 @@ class Client:
                 version=event.version,
                 event_type=event.event_type,
                 json_data=event.json,
+                transaction_id=tx_id,
             )
-            .returning(tables.EsEvent.id, tables.EsEvent.transaction_id)
+            .returning(tables.EsEvent.id)
         )
 
-        new_event = session.execute(stmt).fetchone()
+        new_id = session.execute(stmt).scalar_one()
         recorded = common.RecordedEvent(
             aggregate_id=event.aggregate_id,
             aggregate_type=assumed_aggregate_type,
             event_type=event.event_type,
-            id=new_event[0],  # type:ignore
+            id=new_id,
             json=event.json,
-            tx_id=new_event[1],  # type:ignore
+            tx_id=tx_id,
             version=event.version,
+            codec=self._codec,
         )
         return recorded
 
     def create_aggregate_if_absent(
         self,
-        session: common.Session,
+        session: common.Executor,
         aggregate_type: str,
         aggregate_id: str,  # UUID string – SQLAlchemy will coerce to UUID if the column type is UUID
     ) -> None:
-        # start a nested session; if it fails, it's no biggie
-        select = sqlalchemy.select(
-            tables.EsAggregate.version,
-        ).where(tables.EsAggregate.id == aggregate_id)
-        exists = session.execute(select).scalar_one_or_none() is not None
-        if exists:
-            return
-
-        insert = sqlalchemy.insert(tables.EsAggregate).values(
-            id=aggregate_id,
-            version=-1,
-            aggregate_type=aggregate_type,
+        insert = (
+            sqlite.insert(tables.EsAggregate)
+            .values(
+                id=aggregate_id,
+                version=-1,
+                aggregate_type=aggregate_type,
+            )
+            .on_conflict_do_nothing()
         )
         session.execute(insert)
 
     def create_subscription_if_absent(
-        self, session: common.Session, subscription_name: str
+        self,
+        session: common.Executor,
+        subscription_name: str,
+        aggregate_type: t.Optional[str] = None,
+        event_filter: t.Optional[common.EventFilter] = None,
     ) -> None:
+        filter_json = event_filter.to_json() if event_filter is not None else None
         select = sqlalchemy.select(
-            tables.EsEventSubscription.subscription_name,
+            tables.EsEventSubscription.aggregate_type,
+            tables.EsEventSubscription.event_filter,
         ).where(tables.EsEventSubscription.subscription_name == subscription_name)
-        exists = session.execute(select).scalar_one_or_none() is not None
-        if exists:
+        existing = session.execute(select).fetchone()
+        if existing is not None:
+            if (aggregate_type is not None or filter_json is not None) and (
+                existing[0] != aggregate_type or existing[1] != filter_json
+            ):
+                update = (
+                    sqlalchemy.update(tables.EsEventSubscription)
+                    .where(
+                        tables.EsEventSubscription.subscription_name
+                        == subscription_name
+                    )
+                    .values(aggregate_type=aggregate_type, event_filter=filter_json)
+                )
+                session.execute(update)
             return
 
-        insert = sqlalchemy.insert(tables.EsEventSubscription).values(
-            subscription_name=subscription_name,
-            last_transaction_id=0,
-            last_event_id=0,
+        # another process may have just created it
+        insert = (
+            sqlite.insert(tables.EsEventSubscription)
+            .values(
+                subscription_name=subscription_name,
+                last_transaction_id=0,
+                last_event_id=0,
+                aggregate_type=aggregate_type,
+                event_filter=filter_json,
+            )
+            .on_conflict_do_nothing()
         )
         session.execute(insert)
 
     def check_and_update_aggregate_version(
         self,
-        session: common.Session,
+        session: common.Executor,
         aggregate_id: str,
         expected_version: int,
         new_version: int,
@@ -112,6 +226,51 @@ class Client:
         result = session.execute(stmt)
         return result.rowcount == 1
 
+    def count_events_after_checkpoint(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        last_processed_tx_id: int,
+        last_processed_event_id: int,
+        limit: int,
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Tuple[int, int]:
+        events = (
+            sqlalchemy.select(tables.EsEvent.transaction_id)
+            .join(
+                tables.EsAggregate,
+                tables.EsAggregate.id == tables.EsEvent.aggregate_id,
+            )
+            .where(
+                *_event_filter(aggregate_types, event_types, in_log_order=True),
+                sqlalchemy.tuple_(tables.EsEvent.transaction_id, tables.EsEvent.id)
+                > sqlalchemy.tuple_(
+                    sqlalchemy.literal(last_processed_tx_id),
+                    sqlalchemy.literal(last_processed_event_id),
+                ),
+            )
+            .order_by(tables.EsEvent.transaction_id.asc(), tables.EsEvent.id.asc())
+            .limit(limit)
+            .subquery()
+        )
+        stmt = sqlalchemy.select(
+            sqlalchemy.func.count(),
+            sqlalchemy.func.count(sqlalchemy.distinct(events.c.transaction_id)),
+        ).select_from(events)
+        row = session.execute(stmt).one()
+        return int(row[0]), int(row[1])
+
+    def has_caught_up(self, session: common.Executor, tx_id: int) -> bool:
+        """True if there are events from the transaction `tx_id` or later.
+
+        SQLite commits one transaction at a time, so a copy of the database
+        with those has every event written up to `tx_id`.
+        """
+        stmt = sqlalchemy.select(
+            sqlalchemy.exists().where(tables.EsEvent.transaction_id >= tx_id)
+        )
+        return bool(session.execute(stmt).scalar_one())
+
     def read_checkpoint_and_lock_subscription(
         self, session: t.Any, subscription_name: str
     ) -> t.Optional[common.SubCheckpoint]:
@@ -134,7 +293,7 @@ class Client:
         )
 
     def get_aggregate_version(
-        self, session: common.Session, aggregate_type: str, aggregate_id: str
+        self, session: common.Executor, aggregate_type: str, aggregate_id: str
     ) -> t.Optional[int]:
         stmt = sqlalchemy.select(
             tables.EsAggregate.version,
@@ -142,18 +301,34 @@ class Client:
 
         return session.execute(stmt).scalar_one_or_none()
 
-    def read_all_events(
+    def _select_all_events(
         self,
-        session: common.Session,
+        session: common.Executor,
         from_tx_id: t.Optional[int],
         to_tx_id: t.Optional[int],
         limit: int,
-        reverse: bool = False,
-    ) -> t.List[common.RecordedEvent]:
+        reverse: bool,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> t.Sequence[t.Any]:
+        # `committed_only` needs no filter here: SQLite runs one write
+        # transaction at a time, so events can't commit out of order.
         if to_tx_id is None and limit is None:
             raise ValueError(
                 "Neither to_tx_id nor limit is set – too many rows would be returned."
             )
+        if from_tx_id is None:
+            after: sqlalchemy.ColumnElement[bool] = sqlalchemy.true()
+        elif after_event_id is None:
+            after = tables.EsEvent.transaction_id > sqlalchemy.literal(from_tx_id)
+        else:
+            # compares the (transaction_id, id) position, which is what the
+            # events are ordered by
+            after = sqlalchemy.tuple_(
+                tables.EsEvent.transaction_id, tables.EsEvent.id
+            ) > sqlalchemy.tuple_(
+                sqlalchemy.literal(from_tx_id), sqlalchemy.literal(after_event_id)
+            )
         stmt = (
             sqlalchemy.select(
                 tables.EsAggregate.aggregate_type,
@@ -170,24 +345,43 @@ class Client:
             )
             .where(
                 sqlalchemy.and_(
-                    (tables.EsEvent.transaction_id > sqlalchemy.literal(from_tx_id))
-                    if from_tx_id is not None
-                    else sqlalchemy.true(),
+                    after,
                     (tables.EsEvent.transaction_id <= sqlalchemy.literal(to_tx_id))
                     if to_tx_id is not None
                     else sqlalchemy.true(),
                 )
             )
             .order_by(
-                tables.EsEvent.transaction_id.desc()
-                if reverse
-                else tables.EsEvent.transaction_id.asc()
+                *(
+                    (tables.EsEvent.transaction_id.desc(), tables.EsEvent.id.desc())
+                    if reverse
+                    else (tables.EsEvent.transaction_id.asc(), tables.EsEvent.id.asc())
+                )
             )
             .limit(limit)
         )
 
-        rows = session.execute(stmt).fetchall()
+        return session.execute(stmt).fetchall()
 
+    def read_all_events(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> t.List[common.RecordedEvent]:
+        rows = self._select_all_events(
+            session,
+            from_tx_id,
+            to_tx_id,
+            limit,
+            reverse,
+            after_event_id,
+            committed_only,
+        )
         return [
             common.RecordedEvent(
                 aggregate_type=row[0],
@@ -197,13 +391,105 @@ class Client:
                 event_type=row[4],
                 json=row[5],
                 version=row[6],
+                codec=self._codec,
             )
             for row in rows
         ]
 
+    def read_all_events_batch(
+        self,
+        session: common.Executor,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        limit: int,
+        reverse: bool = False,
+        after_event_id: t.Optional[int] = None,
+        committed_only: bool = False,
+    ) -> common.EventBatch:
+        rows = self._select_all_events(
+            session,
+            from_tx_id,
+            to_tx_id,
+            limit,
+            reverse,
+            after_event_id,
+            committed_only,
+        )
+        return common.EventBatch.from_rows(
+            rows,
+            aggregate_type=0,
+            aggregate_id=3,
+            id=1,
+            tx_id=2,
+            event_type=4,
+            json=5,
+            version=6,
+            codec=self._codec,
+        )
+
+    def export_events(
+        self,
+        session: common.Executor,
+        file: t.BinaryIO,
+        from_tx_id: t.Optional[int],
+        to_tx_id: t.Optional[int],
+        aggregate_type: t.Optional[str],
+        format: str,
+    ) -> int:
+        export.check_format(format)
+        stmt = (
+            sqlalchemy.select(
+                tables.EsEvent.id,
+                tables.EsEvent.transaction_id,
+                tables.EsAggregate.aggregate_type,
+                tables.EsEvent.aggregate_id,
+                tables.EsEvent.version,
+                tables.EsEvent.event_type,
+                tables.EsEvent.json_data,
+            )
+            .join(
+                tables.EsAggregate,
+                tables.EsAggregate.id == tables.EsEvent.aggregate_id,
+            )
+            .order_by(tables.EsEvent.transaction_id, tables.EsEvent.id)
+        )
+        if from_tx_id is not None:
+            stmt = stmt.where(tables.EsEvent.transaction_id > from_tx_id)
+        if to_tx_id is not None:
+            stmt = stmt.where(tables.EsEvent.transaction_id <= to_tx_id)
+        if aggregate_type is not None:
+            stmt = stmt.where(tables.EsAggregate.aggregate_type == aggregate_type)
+        result = session.execute(
+            stmt, execution_options={"yield_per": export.ROWS_PER_FETCH}
+        )
+        return export.write_rows(
+            file, (t.cast(export.ExportRow, tuple(row)) for row in result), format
+        )
+
+    def read_head_position(
+        self,
+        session: common.Executor,
+        aggregate_types: t.Sequence[str],
+        event_types: t.Optional[t.Sequence[str]] = None,
+    ) -> t.Optional[common.SubCheckpoint]:
+        stmt = (
+            sqlalchemy.select(tables.EsEvent.transaction_id, tables.EsEvent.id)
+            .join(
+                tables.EsAggregate,
+                tables.EsAggregate.id == tables.EsEvent.aggregate_id,
+            )
+            .where(*_event_filter(aggregate_types, event_types))
+            .order_by(tables.EsEvent.transaction_id.desc(), tables.EsEvent.id.desc())
+            .limit(1)
+        )
+        row = session.execute(stmt).fetchone()
+        if row is None:
+            return None
+        return common.SubCheckpoint(last_tx_id=int(row[0]), last_event_id=row[1])
+
     def read_events_by_aggregate_id(
         self,
-        session: common.Session,
+        session: common.Executor,
         aggregate_id: str,
         limit: int,
         from_version: t.Optional[int],
@@ -251,6 +537,7 @@ class Client:
                 event_type=row[3],
                 json=row[4],
                 version=row[5],
+                codec=self._codec,
             )
             for row in rows
         ]
@@ -258,9 +545,11 @@ class Client:
     def read_events_after_checkpoint(
         self,
         session: t.Any,
-        aggregate_type: str,
+        aggregate_types: t.Sequence[str],
         last_processed_tx_id: int,
         last_processed_event_id: int,
+        limit: t.Optional[int] = None,
+        event_types: t.Optional[t.Sequence[str]] = None,
     ) -> t.List[common.RecordedEvent]:
         stmt = (
             sqlalchemy.select(
@@ -270,13 +559,14 @@ class Client:
                 tables.EsEvent.json_data,
                 tables.EsEvent.version,
                 tables.EsEvent.aggregate_id,
+                tables.EsAggregate.aggregate_type,
             )
             .join(
                 tables.EsAggregate,
                 tables.EsAggregate.id == tables.EsEvent.aggregate_id,
             )
             .where(
-                tables.EsAggregate.aggregate_type == sqlalchemy.literal(aggregate_type),
+                *_event_filter(aggregate_types, event_types, in_log_order=True),
                 sqlalchemy.tuple_(tables.EsEvent.transaction_id, tables.EsEvent.id)
                 > sqlalchemy.tuple_(
                     sqlalchemy.literal(last_processed_tx_id),
@@ -284,25 +574,136 @@ class Client:
                 ),
             )
             .order_by(tables.EsEvent.transaction_id.asc(), tables.EsEvent.id.asc())
+            .limit(limit)
         )
 
         rows = session.execute(stmt).fetchall()
         return [
             common.RecordedEvent(
-                aggregate_type=aggregate_type,
+                aggregate_type=row[6],
                 aggregate_id=row[5],
                 id=row[0],
                 tx_id=int(row[1]),
                 event_type=row[2],
                 json=row[3],
                 version=row[4],
+                codec=self._codec,
+            )
+            for row in rows
+        ]
+
+    def import_events(
+        self, session: common.Executor, events: t.Sequence[common.ImportEventRow]
+    ) -> None:
+        """Appends many events at once using `executemany`.
+
+        The session must be writing, so no one else can change the
+        aggregates' versions once they've been read. Raises ValueError if an
+        aggregate exists with a different type.
+        """
+        aggregate_types: t.Dict[str, str] = {}
+        counts: t.Dict[str, int] = collections.Counter()
+        for event in events:
+            known = aggregate_types.setdefault(event.aggregate_id, event.aggregate_type)
+            if known != event.aggregate_type:
+                raise ValueError(
+                    f"can't import {event.aggregate_type} events to {event.aggregate_id}, which is a {known}"
+                )
+            counts[event.aggregate_id] += 1
+
+        versions: t.Dict[str, int] = {}
+        ids = list(aggregate_types)
+        # stay well below SQLite's limit on the number of bound parameters
+        for start in range(0, len(ids), _IMPORT_IDS_PER_SELECT):
+            select = sqlalchemy.select(
+                tables.EsAggregate.id,
+                tables.EsAggregate.version,
+                tables.EsAggregate.aggregate_type,
+            ).where(
+                tables.EsAggregate.id.in_(ids[start : start + _IMPORT_IDS_PER_SELECT])
+            )
+            for id, version, aggregate_type in session.execute(select):
+                versions[id] = version
+                if aggregate_type != aggregate_types[id]:
+                    raise ValueError(
+                        f"can't import {aggregate_types[id]} events to {id}, which is a {aggregate_type}"
+                    )
+
+        connection = common.core_connection(session)
+        if versions:
+            update = (
+                sqlalchemy.update(tables.EsAggregate)
+                .where(tables.EsAggregate.id == sqlalchemy.bindparam("b_id"))
+                .values(version=sqlalchemy.bindparam("b_new_version"))
+            )
+            connection.execute(
+                update,
+                [
+                    {"b_id": id, "b_new_version": version + counts[id]}
+                    for id, version in versions.items()
+                ],
+            )
+        new_ids = [id for id in ids if id not in versions]
+        if new_ids:
+            connection.execute(
+                sqlalchemy.insert(tables.EsAggregate),
+                [
+                    {
+                        "id": id,
+                        "version": counts[id] - 1,
+                        "aggregate_type": aggregate_types[id],
+                    }
+                    for id in new_ids
+                ],
+            )
+        tx_id = self._transaction_id(connection)
+        connection.execute(
+            sqlalchemy.insert(tables.EsEvent),
+            [
+                {
+                    "transaction_id": tx_id,
+                    "aggregate_id": event.aggregate_id,
+                    "version": versions.get(event.aggregate_id, -1)
+                    + 1
+                    + event.position,
+                    "event_type": event.event_type,
+                    "json_data": event.json,
+                }
+                for event in events
+            ],
+        )
+
+    def read_subscriptions(
+        self, session: common.Executor, subscription_name: t.Optional[str]
+    ) -> t.List[common.SubscriptionInfo]:
+        stmt = sqlalchemy.select(
+            tables.EsEventSubscription.subscription_name,
+            tables.EsEventSubscription.aggregate_type,
+            tables.EsEventSubscription.last_transaction_id,
+            tables.EsEventSubscription.last_event_id,
+            tables.EsEventSubscription.event_filter,
+        ).order_by(tables.EsEventSubscription.subscription_name)
+        if subscription_name is not None:
+            stmt = stmt.where(
+                tables.EsEventSubscription.subscription_name == subscription_name
+            )
+        rows = session.execute(stmt).fetchall()
+        return [
+            common.SubscriptionInfo(
+                subscription_name=row[0],
+                aggregate_type=row[1],
+                last_tx_id=int(row[2]),
+                last_event_id=row[3],
+                event_filter=(
+                    common.EventFilter.from_json(row[4]) if row[4] is not None else None
+                ),
             )
             for row in rows
         ]
 
     def update_event_subscription(
         self,
-        session: common.Session,
+        session: common.Executor,
         subscription_name: str,
         last_tx_id: int,
         last_event_id: int,
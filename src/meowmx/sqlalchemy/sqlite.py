@@ -0,0 +1,161 @@
+import collections
+import threading
+import typing as t
+import weakref
+
+from sqlalchemy import Connection, event
+
+from .. import common
+from .client import engine_is_in_memory_db
+
+# Execution option marking a connection whose transactions write. They begin
+# with `BEGIN IMMEDIATE`, taking SQLite's write lock straight away, once the
+# engine's other writers in this process are done.
+WRITE = "meowmx_write"
+
+# Seconds a transaction waits for others to finish before giving up.
+DEFAULT_BUSY_TIMEOUT = 10.0
+
+
+class WriteTimeout(TimeoutError):
+    """Raised when a write transaction waited too long for its turn."""
+
+
+_writer_queues: "weakref.WeakKeyDictionary[common.Engine, _WriterQueue]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class _WriterQueue:
+    """Lets one thread at a time write, in the order they asked to."""
+
+    def __init__(self, timeout: float) -> None:
+        self._timeout = timeout
+        self._condition = threading.Condition()
+        self._waiting: t.Deque[int] = collections.deque()
+        self._owner: t.Optional[int] = None
+
+    def held(self) -> bool:
+        return self._owner == threading.get_ident()
+
+    def acquire(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            self._waiting.append(me)
+            try:
+                if not self._condition.wait_for(
+                    lambda: self._owner is None and self._waiting[0] == me,
+                    self._timeout,
+                ):
+                    raise WriteTimeout(
+                        f"waited {self._timeout} seconds for another write transaction to finish"
+                    )
+                self._owner = me
+            finally:
+                self._waiting.remove(me)
+                self._condition.notify_all()
+
+    def release(self) -> None:
+        with self._condition:
+            self._owner = None
+            self._condition.notify_all()
+
+
+def thread_is_writing(engine: common.Engine) -> bool:
+    """Returns True if this thread has a write transaction open on the
+    engine, which must be finished before it can begin another."""
+    writers = _writer_queues.get(engine)
+    return writers is not None and writers.held()
+
+
+def configure_engine(
+    engine: common.Engine,
+    busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+    write_timeout: t.Optional[float] = None,
+) -> None:
+    """Sets up a SQLite engine to be used by many threads at once.
+
+    Database files are switched to write-ahead logging, so readers don't
+    block the writer or each other, and connections wait up to
+    `busy_timeout` seconds for locks held by other processes. Transactions
+    are begun explicitly: `BEGIN` for reads, and `BEGIN IMMEDIATE` for
+    connections with the `WRITE` execution option, which first queue behind
+    this process's other writers. That way a write transaction can't fail
+    part way through because another got the write lock first. In-memory
+    databases have a single connection, so every transaction queues.
+
+    A transaction which has queued for `write_timeout` seconds, by default
+    `busy_timeout`, raises `WriteTimeout`. Subscriptions treat that like
+    finding no events and try again after backing off.
+
+    SQLite has no row locks, so subscriptions don't skip a checkpoint which
+    is in use the way they do on Postgres: workers sharing a subscription
+    take turns handling batches, queueing like any other writer.
+
+    `meowmx.Client` calls this for SQLite engines. It does nothing if the
+    engine has already been set up, so call it first for different
+    timeouts.
+    """
+    if engine.dialect.name != "sqlite" or engine in _writer_queues:
+        return
+    in_memory = engine_is_in_memory_db(engine)
+    writers = _WriterQueue(busy_timeout if write_timeout is None else write_timeout)
+    _writer_queues[engine] = writers
+    # connections whose transaction is holding the writer queue
+    holders: "weakref.WeakSet[Connection]" = weakref.WeakSet()
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection: t.Any, connection_record: t.Any) -> None:
+        # stop the driver from beginning transactions itself, so `begin`
+        # below can say how
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+            if not in_memory:
+                cursor.execute("PRAGMA journal_mode = WAL")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def begin(connection: Connection) -> None:
+        write = bool(connection.get_execution_options().get(WRITE, False))
+        if in_memory or write:
+            if writers.held():
+                if in_memory:
+                    # there's only one connection, so this joins the
+                    # transaction the thread already has open
+                    return
+                raise RuntimeError(
+                    "this thread is already writing to the database in another "
+                    "transaction; pass its session instead"
+                )
+            writers.acquire()
+            holders.add(connection)
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE" if write else "BEGIN")
+        except BaseException:
+            end(connection)
+            raise
+
+    def end(connection: Connection) -> None:
+        if connection in holders:
+            holders.discard(connection)
+            writers.release()
+
+    # The events come before the driver is told to commit or roll back, so
+    # do it here, letting the next writer in only once it's finished. The
+    # driver's own call then finds no transaction and does nothing.
+    @event.listens_for(engine, "commit")
+    def commit(connection: Connection) -> None:
+        try:
+            t.cast(t.Any, connection.connection.driver_connection).commit()
+        finally:
+            end(connection)
+
+    @event.listens_for(engine, "rollback")
+    def rollback(connection: Connection) -> None:
+        try:
+            t.cast(t.Any, connection.connection.driver_connection).rollback()
+        finally:
+            end(connection)
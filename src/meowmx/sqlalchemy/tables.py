@@ -82,3 +82,20 @@ class EsEventSubscription(Base):
     subscription_name = mapped_column(Text, primary_key=True)
     last_transaction_id = mapped_column(BigInteger, nullable=False)
     last_event_id = mapped_column(BigInteger, nullable=False)
+    aggregate_type = mapped_column(Text, nullable=True)
+    # JSON set when the subscription reads several aggregate types or only
+    # some event types
+    event_filter = mapped_column(Text, nullable=True)
+
+
+class EsTransactionCounter(Base):
+    """Holds the last transaction ID given to events, in a single row.
+
+    SQLite has nothing like Postgres's transaction IDs, so each transaction
+    which writes events bumps this once and gives them all the new value.
+    """
+
+    __tablename__ = "es_transaction_counter"
+
+    id = mapped_column(Integer, primary_key=True)
+    last_transaction_id = mapped_column(BigInteger, nullable=False)
@@ -1,4 +1,3 @@
-import json
 import typing as t
 
 import coolname  # type: ignore
@@ -38,7 +37,7 @@ class Aggregate:
 
     def apply(self, event: meowmx.NewEvent) -> None:
         if event.event_type == "Start":
-            self._id = json.loads(event.json)["id"]
+            self._id = event.data["id"]
             self._current_state = "new"
         elif event.event_type == "Finish":
             self._current_state = "old"
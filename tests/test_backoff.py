@@ -0,0 +1,141 @@
+import json
+import random
+import threading
+import time
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+from meowmx import backoff
+from meowmx.backoff import BackoffCalc, relay
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def test_backoff_doubles_up_to_max() -> None:
+    backoff = BackoffCalc(1, 5)
+    assert [backoff.failure() for _ in range(5)] == [1, 2, 4, 5, 5]
+    backoff.success()
+    assert backoff.failure() == 1
+
+
+def test_backoff_sub_second_with_factor() -> None:
+    backoff = BackoffCalc(0.05, 1.0, factor=3)
+    assert [backoff.failure() for _ in range(5)] == pytest.approx(
+        [0.05, 0.15, 0.45, 1.0, 1.0]
+    )
+
+
+def test_backoff_with_jitter_stays_in_bounds() -> None:
+    backoff = BackoffCalc(0.1, 2.0, jitter=True, rng=random.Random(1234))
+    waits = [backoff.failure() for _ in range(100)]
+    assert all(0.1 <= wait <= 2.0 for wait in waits)
+    # the waits shouldn't all be the same
+    assert len(set(waits)) > 50
+
+    other = BackoffCalc(0.1, 2.0, jitter=True, rng=random.Random(4321))
+    assert waits[:10] != [other.failure() for _ in range(10)]
+
+
+def test_backoff_wait_returns_early_when_event_is_set() -> None:
+    backoff = BackoffCalc(10, 10)
+    wakeup = threading.Event()
+    threading.Timer(0.1, wakeup.set).start()
+    start = time.monotonic()
+    assert backoff.wait(wakeup)
+    assert time.monotonic() - start < 5
+
+
+def test_backoff_wait_times_out() -> None:
+    backoff = BackoffCalc(0.05, 0.05)
+    assert not backoff.wait(threading.Event())
+    assert not backoff.wait()
+
+
+def test_relay() -> None:
+    stop_signal = threading.Event()
+    wakeup = threading.Event()
+    relay(stop_signal, wakeup)
+    threading.Timer(0.1, stop_signal.set).start()
+    start = time.monotonic()
+    assert BackoffCalc(10, 10).wait(wakeup)
+    assert time.monotonic() - start < 5
+
+    # a source which is already set sets the target straight away
+    wakeup.clear()
+    relay(stop_signal, wakeup)
+    assert wakeup.is_set()
+
+    # nothing is set once the relay is cancelled
+    source = threading.Event()
+    cancelled = threading.Event()
+    kept = threading.Event()
+    relay(source, cancelled)()
+    relay(source, kept)
+    source.set()
+    assert kept.wait(5)
+    assert not cancelled.is_set()
+
+
+def test_cancelled_relays_stop_their_watchers(monkeypatch: t.Any) -> None:
+    monkeypatch.setattr(backoff, "_WATCH_INTERVAL", 0.01)
+    source = threading.Event()
+    before = set(threading.enumerate())
+    cancels = [relay(source, threading.Event()) for _ in range(2)]
+    watchers = [thread for thread in threading.enumerate() if thread not in before]
+    assert [thread.name for thread in watchers] == ["meowmx-relay"]
+    cancels[0]()
+    assert source in backoff._relay_targets
+    # the source is never set, but once the last relay is gone so is its thread
+    cancels[1]()
+    assert source not in backoff._relay_targets
+    for thread in watchers:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def test_sub_wakes_up_when_events_are_saved(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-wake-{_generate_slug()}"
+    stop_signal = threading.Event()
+    handled = threading.Event()
+    errors: t.List[Exception] = []
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        handled.set()
+
+    def run_sub() -> None:
+        try:
+            meow.sub(
+                f"{aggregate_type}-sub",
+                aggregate_type,
+                handler=handler,
+                min_sleep_time=30,
+                max_sleep_time=30,
+                stop_signal=stop_signal,
+            )
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run_sub)
+    thread.start()
+    try:
+        # give the subscription time to find nothing and go to sleep
+        time.sleep(0.5)
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [meowmx.NewEvent(event_type="Poked", json=json.dumps({}))],
+            version=0,
+        )
+        assert handled.wait(10)
+    finally:
+        stop_signal.set()
+        thread.join(10)
+    assert not thread.is_alive()
+    assert errors == []
@@ -0,0 +1,202 @@
+import json
+import threading
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def test_grows_while_there_is_a_backlog() -> None:
+    batch_size = meowmx.AdaptiveBatchSize(min_size=10, max_size=100, max_tx_time=5)
+    assert batch_size.size == 10
+    assert batch_size.success(10, 0.1, has_more=True) == 20
+    assert batch_size.success(20, 0.2, has_more=True) == 40
+    assert batch_size.success(40, 0.4, has_more=True) == 80
+    assert batch_size.success(80, 0.8, has_more=True) == 100
+    assert batch_size.success(100, 1.0, has_more=True) == 100
+
+
+def test_holds_steady_when_tailing() -> None:
+    batch_size = meowmx.AdaptiveBatchSize(min_size=10, max_size=100, max_tx_time=5)
+    assert batch_size.success(3, 0.03, has_more=False) == 10
+    assert batch_size.success(10, 0.1, has_more=False) == 10
+
+
+def test_does_not_grow_when_handlers_slow_down() -> None:
+    batch_size = meowmx.AdaptiveBatchSize(min_size=10, max_size=100, max_tx_time=50)
+    assert batch_size.success(10, 0.1, has_more=True) == 20
+    # ten times slower per event than before
+    assert batch_size.success(20, 2.0, has_more=True) == 20
+
+
+def test_shrinks_on_long_transactions_and_failures() -> None:
+    batch_size = meowmx.AdaptiveBatchSize(min_size=5, max_size=100, max_tx_time=1)
+    batch_size.success(5, 0.025, has_more=True)
+    batch_size.success(10, 0.05, has_more=True)
+    batch_size.success(20, 0.1, has_more=True)
+    assert batch_size.size == 40
+    assert batch_size.success(40, 1.5, has_more=True) == 20
+    assert batch_size.failure() == 10
+    assert batch_size.failure() == 5
+    assert batch_size.failure() == 5
+
+
+def test_stays_within_transaction_time_budget() -> None:
+    batch_size = meowmx.AdaptiveBatchSize(min_size=1, max_size=1000, max_tx_time=1)
+    batch_size.success(1, 0.1, has_more=True)
+    for _ in range(10):
+        batch_size.success(batch_size.size, batch_size.size * 0.1, has_more=True)
+    assert batch_size.size <= 10
+
+
+def test_rejects_bad_arguments() -> None:
+    with pytest.raises(ValueError):
+        meowmx.AdaptiveBatchSize(min_size=0)
+    with pytest.raises(ValueError):
+        meowmx.AdaptiveBatchSize(min_size=10, max_size=5)
+    with pytest.raises(ValueError):
+        meowmx.AdaptiveBatchSize(max_tx_time=0)
+    with pytest.raises(ValueError):
+        meowmx.AdaptiveBatchSize(growth_factor=1)
+
+
+class BatchSizeRecorder(meowmx.Hooks):
+    def __init__(self) -> None:
+        self.sizes: t.List[int] = []
+
+    def subscription_batch_size(self, subscription_name: str, batch_size: int) -> None:
+        self.sizes.append(batch_size)
+
+
+def test_sub_with_adaptive_batch_size(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    recorder = BatchSizeRecorder()
+    hooked_meow = meowmx.Client(
+        engine=engine, session_maker=session_maker, hooks=recorder
+    )
+    aggregate_type = f"meowmx-abs-{_generate_slug()}"
+    event_count = 60
+    for i in range(event_count):
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))],
+            version=0,
+        )
+
+    seen: t.List[int] = []
+    stop_signal = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        seen.append(json.loads(event.json)["i"])
+        if len(seen) == event_count:
+            stop_signal.set()
+
+    hooked_meow.sub(
+        f"{aggregate_type}-sub",
+        aggregate_type,
+        handler=handler,
+        batch_size=meowmx.AdaptiveBatchSize(min_size=2, max_size=32),
+        stop_signal=stop_signal,
+    )
+
+    assert seen == list(range(event_count))
+    assert recorder.sizes[0] == 2
+    assert max(recorder.sizes) > 2
+    assert max(recorder.sizes) <= 32
+
+
+def test_sub_shrinks_batches_after_failures(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    recorder = BatchSizeRecorder()
+    hooked_meow = meowmx.Client(
+        engine=engine, session_maker=session_maker, hooks=recorder
+    )
+    aggregate_type = f"meowmx-abs-{_generate_slug()}"
+    event_count = 10
+    for i in range(event_count):
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))],
+            version=0,
+        )
+
+    seen: t.List[int] = []
+    failures = 0
+    stop_signal = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        nonlocal failures
+        i = json.loads(event.json)["i"]
+        # fails a couple of times, then works
+        if i == 5 and failures < 2:
+            failures += 1
+            raise RuntimeError("not yet")
+        seen.append(i)
+        if len(seen) == event_count:
+            stop_signal.set()
+
+    batch_size = meowmx.AdaptiveBatchSize(min_size=1, max_size=8)
+    # grow it first, so there's room to shrink
+    batch_size.success(1, 0.001, has_more=True)
+    batch_size.success(2, 0.002, has_more=True)
+    batch_size.success(4, 0.004, has_more=True)
+    assert batch_size.size == 8
+    hooked_meow.sub(
+        f"{aggregate_type}-sub",
+        aggregate_type,
+        handler=handler,
+        batch_size=batch_size,
+        stop_signal=stop_signal,
+        min_sleep_time=0.01,
+    )
+    assert seen == list(range(event_count))
+    assert recorder.sizes[:3] == [8, 4, 2]
+
+
+def test_sub_raises_once_batches_cant_shrink(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-abs-{_generate_slug()}"
+    meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [meowmx.NewEvent(event_type="Counted", json="{}")],
+        version=0,
+    )
+    attempts = 0
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        nonlocal attempts
+        attempts += 1
+        raise RuntimeError("never works")
+
+    batch_size = meowmx.AdaptiveBatchSize(min_size=2, max_size=8)
+    batch_size.success(2, 0.002, has_more=True)
+    batch_size.success(4, 0.004, has_more=True)
+    assert batch_size.size == 8
+    with pytest.raises(RuntimeError):
+        meow.sub(
+            f"{aggregate_type}-sub",
+            aggregate_type,
+            handler=handler,
+            batch_size=batch_size,
+        )
+    # tried with 8, 4 and then 2
+    assert attempts == 3
+    assert batch_size.size == 2
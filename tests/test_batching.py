@@ -0,0 +1,91 @@
+import concurrent.futures
+import threading
+import typing as t
+
+import coolname  # type: ignore
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def test_batching_writer(meow: meowmx.Client, new_uuid: t.Callable[[], str]) -> None:
+    aggregate_type = f"meowmx-batching-{_generate_slug()}"
+    aggregate_ids = [new_uuid() for _ in range(3)]
+    # the first events are already there, so the writer has to append
+    meow.save_events(
+        aggregate_type,
+        aggregate_ids[0],
+        [meowmx.NewEvent(event_type="Counted", data={"thread": -1})],
+        version=0,
+    )
+    futures: t.List[concurrent.futures.Future[t.List[meowmx.RecordedEvent]]] = []
+    futures_lock = threading.Lock()
+
+    with meowmx.BatchingWriter(meow, max_delay=0.05) as writer:
+
+        def write(thread: int) -> None:
+            for i in range(10):
+                future = writer.write(
+                    aggregate_type,
+                    aggregate_ids[i % 3],
+                    [meowmx.NewEvent(event_type="Counted", data={"thread": thread})],
+                )
+                with futures_lock:
+                    futures.append(future)
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    recorded = [event for future in futures for event in future.result(timeout=10)]
+    assert len(recorded) == 40
+    # far fewer transactions than writes
+    assert len({event.tx_id for event in recorded}) < 40
+    for aggregate_id in aggregate_ids:
+        events = meow.load_events(aggregate_type, aggregate_id)
+        assert [event.version for event in events] == list(range(len(events)))
+    assert sorted(event.id for event in recorded) == sorted(
+        event.id
+        for aggregate_id in aggregate_ids
+        for event in meow.load_events(aggregate_type, aggregate_id)
+        if event.data["thread"] != -1
+    )
+
+
+def test_batching_writer_saves_on_close(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-batching-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    # long enough that only closing would save it
+    writer = meowmx.BatchingWriter(meow, max_delay=60)
+    future = writer.write(
+        aggregate_type, aggregate_id, [meowmx.NewEvent(event_type="Counted", data={})]
+    )
+    writer.close()
+
+    assert future.result(timeout=0) == meow.load_events(aggregate_type, aggregate_id)
+
+
+def test_closing_the_client_closes_writers(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    aggregate_type = f"meowmx-batching-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    with meowmx.Client(engine=engine, session_maker=session_maker) as client:
+        writer = meowmx.BatchingWriter(client, max_delay=60)
+        future = writer.write(
+            aggregate_type,
+            aggregate_id,
+            [meowmx.NewEvent(event_type="Counted", data={})],
+        )
+    assert not writer._thread.is_alive()
+    assert future.result(timeout=0) == meow.load_events(aggregate_type, aggregate_id)
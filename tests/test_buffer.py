@@ -106,6 +106,13 @@ class Aggregate:
     def collect_pending_events(self) -> meowmx.PendingEvents:
         return self._events.collect_pending_events()
 
+    @property
+    def db_version(self) -> int:
+        return self._events.db_version
+
+    def catch_up(self, recorded_events: t.List[meowmx.RecordedEvent]) -> None:
+        self._events.catch_up(recorded_events)
+
     def finish(self) -> None:
         self._events.emit(Finish())
 
@@ -147,3 +154,108 @@ def test_save_load_aggregate(
     agg._current_state == "reborn"
     with pytest.raises(meowmx.ExpectedVersionFailure):
         meow.save_aggregate(agg)
+
+
+def test_execute_catches_up_after_conflicts(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    new_id = new_uuid()
+    meow.save_aggregate(Aggregate(new_id=new_id))
+    loaded_from: t.List[t.Optional[int]] = []
+    load_events = meow.load_events
+
+    def spy(*args: t.Any, **kwargs: t.Any) -> t.List[meowmx.RecordedEvent]:
+        loaded_from.append(kwargs.get("from_version"))
+        return load_events(*args, **kwargs)
+
+    meow.load_events = spy  # type: ignore
+    calls = 0
+
+    def finish(agg: Aggregate) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            # someone else gets there first
+            other = Aggregate(
+                recorded_events=load_events(Aggregate.aggregate_type, new_id)
+            )
+            other.restart()
+            meow.save_aggregate(other)
+        agg.finish()
+
+    agg = meow.execute(Aggregate, new_id, finish)
+
+    assert calls == 2
+    assert agg._current_state == "old"
+    # the first attempt read everything, the retry only the new event
+    assert loaded_from == [0, 1]
+    events = load_events(Aggregate.aggregate_type, new_id)
+    assert [e.event_type for e in events] == ["Start", "Restart", "Finish"]
+
+
+def test_execute_gives_up(meow: meowmx.Client, new_uuid: t.Callable[[], str]) -> None:
+    new_id = new_uuid()
+    meow.save_aggregate(Aggregate(new_id=new_id))
+    calls = 0
+
+    def always_beaten(agg: Aggregate) -> None:
+        nonlocal calls
+        calls += 1
+        other = meow.load_aggregate(Aggregate, new_id)
+        other.restart()
+        meow.save_aggregate(other)
+        agg.finish()
+
+    with pytest.raises(meowmx.ExpectedVersionFailure):
+        meow.execute(Aggregate, new_id, always_beaten, retries=2)
+    assert calls == 3
+
+
+def test_refresh_aggregate(meow: meowmx.Client, new_uuid: t.Callable[[], str]) -> None:
+    new_id = new_uuid()
+    agg = Aggregate(new_id=new_id)
+    meow.save_aggregate(agg)
+    assert meow.refresh_aggregate(agg) == []
+
+    other = meow.load_aggregate(Aggregate, new_id)
+    other.finish()
+    meow.save_aggregate(other)
+    other.restart()
+    meow.save_aggregate(other)
+
+    caught_up = meow.refresh_aggregate(agg)
+    assert [e.event_type for e in caught_up] == ["Finish", "Restart"]
+    assert agg._current_state == "reborn"
+    assert agg.db_version == other.db_version
+
+    # it can carry on from where it's got to
+    agg.finish()
+    meow.save_aggregate(agg)
+    meow.refresh_aggregate(other)
+    assert other._current_state == "old"
+
+
+def test_catch_up_checks_versions() -> None:
+    def recorded(version: int, event_type: str) -> meowmx.RecordedEvent:
+        return meowmx.RecordedEvent(
+            aggregate_type=Aggregate.aggregate_type,
+            aggregate_id="a",
+            event_type=event_type,
+            id=version,
+            json='{"id": "a"}' if event_type == "Start" else "{}",
+            tx_id=version,
+            version=version,
+        )
+
+    agg = Aggregate(recorded_events=[recorded(0, "Start")])
+    # events it already has are skipped
+    agg.catch_up([recorded(0, "Start"), recorded(1, "Finish")])
+    assert agg.db_version == 1
+    assert agg._current_state == "old"
+
+    with pytest.raises(RuntimeError):
+        agg.catch_up([recorded(3, "Restart")])
+
+    agg.restart()
+    with pytest.raises(RuntimeError):
+        agg.catch_up([recorded(2, "Restart")])
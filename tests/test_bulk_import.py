@@ -0,0 +1,82 @@
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def _events(start: int, count: int) -> t.List[meowmx.NewEvent]:
+    return [
+        meowmx.NewEvent(event_type="Counted", data={"i": i})
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [2, 1_000])
+def test_bulk_import(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str], batch_size: int
+) -> None:
+    aggregate_type = f"meowmx-import-{_generate_slug()}"
+    existing_id = new_uuid()
+    new_id = new_uuid()
+    meow.save_events(aggregate_type, existing_id, _events(0, 2), version=0)
+
+    imported = meow.bulk_import(
+        [
+            (aggregate_type, new_id, _events(0, 3)),
+            (aggregate_type, existing_id, _events(2, 3)),
+            (aggregate_type, new_id, _events(3, 2)),
+        ],
+        batch_size=batch_size,
+    )
+    assert imported == 8
+
+    for aggregate_id, count in ((existing_id, 5), (new_id, 5)):
+        events = meow.load_events(aggregate_type, aggregate_id)
+        assert [e.version for e in events] == list(range(count))
+        assert [e.data for e in events] == [{"i": i} for i in range(count)]
+        assert all(e.aggregate_type == aggregate_type for e in events)
+
+    # the aggregate versions were moved along, so normal saves carry on
+    meow.save_events(aggregate_type, new_id, _events(5, 1), version=5)
+    assert len(meow.load_events(aggregate_type, new_id)) == 6
+
+
+def test_bulk_import_rejects_aggregate_type_mismatch(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-import-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    meow.save_events(aggregate_type, aggregate_id, _events(0, 1), version=0)
+
+    with pytest.raises(ValueError):
+        meow.bulk_import([(f"{aggregate_type}-other", aggregate_id, _events(1, 2))])
+    assert len(meow.load_events(aggregate_type, aggregate_id)) == 1
+
+
+def test_bulk_import_splits_long_streams(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-import-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    written: t.List[int] = []
+
+    def stream() -> t.Iterator[meowmx.NewEvent]:
+        for i in range(5):
+            # the events before the last full batch are already written
+            written.append(len(meow.load_events(aggregate_type, aggregate_id)))
+            yield from _events(i, 1)
+
+    assert (
+        meow.bulk_import([(aggregate_type, aggregate_id, stream())], batch_size=2) == 5
+    )
+    assert written == [0, 0, 2, 2, 4]
+    events = meow.load_events(aggregate_type, aggregate_id)
+    assert [e.version for e in events] == list(range(5))
+    assert [e.data for e in events] == [{"i": i} for i in range(5)]
+    assert len({e.tx_id for e in events}) == 3
@@ -0,0 +1,103 @@
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+class CountingCodec(meowmx.JsonCodec):
+    def __init__(self) -> None:
+        self.encoded = 0
+        self.decoded = 0
+
+    def encode(self, data: t.Any) -> str:
+        self.encoded += 1
+        return super().encode(data)
+
+    def decode(self, json_data: t.Union[str, bytes, bytearray]) -> t.Any:
+        self.decoded += 1
+        return super().decode(json_data)
+
+
+def test_new_event_needs_json_or_data() -> None:
+    with pytest.raises(ValueError):
+        meowmx.NewEvent(event_type="Meowed")
+    with pytest.raises(ValueError):
+        meowmx.NewEvent(event_type="Meowed", json="{}", data={})
+
+    assert meowmx.NewEvent("Meowed", '{"volume": 11}').data == {"volume": 11}
+    event = meowmx.NewEvent(event_type="Meowed", data={"volume": 11})
+    assert event.json is None
+    assert event.encode_json(meowmx.JsonCodec()) == '{"volume": 11}'
+
+
+def test_new_events_built_from_data() -> None:
+    # empty JSON is kept as given rather than taken to mean "not encoded"
+    empty = meowmx.NewEvent("Meowed", json="")
+    assert empty.encode_json(meowmx.JsonCodec()) == ""
+
+    event = meowmx.NewEvent("Meowed", data={"volume": 11})
+    assert meowmx.JsonCodec().decode(event.to_event_data()) == {"volume": 11}
+    # the data isn't encoded for good until the client does it
+    assert event.json is None
+
+    assert event == meowmx.NewEvent("Meowed", data={"volume": 11})
+    assert event != meowmx.NewEvent("Meowed", data={"volume": 1})
+    assert event == meowmx.NewEvent("Meowed", '{"volume": 11}')
+    assert event != meowmx.NewEvent("Purred", data={"volume": 11})
+
+
+@pytest.mark.parametrize(
+    "codec_type", [meowmx.JsonCodec, meowmx.OrjsonCodec, meowmx.MsgspecCodec]
+)
+def test_codecs(codec_type: t.Type[meowmx.Codec]) -> None:
+    try:
+        codec = codec_type()
+    except ImportError:
+        pytest.skip(f"{codec_type.__name__} isn't installed")
+    data = {"name": "Mëow", "lives": 9, "toys": ["yarn", None], "hungry": True}
+    json_data = codec.encode(data)
+    assert isinstance(json_data, str)
+    assert codec.decode(json_data) == data
+    assert codec.decode(json_data.encode()) == data
+    assert codec.decode(bytearray(json_data.encode())) == data
+
+
+def test_data_is_encoded_and_decoded_once_by_the_client_codec(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    codec = CountingCodec()
+    meow = meowmx.Client(engine=engine, session_maker=session_maker, codec=codec)
+    aggregate_type = f"meowmx-codecs-{_generate_slug()}"
+    aggregate_id = new_uuid()
+
+    recorded = meow.save_events(
+        aggregate_type,
+        aggregate_id,
+        [
+            meowmx.NewEvent(event_type="Meowed", data={"volume": 11}),
+            meowmx.NewEvent(event_type="Purred", json='{"volume": 2}'),
+        ],
+        version=0,
+    )
+    assert codec.encoded == 1
+    assert [event.json for event in recorded] == ['{"volume": 11}', '{"volume": 2}']
+
+    events = meow.load_events(aggregate_type, aggregate_id)
+    assert codec.decoded == 0
+    assert events[0].data == {"volume": 11}
+    assert events[0].data == {"volume": 11}
+    assert events[1].data == {"volume": 2}
+    assert codec.decoded == 2
+
+    batch = meow.load_all_events_batch(from_tx_id=None, to_tx_id=None, limit=10_000)
+    for index, event in enumerate(batch):
+        assert batch.data(index) == event.data
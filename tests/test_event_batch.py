@@ -0,0 +1,137 @@
+import json
+import typing as t
+
+import coolname  # type: ignore
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def test_events_have_no_dict() -> None:
+    event = meowmx.RecordedEvent(
+        aggregate_type="cat",
+        aggregate_id="1",
+        id=1,
+        tx_id=2,
+        event_type="Meowed",
+        json="{}",
+        version=0,
+    )
+    assert not hasattr(event, "__dict__")
+    assert not hasattr(meowmx.NewEvent(event_type="Meowed", json="{}"), "__dict__")
+
+
+def test_event_batch() -> None:
+    batch = meowmx.EventBatch()
+    assert len(batch) == 0
+    for i in range(3):
+        batch.append(
+            aggregate_type="cat",
+            aggregate_id=f"cat-{i}",
+            id=i + 10,
+            tx_id=i + 100,
+            event_type="Meowed",
+            json=json.dumps({"volume": i, "sound": "mëow"}),
+            version=i,
+        )
+
+    assert len(batch) == 3
+    assert list(batch.ids) == [10, 11, 12]
+    assert list(batch.tx_ids) == [100, 101, 102]
+    assert list(batch.versions) == [0, 1, 2]
+    assert batch.aggregate_types[0] is batch.aggregate_types[2]
+    assert json.loads(batch.json(1)) == {"volume": 1, "sound": "mëow"}
+    assert (
+        bytes(batch.payload(-1)) == json.dumps({"volume": 2, "sound": "mëow"}).encode()
+    )
+
+    event = batch[2]
+    assert event == meowmx.RecordedEvent(
+        aggregate_type="cat",
+        aggregate_id="cat-2",
+        id=12,
+        tx_id=102,
+        event_type="Meowed",
+        json=json.dumps({"volume": 2, "sound": "mëow"}),
+        version=2,
+    )
+    assert batch[-1] == event
+    assert batch[1:] == [batch[1], event]
+    assert list(batch) == batch[:]
+    assert list(meowmx.EventBatch.from_events(batch)) == list(batch)
+
+
+def test_load_all_events_batch(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-batch-{_generate_slug()}"
+    meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [
+            meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))
+            for i in range(5)
+        ],
+        version=0,
+    )
+
+    events = meow.load_all_events(from_tx_id=None, to_tx_id=None, limit=10_000)
+    batch = meow.load_all_events_batch(from_tx_id=None, to_tx_id=None, limit=10_000)
+    assert list(batch) == events
+
+
+def test_batch_payloads_match_event_json(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-batch-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    meow.save_events(
+        aggregate_type,
+        aggregate_id,
+        [
+            meowmx.NewEvent(event_type="Named", data={"name": "Mëow", "lives": 9}),
+            meowmx.NewEvent(event_type="Toys", data={"toys": ["yarn", None]}),
+        ],
+        version=0,
+    )
+
+    batch = meow.load_all_events_batch(from_tx_id=None, to_tx_id=None, limit=10_000)
+    mine = [i for i, id in enumerate(batch.aggregate_ids) if str(id) == aggregate_id]
+    assert len(mine) == 2
+    for index in mine:
+        event = batch[index]
+        assert bytes(batch.payload(index)) == event.json.encode()
+        assert batch.data(index) == json.loads(event.json)
+    assert [batch.data(i) for i in mine] == [
+        {"name": "Mëow", "lives": 9},
+        {"toys": ["yarn", None]},
+    ]
+
+
+class _UpperCodec(meowmx.JsonCodec):
+    def decode(self, json_data: t.Union[str, bytes, bytearray]) -> t.Any:
+        return {key.upper(): value for key, value in super().decode(json_data).items()}
+
+
+def test_event_batch_from_events_keeps_codec() -> None:
+    codec = _UpperCodec()
+    event = meowmx.RecordedEvent(
+        aggregate_type="cat",
+        aggregate_id="1",
+        id=1,
+        tx_id=2,
+        event_type="Meowed",
+        json='{"volume": 1}',
+        version=0,
+        codec=codec,
+    )
+    batch = meowmx.EventBatch.from_events([event])
+    assert batch.codec is codec
+    assert batch[0].data == {"VOLUME": 1}
+    assert batch.data(0) == {"VOLUME": 1}
+
+    other = meowmx.JsonCodec()
+    assert meowmx.EventBatch.from_events([event], codec=other)[0].data == {"volume": 1}
@@ -0,0 +1,118 @@
+import io
+import json
+import struct
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+from meowmx.common import export
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def _read_binary(data: bytes) -> t.List[t.Tuple[t.Any, ...]]:
+    assert data.startswith(export.BINARY_HEADER)
+    offset = len(export.BINARY_HEADER)
+    rows = []
+    while True:
+        (count,) = struct.unpack_from("!h", data, offset)
+        offset += 2
+        if count == -1:
+            break
+        fields = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("!i", data, offset)
+            offset += 4
+            fields.append(data[offset : offset + length])
+            offset += length
+        id, tx_id, aggregate_type, aggregate_id, version, event_type, json_data = fields
+        rows.append(
+            (
+                struct.unpack("!q", id)[0],
+                struct.unpack("!q", tx_id)[0],
+                aggregate_type.decode(),
+                aggregate_id.decode(),
+                struct.unpack("!i", version)[0],
+                event_type.decode(),
+                json.loads(json_data),
+            )
+        )
+    assert offset == len(data)
+    return rows
+
+
+def test_export_events(meow: meowmx.Client, new_uuid: t.Callable[[], str]) -> None:
+    aggregate_type = f"meowmx-export-{_generate_slug()}"
+    aggregate_ids = [new_uuid(), new_uuid()]
+    for aggregate_id in aggregate_ids:
+        meow.save_events(
+            aggregate_type,
+            aggregate_id,
+            [
+                meowmx.NewEvent(event_type="Meowed", data={"i": i, "s": 'më\\o"w\n'})
+                for i in range(3)
+            ],
+            version=0,
+        )
+    meow.save_events(
+        f"{aggregate_type}-other",
+        new_uuid(),
+        [meowmx.NewEvent(event_type="Meowed", data={})],
+        version=0,
+    )
+
+    ndjson = io.BytesIO()
+    assert meow.export_events(ndjson, aggregate_type=aggregate_type) == 6
+    lines = [json.loads(line) for line in ndjson.getvalue().splitlines()]
+    assert [(line["aggregate_id"].strip(), line["version"]) for line in lines] == [
+        (aggregate_id, version)
+        for aggregate_id in aggregate_ids
+        for version in range(3)
+    ]
+    assert all(line["aggregate_type"] == aggregate_type for line in lines)
+    assert [line["data"] for line in lines[:3]] == [
+        {"i": i, "s": 'më\\o"w\n'} for i in range(3)
+    ]
+    events = meow.load_events(aggregate_type, aggregate_ids[0])
+    assert [(line["id"], line["tx_id"]) for line in lines[:3]] == [
+        (event.id, event.tx_id) for event in events
+    ]
+
+    binary = io.BytesIO()
+    count = meow.export_events(binary, aggregate_type=aggregate_type, format="binary")
+    assert count == 6
+    assert _read_binary(binary.getvalue()) == [
+        (
+            line["id"],
+            line["tx_id"],
+            line["aggregate_type"],
+            line["aggregate_id"],
+            line["version"],
+            line["event_type"],
+            line["data"],
+        )
+        for line in lines
+    ]
+
+    # a transaction range with nothing in it
+    first_tx_id = lines[0]["tx_id"]
+    empty = io.BytesIO()
+    assert (
+        meow.export_events(
+            empty,
+            from_tx_id=first_tx_id,
+            to_tx_id=first_tx_id,
+            aggregate_type=aggregate_type,
+        )
+        == 0
+    )
+    assert empty.getvalue() == b""
+
+
+def test_export_events_rejects_unknown_formats(meow: meowmx.Client) -> None:
+    with pytest.raises(ValueError):
+        meow.export_events(io.BytesIO(), format="csv")
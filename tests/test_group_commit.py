@@ -0,0 +1,185 @@
+import threading
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+from meowmx import sqlalchemy as meowmx_sqlalchemy
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def test_group_commit(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    aggregate_type = f"meowmx-group-{_generate_slug()}"
+    existing_id = new_uuid()
+    meow.save_events(
+        aggregate_type,
+        existing_id,
+        [meowmx.NewEvent(event_type="Counted", data={})],
+        version=0,
+    )
+    with meowmx.Client(
+        engine=engine, session_maker=session_maker, group_commit_delay=0.2
+    ) as grouped:
+        outcomes: t.Dict[int, t.Union[t.List[meowmx.RecordedEvent], Exception]] = {}
+        aggregate_ids = [new_uuid() for _ in range(4)]
+
+        def save(n: int) -> None:
+            try:
+                if n == len(aggregate_ids):
+                    # this one conflicts
+                    outcomes[n] = grouped.save_events(
+                        aggregate_type,
+                        existing_id,
+                        [meowmx.NewEvent(event_type="Counted", data={})],
+                        version=0,
+                    )
+                else:
+                    outcomes[n] = grouped.save_events(
+                        aggregate_type,
+                        aggregate_ids[n],
+                        [meowmx.NewEvent(event_type="Counted", data={"n": n})],
+                        version=0,
+                    )
+            except Exception as error:
+                outcomes[n] = error
+
+        threads = [
+            threading.Thread(target=save, args=(n,))
+            for n in range(len(aggregate_ids) + 1)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert isinstance(
+            outcomes.pop(len(aggregate_ids)), meowmx.ExpectedVersionFailure
+        )
+        saved = [outcomes[n] for n in range(len(aggregate_ids))]
+        for n, recorded in enumerate(saved):
+            assert not isinstance(recorded, Exception)
+            assert recorded == meow.load_events(aggregate_type, aggregate_ids[n])
+        # they were committed together
+        assert (
+            len({event.tx_id for recorded in saved for event in t.cast(list, recorded)})
+            == 1
+        )
+        assert len(meow.load_events(aggregate_type, existing_id)) == 1
+    assert grouped._group_committer is not None
+    # closing the client stopped its committer
+    assert not grouped._group_committer._thread.is_alive()
+
+
+def test_group_commit_keeps_sessions(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    with meowmx.Client(
+        engine=engine, session_maker=session_maker, group_commit_delay=60
+    ) as grouped:
+        aggregate_type = f"meowmx-group-{_generate_slug()}"
+        aggregate_id = new_uuid()
+        with session_maker() as session:
+            with session.begin():
+                # saved straight away in the caller's transaction, not queued
+                recorded = grouped.save_events(
+                    aggregate_type,
+                    aggregate_id,
+                    [meowmx.NewEvent(event_type="Counted", data={})],
+                    version=0,
+                    session=session,
+                )
+        assert recorded == meow.load_events(aggregate_type, aggregate_id)
+
+
+class _Stopped(BaseException):
+    pass
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_group_commit_fails_waiting_saves_when_stopped(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    with meowmx.Client(
+        engine=engine, session_maker=session_maker, group_commit_delay=0.01
+    ) as grouped:
+
+        def stop(saves: t.Any) -> t.Any:
+            raise _Stopped()
+
+        grouped._save_each = stop  # type: ignore
+        aggregate_type = f"meowmx-group-{_generate_slug()}"
+        with pytest.raises(_Stopped):
+            grouped.save_events(
+                aggregate_type,
+                new_uuid(),
+                [meowmx.NewEvent(event_type="Counted", data={})],
+                version=0,
+            )
+        # the committer has gone, so later saves fail rather than wait forever
+        with pytest.raises(RuntimeError):
+            grouped.save_events(
+                aggregate_type,
+                new_uuid(),
+                [meowmx.NewEvent(event_type="Counted", data={})],
+                version=0,
+            )
+
+
+def test_group_commit_skipped_by_sqlite_writers(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    if engine.dialect.name != "sqlite":
+        pytest.skip("only SQLite has a single writer")
+    with meowmx.Client(
+        engine=engine, session_maker=session_maker, group_commit_delay=60
+    ) as grouped:
+        aggregate_type = f"meowmx-group-{_generate_slug()}"
+        subscription_name = f"{aggregate_type}-sub"
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [meowmx.NewEvent(event_type="Counted", data={})],
+            version=0,
+        )
+        grouped.register_subscription(subscription_name)
+        outcomes: t.List[t.Optional[Exception]] = []
+
+        def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+            # not queued behind the subscription's own transaction
+            try:
+                grouped.save_events(
+                    f"{aggregate_type}-other",
+                    new_uuid(),
+                    [meowmx.NewEvent(event_type="Counted", data={})],
+                    version=0,
+                )
+                outcomes.append(None)
+            except RuntimeError as error:
+                outcomes.append(error)
+
+        grouped._handle_subscription_events(
+            subscription_name, aggregate_type, 10, handler
+        )
+        assert len(outcomes) == 1
+        if meowmx_sqlalchemy.engine_is_in_memory_db(engine):
+            # there's one connection, so the save joins the transaction
+            assert outcomes[0] is None
+        else:
+            assert isinstance(outcomes[0], RuntimeError)
@@ -0,0 +1,199 @@
+import json
+import threading
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+import sqlalchemy
+
+import meowmx
+from meowmx.hooks import OpenTelemetryHooks, PrometheusHooks
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+class RecordingHooks(meowmx.Hooks):
+    def __init__(self) -> None:
+        self.operations: t.List[t.Tuple[str, int]] = []
+        self.saves: t.List[t.Tuple[str, int]] = []
+        self.conflicts: t.List[t.Tuple[str, str]] = []
+        self.handlers: t.List[t.Tuple[str, int, bool]] = []
+        self.checkpoints: t.List[str] = []
+        self.lock_misses: t.List[str] = []
+
+    def operation(self, name: str, duration: float, rows: int) -> None:
+        assert duration >= 0
+        self.operations.append((name, rows))
+
+    def save_events(self, aggregate_type: str, duration: float, count: int) -> None:
+        self.saves.append((aggregate_type, count))
+
+    def version_conflict(self, aggregate_type: str, aggregate_id: str) -> None:
+        self.conflicts.append((aggregate_type, aggregate_id))
+
+    def handler(
+        self,
+        subscription_name: str,
+        event: meowmx.RecordedEvent,
+        duration: float,
+        succeeded: bool,
+    ) -> None:
+        self.handlers.append((subscription_name, event.version, succeeded))
+
+    def checkpoint_updated(self, subscription_name: str, duration: float) -> None:
+        self.checkpoints.append(subscription_name)
+
+    def subscription_lock_missed(self, subscription_name: str) -> None:
+        self.lock_misses.append(subscription_name)
+
+
+class ExampleError(RuntimeError):
+    pass
+
+
+def test_hooks_report_saves_handlers_and_conflicts(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    hooks = RecordingHooks()
+    meow = meowmx.Client(engine=engine, session_maker=session_maker, hooks=hooks)
+    aggregate_type = f"meowmx-hooks-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    events = [
+        meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))
+        for i in range(3)
+    ]
+
+    meow.save_events(aggregate_type, aggregate_id, events, version=0)
+    assert hooks.saves == [(aggregate_type, 3)]
+    assert ("append_event", 1) in hooks.operations
+    assert ("check_and_update_aggregate_version", 1) in hooks.operations
+
+    with pytest.raises(meowmx.ExpectedVersionFailure):
+        meow.save_events(aggregate_type, aggregate_id, events, version=0)
+    assert hooks.conflicts == [(aggregate_type, aggregate_id)]
+    assert ("check_and_update_aggregate_version", 0) in hooks.operations
+
+    meow.load_events(aggregate_type, aggregate_id)
+    assert ("read_events_by_aggregate_id", 3) in hooks.operations
+
+    sub_name = f"{aggregate_type}-sub"
+    stop_signal = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        if event.version == 2:
+            raise ExampleError("pretend an error happened")
+
+    with pytest.raises(ExampleError):
+        meow.sub(sub_name, aggregate_type, handler, stop_signal=stop_signal)
+
+    assert hooks.handlers == [
+        (sub_name, 0, True),
+        (sub_name, 1, True),
+        (sub_name, 2, False),
+    ]
+    assert hooks.checkpoints == [sub_name, sub_name]
+
+
+def test_hooks_report_lock_misses(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+) -> None:
+    if engine.dialect.name != "postgresql":
+        pytest.skip("only Postgres skips locked subscriptions")
+
+    hooks = RecordingHooks()
+    meow = meowmx.Client(engine=engine, session_maker=session_maker, hooks=hooks)
+    sub_name = f"meowmx-hooks-{_generate_slug()}-sub"
+    meow.register_subscription(sub_name)
+
+    with session_maker() as session:
+        with session.begin():
+            session.execute(
+                sqlalchemy.text(
+                    "SELECT 1 FROM es_event_subscriptions "
+                    "WHERE subscription_name = :name FOR UPDATE"
+                ),
+                {"name": sub_name},
+            )
+            batch = meow._handle_subscription_events(
+                sub_name, "nothing", 10, lambda session, event: None
+            )
+
+    assert not batch.lock_acquired
+    assert hooks.lock_misses == [sub_name]
+
+
+def test_prometheus_hooks(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    meow = meowmx.Client(
+        engine=engine,
+        session_maker=session_maker,
+        hooks=PrometheusHooks(registry=registry),
+    )
+    aggregate_type = f"meowmx-hooks-{_generate_slug()}"
+    meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [meowmx.NewEvent(event_type="Counted", json="{}")],
+        version=0,
+    )
+    assert (
+        registry.get_sample_value(
+            "meowmx_events_saved_total", {"aggregate_type": aggregate_type}
+        )
+        == 1
+    )
+    assert (
+        registry.get_sample_value(
+            "meowmx_operation_duration_seconds_count", {"operation": "append_event"}
+        )
+        == 1
+    )
+
+
+def test_opentelemetry_hooks(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    meow = meowmx.Client(
+        engine=engine,
+        session_maker=session_maker,
+        hooks=OpenTelemetryHooks(tracer=provider.get_tracer("test")),
+    )
+    aggregate_type = f"meowmx-hooks-{_generate_slug()}"
+    meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [meowmx.NewEvent(event_type="Counted", json="{}")],
+        version=0,
+    )
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert "meowmx.append_event" in spans
+    save_span = spans["meowmx.save_events"]
+    assert save_span.attributes is not None
+    assert save_span.attributes["meowmx.aggregate_type"] == aggregate_type
+    assert save_span.attributes["meowmx.event_count"] == 1
@@ -0,0 +1,99 @@
+import typing as t
+
+import coolname  # type: ignore
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def test_pages_split_transactions(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-pages-{_generate_slug()}"
+    for count in (7, 2):
+        # each save is one transaction
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [
+                meowmx.NewEvent(event_type="Counted", data={"i": i})
+                for i in range(count)
+            ],
+            version=0,
+        )
+
+    everything = meow.load_all_events(from_tx_id=None, to_tx_id=None, limit=100_000)
+    first = next(
+        index
+        for index, event in enumerate(everything)
+        if event.aggregate_type == aggregate_type
+    )
+    expected = everything[first:]
+    start = (
+        None
+        if first == 0
+        else meowmx.SubCheckpoint(
+            last_tx_id=everything[first - 1].tx_id,
+            last_event_id=everything[first - 1].id,
+        )
+    )
+
+    page = meow.load_all_events_page(start, limit=3)
+    assert page.events == expected[:3]
+    page = meow.load_all_events_page(page.position, limit=3)
+    assert page.events == expected[3:6]
+    assert page.position == meowmx.SubCheckpoint(
+        last_tx_id=expected[5].tx_id, last_event_id=expected[5].id
+    )
+
+    events = list(meow.iter_all_events(start, page_size=3))
+    assert events == expected
+    assert [e.data["i"] for e in events if e.aggregate_type == aggregate_type] == [
+        *range(7),
+        *range(2),
+    ]
+
+    last = meowmx.SubCheckpoint(
+        last_tx_id=expected[-1].tx_id, last_event_id=expected[-1].id
+    )
+    page = meow.load_all_events_page(last, limit=3)
+    assert page.events == []
+    assert page.position == last
+
+    batch = meow.load_all_events_batch(
+        from_tx_id=expected[1].tx_id,
+        to_tx_id=None,
+        limit=2,
+        after_event_id=expected[1].id,
+    )
+    assert list(batch) == expected[2:4]
+
+
+def test_transaction_ids_follow_commits(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-pages-{_generate_slug()}"
+    first = meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [meowmx.NewEvent(event_type="Counted", data={"i": i}) for i in range(2)],
+        version=0,
+    )
+    second = meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [meowmx.NewEvent(event_type="Counted", data={"i": 2})],
+        version=0,
+    )
+
+    assert first[0].tx_id == first[1].tx_id
+    assert first[1].tx_id < second[0].tx_id
+    assert (
+        meow.load_all_events(
+            from_tx_id=first[0].tx_id, to_tx_id=second[0].tx_id, limit=10
+        )
+        == second
+    )
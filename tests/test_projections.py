@@ -0,0 +1,247 @@
+import threading
+import time
+import typing as t
+import uuid
+
+import coolname  # type: ignore
+import sqlalchemy
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def _create_projection(meow: meowmx.Client, aggregate_type: str) -> meowmx.Projection:
+    table = sqlalchemy.Table(
+        f"meowmx_test_cats_{_generate_slug().replace('-', '_')}",
+        sqlalchemy.MetaData(),
+        sqlalchemy.Column("id", sqlalchemy.String(64), primary_key=True),
+        sqlalchemy.Column("name", sqlalchemy.String(64)),
+        sqlalchemy.Column("meals", sqlalchemy.Integer, nullable=False, default=0),
+    )
+    table.create(meow._engine)
+    return meowmx.Projection(
+        name=f"{aggregate_type}-names",
+        table=table,
+        key="id",
+        aggregate_types=aggregate_type,
+        reducers={
+            "Adopted": lambda row, event: {"name": event.data["name"], "meals": 0},
+            "Renamed": lambda row, event: {"name": event.data["name"]},
+            "Fed": lambda row, event: {"meals": row["meals"] + 1} if row else None,
+            "Rehomed": lambda row, event: meowmx.Projection.DELETE,
+        },
+    )
+
+
+def _adopt(
+    meow: meowmx.Client, aggregate_type: str, aggregate_id: str, name: str
+) -> None:
+    meow.save_events(
+        aggregate_type,
+        aggregate_id,
+        [
+            meowmx.NewEvent(event_type="Adopted", data={"name": name}),
+            meowmx.NewEvent(event_type="Fed", data={}),
+            meowmx.NewEvent(event_type="Ignored", data={}),
+            meowmx.NewEvent(event_type="Fed", data={}),
+            meowmx.NewEvent(event_type="Renamed", data={"name": f"{name} the cat"}),
+        ],
+        version=0,
+    )
+
+
+def _read_rows(
+    meow: meowmx.Client, projection: meowmx.Projection
+) -> t.Dict[str, t.Tuple[str, int]]:
+    with meow._engine.connect() as connection:
+        return {
+            row.id: (row.name, row.meals)
+            for row in connection.execute(sqlalchemy.select(projection.table))
+        }
+
+
+def test_rebuild_projection(meow: meowmx.Client, new_uuid: t.Callable[[], str]) -> None:
+    aggregate_type = f"meowmx-projection-{_generate_slug()}"
+    projection = _create_projection(meow, aggregate_type)
+    try:
+        ids = [new_uuid() for _ in range(5)]
+        for index, aggregate_id in enumerate(ids):
+            _adopt(meow, aggregate_type, aggregate_id, f"cat {index}")
+
+        meow.save_events(
+            aggregate_type,
+            ids[0],
+            [meowmx.NewEvent(event_type="Rehomed", data={})],
+            version=5,
+        )
+
+        # small batches, so rows are read back and updated by later batches
+        assert meow.rebuild_projection(projection, batch_size=3) == 21
+        expected = {
+            aggregate_id: (f"cat {index} the cat", 2)
+            for index, aggregate_id in enumerate(ids)
+            if index != 0
+        }
+        assert _read_rows(meow, projection) == expected
+
+        # rebuilding starts over rather than carrying on
+        with meow._engine.begin() as connection:
+            connection.execute(sqlalchemy.update(projection.table).values(name="stale"))
+        assert meow.rebuild_projection(projection) == 21
+        assert _read_rows(meow, projection) == expected
+        status = meow.subscription_status(projection.name)
+        assert status is not None
+        assert status.lag_events == 0
+    finally:
+        projection.table.drop(meow._engine)
+
+
+def test_project(meow: meowmx.Client, new_uuid: t.Callable[[], str]) -> None:
+    aggregate_type = f"meowmx-projection-{_generate_slug()}"
+    projection = _create_projection(meow, aggregate_type)
+    stop_signal = threading.Event()
+    thread = threading.Thread(
+        target=meow.project,
+        args=(projection,),
+        kwargs={"batch_size": 4, "stop_signal": stop_signal, "max_sleep_time": 0.1},
+    )
+    thread.start()
+    try:
+        aggregate_id = new_uuid()
+        _adopt(meow, aggregate_type, aggregate_id, "Tom")
+        meow.save_events(
+            aggregate_type,
+            aggregate_id,
+            [meowmx.NewEvent(event_type="Fed", data={})],
+            version=5,
+        )
+        for _ in range(100):
+            status = meow.subscription_status(projection.name)
+            if status is not None and status.lag_events == 0:
+                break
+            time.sleep(0.05)
+        assert _read_rows(meow, projection) == {aggregate_id: ("Tom the cat", 3)}
+    finally:
+        stop_signal.set()
+        thread.join()
+        projection.table.drop(meow._engine)
+
+
+def test_rows_made_again_after_being_deleted(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-projection-{_generate_slug()}"
+    projection = _create_projection(meow, aggregate_type)
+    try:
+        aggregate_id = new_uuid()
+        _adopt(meow, aggregate_type, aggregate_id, "Tom")
+        assert meow.rebuild_projection(projection) == 4
+        # the row is deleted and made again in a single batch
+        meow.save_events(
+            aggregate_type,
+            aggregate_id,
+            [
+                meowmx.NewEvent(event_type="Rehomed", data={}),
+                meowmx.NewEvent(event_type="Adopted", data={"name": "Jerry"}),
+                meowmx.NewEvent(event_type="Fed", data={}),
+            ],
+            version=5,
+        )
+        with meow._session_maker() as session, session.begin():
+            projection.apply(
+                session, meow.load_events(aggregate_type, aggregate_id)[5:]
+            )
+        assert _read_rows(meow, projection) == {aggregate_id: ("Jerry", 1)}
+    finally:
+        projection.table.drop(meow._engine)
+
+
+def test_projection_with_compound_key(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-projection-{_generate_slug()}"
+    table = sqlalchemy.Table(
+        f"meowmx_test_counts_{_generate_slug().replace('-', '_')}",
+        sqlalchemy.MetaData(),
+        sqlalchemy.Column("id", sqlalchemy.String(64), primary_key=True),
+        sqlalchemy.Column("event_type", sqlalchemy.String(64), primary_key=True),
+        sqlalchemy.Column("count", sqlalchemy.Integer, nullable=False),
+    )
+    table.create(meow._engine)
+
+    def count(
+        row: t.Optional[t.Mapping[str, t.Any]], event: meowmx.RecordedEvent
+    ) -> t.Dict[str, t.Any]:
+        return {"count": row["count"] + 1 if row else 1}
+
+    projection = meowmx.Projection(
+        name=f"{aggregate_type}-counts",
+        table=table,
+        key=("id", "event_type"),
+        aggregate_types=aggregate_type,
+        reducers={"Fed": count, "Renamed": count},
+        row_key=lambda event: (event.aggregate_id, event.event_type),
+    )
+    try:
+        aggregate_id = new_uuid()
+        _adopt(meow, aggregate_type, aggregate_id, "Tom")
+        assert meow.rebuild_projection(projection, batch_size=2) == 3
+        with meow._engine.connect() as connection:
+            counts = {
+                (row.id, row.event_type): row.count
+                for row in connection.execute(sqlalchemy.select(table))
+            }
+        assert counts == {(aggregate_id, "Fed"): 2, (aggregate_id, "Renamed"): 1}
+    finally:
+        table.drop(meow._engine)
+
+
+def test_projection_with_uuid_key(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-projection-{_generate_slug()}"
+    table = sqlalchemy.Table(
+        f"meowmx_test_meals_{_generate_slug().replace('-', '_')}",
+        sqlalchemy.MetaData(),
+        sqlalchemy.Column("cat_id", sqlalchemy.Uuid, primary_key=True),
+        sqlalchemy.Column("meals", sqlalchemy.Integer, nullable=False),
+    )
+    table.create(meow._engine)
+    projection = meowmx.Projection(
+        name=f"{aggregate_type}-meals",
+        table=table,
+        key="cat_id",
+        aggregate_types=aggregate_type,
+        reducers={
+            "Adopted": lambda row, event: {"meals": 0},
+            "Fed": lambda row, event: {"meals": row["meals"] + 1} if row else None,
+        },
+        # the table gives back uuid.UUID values while the events have str ones
+        row_key=lambda event: event.data["cat_id"],
+    )
+    try:
+        cat_id = str(uuid.uuid4())
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [
+                meowmx.NewEvent(event_type="Adopted", data={"cat_id": cat_id}),
+                meowmx.NewEvent(event_type="Fed", data={"cat_id": cat_id}),
+                meowmx.NewEvent(event_type="Fed", data={"cat_id": cat_id}),
+                meowmx.NewEvent(event_type="Fed", data={"cat_id": cat_id}),
+            ],
+            version=0,
+        )
+        # small batches, so the row is read back before each update
+        assert meow.rebuild_projection(projection, batch_size=1) == 4
+        with meow._engine.connect() as connection:
+            meals = {
+                row.cat_id: row.meals
+                for row in connection.execute(sqlalchemy.select(table))
+            }
+        assert meals == {uuid.UUID(cat_id): 3}
+    finally:
+        table.drop(meow._engine)
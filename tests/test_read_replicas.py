@@ -0,0 +1,89 @@
+import pathlib
+import typing as t
+
+import pytest
+import sqlalchemy
+
+import meowmx
+
+
+@pytest.fixture
+def primary_and_replica(
+    tmp_path: pathlib.Path,
+) -> t.Tuple[meowmx.Client, meowmx.Engine]:
+    """A client reading from a "replica" which never receives any events.
+
+    Whatever is read from the replica comes back empty, so the tests can tell
+    which database was used.
+    """
+    primary = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in [primary, replica]:
+        meowmx.Client(
+            engine=engine, session_maker=sqlalchemy.orm.sessionmaker(bind=engine)
+        ).setup_tables()
+    client = meowmx.Client(
+        engine=primary,
+        session_maker=sqlalchemy.orm.sessionmaker(bind=primary),
+        read_engines=replica,
+    )
+    return client, replica
+
+
+def test_reads_go_to_the_replica(
+    primary_and_replica: t.Tuple[meowmx.Client, meowmx.Engine],
+) -> None:
+    meow, _ = primary_and_replica
+    saved = meow.save_events(
+        "meowmx-replica-test",
+        "aggregate-1",
+        [meowmx.NewEvent(event_type="Created", json="{}")],
+        version=0,
+    )
+
+    assert meow.load_events("meowmx-replica-test", "aggregate-1") == []
+    assert meow.load_all_events(None, None, None) == []
+
+    # a replica which is behind is skipped for the primary
+    assert (
+        meow.load_events(
+            "meowmx-replica-test", "aggregate-1", min_version=saved[-1].version
+        )
+        == saved
+    )
+    assert meow.load_all_events(None, None, None, min_tx_id=saved[-1].tx_id) == saved
+
+    # reads made in the caller's session stay on the primary
+    with sqlalchemy.orm.Session(meow._engine) as session:
+        assert meow.load_events("meowmx-replica-test", "aggregate-1", session=session)
+
+
+def test_subscriptions_read_from_the_replica(
+    primary_and_replica: t.Tuple[meowmx.Client, meowmx.Engine],
+) -> None:
+    meow, _ = primary_and_replica
+    meow.save_events(
+        "meowmx-replica-test",
+        "aggregate-1",
+        [meowmx.NewEvent(event_type="Created", json="{}")],
+        version=0,
+    )
+    meow.register_subscription("meowmx-replica-sub")
+
+    batch = meow._handle_subscription_events(
+        "meowmx-replica-sub", "meowmx-replica-test", 10, lambda session, event: None
+    )
+
+    assert batch.lock_acquired
+    assert batch.processed == 0
+
+
+def test_read_engines_must_match_the_engine(tmp_path: pathlib.Path) -> None:
+    primary = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = sqlalchemy.create_engine("postgresql+psycopg://localhost/meowmx")
+    with pytest.raises(ValueError):
+        meowmx.Client(
+            engine=primary,
+            session_maker=sqlalchemy.orm.sessionmaker(bind=primary),
+            read_engines=[replica],
+        )
@@ -225,6 +225,44 @@ def test_save_and_load_events_with_session(
     assert expected_events == recorded_events_2
 
 
+def test_client_runs_without_orm_sessions(
+    engine: meowmx.Engine, meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    def no_sessions() -> meowmx.Session:
+        raise AssertionError("a session was made")
+
+    client = meowmx.Client(engine=engine, session_maker=no_sessions)
+    aggregate_type = f"meowmx-core-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    saved = client.save_events(
+        aggregate_type,
+        aggregate_id,
+        [meowmx.NewEvent(event_type="Counted", data={"i": i}) for i in range(2)],
+        version=0,
+    )
+    with pytest.raises(meowmx.ExpectedVersionFailure):
+        client.save_events(
+            aggregate_type,
+            aggregate_id,
+            [meowmx.NewEvent(event_type="Counted", data={"i": 2})],
+            version=0,
+        )
+
+    loaded = client.load_events(aggregate_type, aggregate_id)
+    assert [event.data for event in loaded] == [{"i": 0}, {"i": 1}]
+    assert [event.id for event in loaded] == [event.id for event in saved]
+    page = client.load_all_events_page(
+        meowmx.SubCheckpoint(saved[0].tx_id - 1, 0), limit=10_000
+    )
+    assert saved[0].id in [event.id for event in page.events]
+
+    sub_name = f"{aggregate_type}-sub"
+    client.register_subscription(sub_name, aggregate_type)
+    status = client.subscription_status(sub_name)
+    assert status is not None
+    assert status.lag_events == 2
+
+
 def test_concurrent_save_check(
     meow: meowmx.Client, new_uuid: t.Callable[[], str]
 ) -> None:
@@ -328,3 +366,21 @@ def test_concurrent_save_check(
             version=1,
         ),
     ]
+
+
+def test_save_events_without_a_version(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    aggregate_type = f"meowmx-test-{_generate_slug()}"
+    aggregate_id = new_uuid()
+    for expected_version in range(2):
+        recorded = meow.save_events(
+            aggregate_type,
+            aggregate_id,
+            [meowmx.NewEvent(event_type="Counted", json="{}")],
+            version=None,
+        )
+        assert [event.version for event in recorded] == [expected_version]
+    assert [
+        event.version for event in meow.load_events(aggregate_type, aggregate_id)
+    ] == [0, 1]
@@ -0,0 +1,121 @@
+import concurrent.futures
+import pathlib
+import threading
+import time
+import typing as t
+
+import pytest
+import sqlalchemy
+
+import meowmx
+from meowmx import sqlalchemy as meowmx_sqlalchemy
+
+
+def _create_client(tmp_path: pathlib.Path) -> meowmx.Client:
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'meowmx.db'}")
+    client = meowmx.Client(engine=engine)
+    client.setup_tables()
+    return client
+
+
+def test_sqlite_uses_write_ahead_logging(tmp_path: pathlib.Path) -> None:
+    meow = _create_client(tmp_path)
+    with meow._engine.connect() as connection:
+        mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar_one()
+    assert mode == "wal"
+
+
+def test_concurrent_writers_and_readers(tmp_path: pathlib.Path) -> None:
+    meow = _create_client(tmp_path)
+    writers = 8
+    saves_per_writer = 25
+
+    def write(writer: int) -> None:
+        for version in range(saves_per_writer):
+            meow.save_events(
+                "meowmx-concurrency-test",
+                f"aggregate-{writer}",
+                [meowmx.NewEvent(event_type="Counted", json="{}")],
+                version=version,
+            )
+
+    def read(writer: int) -> int:
+        return len(meow.load_events("meowmx-concurrency-test", f"aggregate-{writer}"))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=writers * 2) as pool:
+        writes = [pool.submit(write, writer) for writer in range(writers)]
+        reads = [pool.submit(read, writer) for writer in range(writers)]
+        for future in writes + reads:
+            future.result()
+
+    for writer in range(writers):
+        assert read(writer) == saves_per_writer
+
+
+def test_concurrent_registration(tmp_path: pathlib.Path) -> None:
+    meow = _create_client(tmp_path)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [
+            pool.submit(meow.register_subscription, "meowmx-concurrency-sub")
+            for _ in range(16)
+        ]:
+            future.result()
+
+    assert meow.subscription_status("meowmx-concurrency-sub") is not None
+
+
+def test_subscriptions_outlast_busy_writers(tmp_path: pathlib.Path) -> None:
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'meowmx.db'}")
+    meowmx_sqlalchemy.configure_engine(engine, write_timeout=0.05)
+    meow = meowmx.Client(engine=engine)
+    meow.setup_tables()
+    handled: t.List[int] = []
+    stop_signal = threading.Event()
+    thread = threading.Thread(
+        target=meow.sub,
+        args=(
+            "meowmx-busy-sub",
+            "meowmx-busy-test",
+            lambda session, event: handled.append(event.id),
+        ),
+        kwargs={
+            "stop_signal": stop_signal,
+            "min_sleep_time": 0.01,
+            "max_sleep_time": 0.05,
+        },
+    )
+    thread.start()
+    try:
+        while meow.subscription_status("meowmx-busy-sub") is None:
+            time.sleep(0.01)
+        writer = engine.connect().execution_options(**{meowmx_sqlalchemy.WRITE: True})
+        with writer, writer.begin():
+            # meanwhile other writers, and the subscription, time out
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+                future = pool.submit(
+                    meow.save_events,
+                    "meowmx-busy-test",
+                    "aggregate",
+                    [meowmx.NewEvent(event_type="Counted", json="{}")],
+                    0,
+                )
+                with pytest.raises(meowmx_sqlalchemy.WriteTimeout):
+                    future.result()
+            time.sleep(0.3)
+        assert thread.is_alive()
+
+        meow.save_events(
+            "meowmx-busy-test",
+            "aggregate",
+            [meowmx.NewEvent(event_type="Counted", json="{}")],
+            version=0,
+        )
+        for _ in range(100):
+            if handled:
+                break
+            time.sleep(0.05)
+        assert len(handled) == 1
+    finally:
+        stop_signal.set()
+        thread.join()
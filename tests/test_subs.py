@@ -6,6 +6,7 @@ import traceback
 import typing as t
 
 import coolname  # type: ignore
+import pytest
 
 import meowmx
 
@@ -257,3 +258,115 @@ def test_subscriptions(
 
     assert worker_orders.seen_event_count == event_count
     assert len(missing) == 0
+
+
+def test_sub_registers_subscription_once(
+    meow: meowmx.Client,
+    monkeypatch: pytest.MonkeyPatch,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    rname = _generate_slug()
+    aggregate_type = f"meowmx-st-{rname}"
+    sub_name = f"meowmx-st-{rname}-once"
+
+    # registering an existing subscription is harmless
+    meow.register_subscription(sub_name)
+    meow.register_subscription(sub_name)
+
+    create_calls = 0
+    original = meow._esp.create_subscription_if_absent
+
+    def counting_create(
+        session: meowmx.Session,
+        subscription_name: str,
+        aggregate_type: t.Optional[str] = None,
+        event_filter: t.Optional[meowmx.EventFilter] = None,
+    ) -> None:
+        nonlocal create_calls
+        create_calls += 1
+        original(session, subscription_name, aggregate_type, event_filter)
+
+    monkeypatch.setattr(meow._esp, "create_subscription_if_absent", counting_create)
+
+    event_count = 5
+    for i in range(event_count):
+        meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))],
+            version=0,
+        )
+
+    seen: t.List[meowmx.RecordedEvent] = []
+    stop_signal = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        seen.append(event)
+        if len(seen) == event_count:
+            stop_signal.set()
+
+    meow.sub(
+        sub_name,
+        aggregate_type,
+        handler=handler,
+        batch_size=1,
+        stop_signal=stop_signal,
+    )
+
+    assert len(seen) == event_count
+    assert create_calls == 1
+
+
+def test_subscription_to_several_types(
+    meow: meowmx.Client, new_uuid: t.Callable[[], str]
+) -> None:
+    slug = _generate_slug()
+    cats = f"meowmx-st-cats-{slug}"
+    dogs = f"meowmx-st-dogs-{slug}"
+    birds = f"meowmx-st-birds-{slug}"
+    sub_name = f"meowmx-st-{slug}-filtered"
+
+    wanted: t.List[t.Tuple[str, str]] = []
+    for i in range(3):
+        for aggregate_type in (cats, dogs, birds):
+            for event_type in ("Fed", "Napped", "Played"):
+                meow.save_events(
+                    aggregate_type,
+                    new_uuid(),
+                    [meowmx.NewEvent(event_type=event_type, json=json.dumps({"i": i}))],
+                    version=0,
+                )
+                if aggregate_type != birds and event_type != "Napped":
+                    wanted.append((aggregate_type, event_type))
+
+    meow.register_subscription(sub_name, [cats, dogs], event_types=["Fed", "Played"])
+    status = meow.subscription_status(sub_name)
+    assert status is not None
+    assert status.event_filter == meowmx.EventFilter.create(
+        [cats, dogs], ["Fed", "Played"]
+    )
+    assert status.lag_events == len(wanted)
+
+    seen: t.List[t.Tuple[str, str]] = []
+    stop_signal = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        seen.append((event.aggregate_type, event.event_type))
+        if len(seen) == len(wanted):
+            stop_signal.set()
+
+    meow.sub(
+        sub_name,
+        [cats, dogs],
+        handler,
+        batch_size=4,
+        stop_signal=stop_signal,
+        event_types=["Fed", "Played"],
+    )
+
+    assert seen == wanted
+    status = meow.subscription_status(sub_name)
+    assert status is not None
+    assert status.lag_events == 0
+    batches = meow.recent_subscription_batches(sub_name)
+    assert batches[0].aggregate_type == ",".join(sorted([cats, dogs]))
@@ -0,0 +1,103 @@
+import json
+import threading
+import typing as t
+
+import coolname  # type: ignore
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+class BatchRecorder(meowmx.Hooks):
+    def __init__(self) -> None:
+        self.batches: t.List[meowmx.SubscriptionBatch] = []
+
+    def subscription_batch(self, batch: meowmx.SubscriptionBatch) -> None:
+        self.batches.append(batch)
+
+
+def test_subscription_status(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    recorder = BatchRecorder()
+    meow = meowmx.Client(engine=engine, session_maker=session_maker, hooks=recorder)
+    aggregate_type = f"meowmx-status-{_generate_slug()}"
+    sub_name = f"{aggregate_type}-sub"
+
+    assert meow.subscription_status(sub_name) is None
+
+    meow.register_subscription(sub_name, aggregate_type)
+    status = meow.subscription_status(sub_name)
+    assert status is not None
+    assert status.aggregate_type == aggregate_type
+    assert status.head_tx_id is None
+    assert status.head_event_id is None
+    assert status.lag_events == 0
+    assert status.lag_transactions == 0
+    assert status.events_per_second is None
+
+    # one transaction with three events, then two with one each
+    meow.save_events(
+        aggregate_type,
+        new_uuid(),
+        [
+            meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))
+            for i in range(3)
+        ],
+        version=0,
+    )
+    for i in range(3, 5):
+        last_written = meow.save_events(
+            aggregate_type,
+            new_uuid(),
+            [meowmx.NewEvent(event_type="Counted", json=json.dumps({"i": i}))],
+            version=0,
+        )
+
+    status = meow.subscription_status(sub_name)
+    assert status is not None
+    assert status.lag_events == 5
+    assert status.lag_transactions == 3
+    assert not status.lag_capped
+    assert status.head_tx_id == last_written[0].tx_id
+    assert status.head_event_id == last_written[0].id
+
+    capped = meow.subscription_status(sub_name, max_lag_count=2)
+    assert capped is not None
+    assert capped.lag_events == 2
+    assert capped.lag_capped
+
+    seen = 0
+    stop_signal = threading.Event()
+
+    def handler(session: meowmx.Session, event: meowmx.RecordedEvent) -> None:
+        nonlocal seen
+        seen += 1
+        if seen == 5:
+            stop_signal.set()
+
+    meow.sub(sub_name, aggregate_type, handler, batch_size=2, stop_signal=stop_signal)
+
+    status = meow.subscription_status(sub_name)
+    assert status is not None
+    assert status.lag_events == 0
+    assert status.last_tx_id == status.head_tx_id
+    assert status.last_event_id == status.head_event_id
+    assert status.events_per_second is not None
+    assert status.events_per_second > 0
+
+    batches = meow.recent_subscription_batches(sub_name)
+    assert [batch.processed for batch in batches] == [2, 2, 1]
+    assert [batch.has_more for batch in batches] == [True, True, False]
+    assert batches[-1].last_event_id == last_written[0].id
+    assert all(batch.lock_acquired for batch in batches)
+    assert recorder.batches == batches
+
+    names = [status.subscription_name for status in meow.all_subscription_status()]
+    assert sub_name in names
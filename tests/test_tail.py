@@ -0,0 +1,108 @@
+import threading
+import typing as t
+
+import coolname  # type: ignore
+import pytest
+
+import meowmx
+
+
+def _generate_slug() -> str:
+    return t.cast(str, coolname.generate_slug())
+
+
+def _head(meow: meowmx.Client) -> t.Optional[meowmx.SubCheckpoint]:
+    position = None
+    while True:
+        page = meow.load_all_events_page(position, limit=10_000)
+        if not page.events:
+            return position
+        position = page.position
+
+
+def test_tail_all_events(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    aggregate_types = [f"meowmx-tail-{_generate_slug()}" for _ in range(2)]
+    start = _head(meow)
+    stop_signal = threading.Event()
+    seen: t.List[meowmx.RecordedEvent] = []
+    done = threading.Event()
+
+    def tail() -> None:
+        for event in meow.tail_all_events(
+            start, page_size=2, stop_signal=stop_signal, max_sleep_time=0.2
+        ):
+            if event.aggregate_type in aggregate_types:
+                seen.append(event)
+                if len(seen) == 6:
+                    done.set()
+
+    thread = threading.Thread(target=tail)
+    thread.start()
+    try:
+        # written by another client, so on Postgres only the notification
+        # from the database can wake the tail up early
+        writer = meowmx.Client(engine=engine, session_maker=session_maker)
+        for aggregate_type in aggregate_types:
+            writer.save_events(
+                aggregate_type,
+                new_uuid(),
+                [
+                    meowmx.NewEvent(event_type="Counted", data={"i": i})
+                    for i in range(3)
+                ],
+                version=0,
+            )
+        assert done.wait(10)
+    finally:
+        stop_signal.set()
+        thread.join()
+
+    assert [(e.aggregate_type, e.data["i"]) for e in seen] == [
+        (aggregate_type, i) for aggregate_type in aggregate_types for i in range(3)
+    ]
+
+
+def test_committed_only_waits_for_transactions_in_progress(
+    engine: meowmx.Engine,
+    session_maker: meowmx.SessionMaker,
+    meow: meowmx.Client,
+    new_uuid: t.Callable[[], str],
+) -> None:
+    if engine.dialect.name != "postgresql":
+        pytest.skip("only Postgres runs write transactions concurrently")
+    aggregate_type = f"meowmx-tail-{_generate_slug()}"
+    start = _head(meow)
+    slow_id = new_uuid()
+    fast_id = new_uuid()
+
+    with session_maker() as session:
+        with session.begin():
+            # this transaction starts first but commits last
+            meow.save_events(
+                aggregate_type,
+                slow_id,
+                [meowmx.NewEvent(event_type="Slow", data={})],
+                version=0,
+                session=session,
+            )
+            meow.save_events(
+                aggregate_type,
+                fast_id,
+                [meowmx.NewEvent(event_type="Fast", data={})],
+                version=0,
+            )
+            # a reader that moved past the fast event now would never see
+            # the slow one
+            unguarded = meow.load_all_events_page(start)
+            assert [e.event_type for e in unguarded.events] == ["Fast"]
+            guarded = meow.load_all_events_page(start, committed_only=True)
+            assert guarded.events == []
+            assert guarded.position == start
+
+    page = meow.load_all_events_page(start, committed_only=True)
+    assert [e.event_type for e in page.events] == ["Slow", "Fast"]